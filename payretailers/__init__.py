@@ -1,5 +1,6 @@
 from .client import PayRetailersClient
 from .exceptions import PayRetailersError
+from .outbox import PayRetailersOutbox
 from .countries import (
     PayRetailersBrazil,
     PayRetailersArgentina,
@@ -13,6 +14,7 @@ from .countries import (
 __all__ = [
     "PayRetailersClient",
     "PayRetailersError",
+    "PayRetailersOutbox",
     "PayRetailersBrazil",
     "PayRetailersArgentina",
     "PayRetailersChile",
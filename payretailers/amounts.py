@@ -0,0 +1,105 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Dict, Any, List, Iterable, Union, Tuple
+
+AmountValue = Union[str, int, float, Decimal]
+
+# Decimal places per currency; currencies that are not listed use DEFAULT_MINOR_UNITS.
+MINOR_UNITS: Dict[str, int] = {
+    "CLP": 0,
+    "COP": 0,
+    "UGX": 0,
+    "XOF": 0,
+    "XAF": 0,
+    "RW": 0,
+    "USDT": 6,
+    "USDC": 6,
+}
+DEFAULT_MINOR_UNITS = 2
+
+_EXPONENTS = {places: Decimal(1).scaleb(-places) for places in range(7)}
+# Largest difference from the rounded value still treated as float noise (e.g. 0.1 + 0.2).
+_FLOAT_TOLERANCE = Decimal("1e-9")
+
+
+def minor_units(currency: Any) -> int:
+    """Number of decimal places used by the currency (CurrencyEnum or code)."""
+    return MINOR_UNITS.get(getattr(currency, "value", currency), DEFAULT_MINOR_UNITS)
+
+
+def _parse(value: AmountValue, places: int) -> Tuple[Decimal, Decimal]:
+    """Returns the exact value and its rounding to `places` decimals; raises ValueError on anything else."""
+    try:
+        if isinstance(value, float):
+            exact = Decimal(repr(value))
+        elif isinstance(value, (Decimal, int)) and not isinstance(value, bool):
+            exact = Decimal(value)
+        elif isinstance(value, str):
+            exact = Decimal(value.strip())
+        else:
+            raise ValueError(f"Invalid amount type: {type(value).__name__}")
+        if not exact.is_finite():
+            raise ValueError(f"Invalid amount '{value}'")
+        # Raises InvalidOperation when the result needs more digits than the context precision.
+        return exact, exact.quantize(_EXPONENTS[places], rounding=ROUND_HALF_EVEN)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount '{value}'")
+
+
+def to_decimal(value: AmountValue, currency: Any) -> Decimal:
+    """
+    Converts an amount to an exact Decimal with the currency's decimal places.
+
+    Floats are rounded to the nearest minor unit, which removes binary noise such
+    as 0.1 + 0.2; any other input, or a float that is really off the minor unit,
+    raises ValueError instead of silently changing the amount.
+    """
+    places = minor_units(currency)
+    exact, amount = _parse(value, places)
+    tolerance = _FLOAT_TOLERANCE if isinstance(value, float) else 0
+    if abs(amount - exact) > tolerance:
+        code = getattr(currency, "value", currency)
+        raise ValueError(f"Amount '{value}' has more than {places} decimal places allowed for {code}")
+    return amount
+
+
+def round_amount(value: AmountValue, currency: Any) -> Decimal:
+    """
+    Rounds an amount half-even to the currency's decimal places, e.g. to compare
+    amounts reported by the API; raises ValueError on non-numeric input.
+    """
+    return _parse(value, minor_units(currency))[1]
+
+
+def format_amount(value: AmountValue, currency: Any) -> str:
+    """Formats an amount as the API string for the currency, e.g. 10 BRL -> '10.00', 1500 CLP -> '1500'."""
+    return f"{to_decimal(value, currency):f}"
+
+
+def from_minor_units(units: int, currency: Any) -> Decimal:
+    """Converts an integer number of minor units (e.g. cents) to a Decimal amount."""
+    return Decimal(int(units)).scaleb(-minor_units(currency))
+
+
+def format_minor_units(units: Iterable[int], currency: Any) -> List[str]:
+    """
+    Formats many integer minor-unit amounts as API strings in one pass, e.g.
+    [1050, 7] BRL -> ['10.50', '0.07']. Accepts lists or NumPy integer arrays.
+    """
+    places = minor_units(currency)
+    if hasattr(units, "tolist"):
+        units = units.tolist()
+    if places == 0:
+        return [str(value) for value in units]
+    # Slicing the decimal string beats divmod formatting and vectorized NumPy
+    # string ops (which spend their time converting back to Python strings).
+    formatted = []
+    append = formatted.append
+    for value in units:
+        digits = str(value)
+        if digits[0] == "-":
+            digits = digits[1:].rjust(places + 1, "0")
+            append("-" + digits[:-places] + "." + digits[-places:])
+        else:
+            digits = digits.rjust(places + 1, "0")
+            append(digits[:-places] + "." + digits[-places:])
+    return formatted
@@ -0,0 +1,390 @@
+import os
+import gzip
+import json
+import time
+import queue
+import sqlite3
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
+from .logger import logger
+from .transports import REDACTED_FIELDS, _redact
+
+AUDIT_FILE = "payretailers_audit.jsonl.gz"
+
+# What `record()` does when the queue is full
+POLICY_DROP = "drop"      # Discard the record and count it
+POLICY_BLOCK = "block"    # Wait for room in the queue
+POLICY_SPILL = "spill"    # Append the record to a side file, ingested once the writer catches up (blocks past `max_overflow`)
+
+_STOP = object()
+
+
+def _decode(body: Optional[bytes]) -> Any:
+    if not body:
+        return None
+    if body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", "replace")
+
+
+class _JsonlWriter:
+    """Writes each batch as one gzip member of a JSON Lines file, rotating by size."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = open(path, "ab")
+
+    def write(self, records: List[Dict[str, Any]]):
+        lines = "".join(json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in records)
+        self._file.write(gzip.compress(lines.encode("utf-8"), compresslevel=6))
+        self._file.flush()
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "ab")
+
+    def close(self):
+        self._file.close()
+
+
+class _SQLiteWriter:
+    """Appends each batch to an `audit` table in one transaction."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS audit ("
+            " ts REAL NOT NULL,"
+            " method TEXT NOT NULL,"
+            " endpoint TEXT NOT NULL,"
+            " status_code INTEGER,"
+            " attempts INTEGER NOT NULL,"
+            " duration_ms REAL NOT NULL,"
+            " error_code TEXT,"
+            " record TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS audit_ts ON audit (ts)")
+
+    def write(self, records: List[Dict[str, Any]]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO audit (ts, method, endpoint, status_code, attempts, duration_ms, error_code, record)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (r["ts"], r["method"], r["endpoint"], r["status_code"], r["attempts"], r["duration_ms"],
+                     r["error_code"], json.dumps(r, separators=(",", ":"), default=str))
+                    for r in records
+                ]
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+class AuditLog:
+    """
+    Asynchronous audit trail of every request sent by PayRetailersClient.
+
+    The request thread only enqueues the raw request/response bytes and a few
+    numbers; a background thread decodes, redacts and writes them in batches to
+    rotating gzip-compressed JSON Lines files (or SQLite when the path ends with
+    `.db`). When the bounded queue is full, `policy` decides whether records are
+    dropped, the caller blocks, or records spill to a side file that the writer
+    ingests once it catches up. Spilling is done by the writer thread too: the
+    caller only appends the raw record to an overflow list. That list holds at
+    most `max_overflow` records (default: `max_queue`); past it the caller
+    blocks as with "block", so a stalled writer cannot grow memory without
+    bound. A record that cannot
+    be decoded or written is logged and counted as failed; the writer carries on
+    with the next one.
+
+    Usage:
+        audit = AuditLog("audit/payretailers.jsonl.gz", policy="spill")
+        client = PayRetailersClient(..., audit=audit, log_level=logging.WARNING)
+        ...
+        audit.close()
+    """
+
+    def __init__(self,
+                 path: str = AUDIT_FILE,
+                 max_queue: int = 10000,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 policy: str = POLICY_DROP,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 backup_count: int = 10,
+                 redact_fields: frozenset = REDACTED_FIELDS,
+                 max_overflow: Optional[int] = None):
+        if policy not in (POLICY_DROP, POLICY_BLOCK, POLICY_SPILL):
+            raise ValueError(f"Unknown backpressure policy '{policy}'")
+        self.path = path
+        self._base_path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.redact_fields = redact_fields
+        self.spill_path = f"{path}.spill"
+        self.max_overflow = max_queue if max_overflow is None else max_overflow
+        self._writer = self._open_writer()
+        self._queue: "queue.Queue" = queue.Queue(max_queue)
+        self._overflow: deque = deque()
+        self._ingesting = False
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed = 0
+        self.batches = 0
+        self._start_writer()
+
+    def _open_writer(self):
+        if self.path.endswith(".db"):
+            return _SQLiteWriter(self.path)
+        return _JsonlWriter(self.path, self.max_bytes, self.backup_count)
+
+    def _start_writer(self):
+        self._thread = threading.Thread(target=self._run, name="payretailers-audit", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        """
+        Restarts the sink in a forked child. Records queued before the fork stay
+        with the parent. JSON Lines output moves to a per-process file (e.g.
+        `audit.<pid>.jsonl.gz`) so processes never rotate each other's files;
+        SQLite output keeps the shared database.
+        """
+        self._parent_writer = self._writer
+        if not self.path.endswith(".db"):
+            directory, name = os.path.split(self._base_path)
+            stem, dot, extension = name.partition(".")
+            self.path = os.path.join(directory, f"{stem}.{os.getpid()}{dot}{extension}")
+            self.spill_path = f"{self.path}.spill"
+        self._writer = self._open_writer()
+        self._queue = queue.Queue(self._queue.maxsize)
+        self._overflow = deque()
+        self._ingesting = False
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._start_writer()
+
+    def record(self,
+               method: str,
+               endpoint: str,
+               params: Optional[Dict[str, Any]],
+               request_body: Optional[bytes],
+               status_code: Optional[int],
+               response_body: Optional[bytes],
+               attempts: int,
+               duration: float,
+               error: Optional[str] = None,
+               cache: Optional[str] = None):
+        """
+        Queues one request/response pair. Bodies are decoded and redacted by the writer thread.
+        `error` names a failure without a response (e.g. a connection error or a shed request);
+        `cache` is "hit" for responses served from the ResponseCache without a request.
+        """
+        item = (time.time(), method, endpoint, params, request_body, status_code, response_body, attempts, duration, error, cache)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.policy == POLICY_SPILL and len(self._overflow) < self.max_overflow:
+                # deque.append is atomic; the writer thread moves these to the spill file.
+                self._overflow.append(item)
+                return
+            if self.policy in (POLICY_BLOCK, POLICY_SPILL):
+                self._queue.put(item)
+            else:
+                with self._stats_lock:
+                    self.dropped += 1
+                return
+        with self._stats_lock:
+            self.enqueued += 1
+
+    def _build(self, item: Tuple) -> Dict[str, Any]:
+        ts, method, endpoint, params, request_body, status_code, response_body, attempts, duration, error, cache = item
+        response = _decode(response_body)
+        error_code = error
+        if status_code is not None and status_code >= 400:
+            error_code = (response.get("code") if isinstance(response, dict) else None) or str(status_code)
+        return {
+            "ts": ts,
+            "method": method,
+            "endpoint": endpoint,
+            "params": params or None,
+            "status_code": status_code,
+            "attempts": attempts,
+            "duration_ms": round(duration * 1000, 3),
+            "error_code": error_code,
+            "cache": cache,
+            "request": _redact(_decode(request_body), self.redact_fields),
+            "response": _redact(response, self.redact_fields),
+        }
+
+    def _build_all(self, items: List[Tuple]) -> List[Dict[str, Any]]:
+        records = []
+        for item in items:
+            try:
+                records.append(self._build(item))
+            except Exception as e:
+                # e.g. a body with a gzip header that does not decompress
+                logger.error(f"Failed to build audit record for {item[1]} {item[2]}: {type(e).__name__}: {e}")
+                with self._stats_lock:
+                    self.failed += 1
+        return records
+
+    def _spill_overflow(self):
+        """Moves the records that did not fit in the queue to the spill file (writer thread only)."""
+        # Items are only removed once spilled, so flush() keeps waiting meanwhile.
+        items = list(self._overflow)
+        if not items:
+            return
+        records = self._build_all(items)
+        try:
+            with self._spill_lock:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in records))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to spill {len(records)} audit records: {e}")
+            with self._stats_lock:
+                self.failed += len(records)
+        else:
+            with self._stats_lock:
+                self.spilled += len(records)
+        for _ in items:
+            self._overflow.popleft()
+
+    def _ingest_spill(self):
+        if not os.path.exists(self.spill_path):
+            return
+        ingesting = f"{self.spill_path}.{os.getpid()}"
+        self._ingesting = True
+        try:
+            with self._spill_lock:
+                os.replace(self.spill_path, ingesting)
+            with open(ingesting, encoding="utf-8") as f:
+                batch = []
+                for line in f:
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError as e:
+                        # A line cut short by a crash while spilling.
+                        logger.error(f"Skipping unreadable spilled audit record: {e}")
+                        with self._stats_lock:
+                            self.failed += 1
+                        continue
+                    if len(batch) >= self.batch_size:
+                        self._write(batch)
+                        batch = []
+                if batch:
+                    self._write(batch)
+            os.remove(ingesting)
+        except OSError as e:
+            logger.error(f"Failed to ingest spilled audit records from {ingesting}: {e}")
+        finally:
+            self._ingesting = False
+
+    def _write(self, records: List[Dict[str, Any]]):
+        try:
+            self._writer.write(records)
+        except Exception as e:
+            logger.error(f"Failed to write {len(records)} audit records: {type(e).__name__}: {e}")
+            with self._stats_lock:
+                self.failed += len(records)
+            return
+        with self._stats_lock:
+            self.written += len(records)
+            self.batches += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            if self._overflow:
+                self._spill_overflow()
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self.policy == POLICY_SPILL:
+                    self._spill_overflow()
+                    self._ingest_spill()
+                continue
+            # Linger until the batch is full or the flush interval has passed.
+            items = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size and items[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                try:
+                    items.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(item is _STOP for item in items)
+            try:
+                records = self._build_all([item for item in items if item is not _STOP])
+                if records:
+                    self._write(records)
+            finally:
+                # Callers blocked on a full queue (POLICY_BLOCK) and flush() rely on these.
+                for _ in items:
+                    self._queue.task_done()
+            if self.policy == POLICY_SPILL:
+                self._spill_overflow()
+                if self._queue.qsize() < self._queue.maxsize // 2:
+                    self._ingest_spill()
+
+    def flush(self, timeout: float = 10.0):
+        """Waits until every queued record has been written (spilled records included)."""
+        deadline = time.monotonic() + timeout
+        while (self._queue.unfinished_tasks or self._overflow or self._ingesting
+               or (self.policy == POLICY_SPILL and os.path.exists(self.spill_path))):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+
+    def close(self):
+        """Writes the remaining records and closes the sink."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self.policy == POLICY_SPILL:
+            self._spill_overflow()
+            self._ingest_spill()
+        self._writer.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "spilled": self.spilled,
+                "failed": self.failed,
+                "batches": self.batches,
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
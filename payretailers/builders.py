@@ -0,0 +1,142 @@
+import sys
+from decimal import Decimal
+from typing import Optional, Dict, Any, Union
+from .models import Customer, CountryEnum, CurrencyEnum, LanguageEnum, PreparedPayload
+from .utils import validate_personal_id, validate_email
+from .exceptions import ValidationError
+from .amounts import format_amount, minor_units
+
+# Customer field name -> API alias (e.g. "zip_code" -> "zip"), computed once.
+_CUSTOMER_ALIASES: Dict[str, str] = {
+    name: (field.alias or name) for name, field in Customer.model_fields.items()
+}
+_CUSTOMER_ALIASES.update({alias: alias for alias in list(_CUSTOMER_ALIASES.values())})
+
+
+class TransactionRequestBuilder:
+    """
+    Builds transaction and paywall payloads at high volume.
+
+    Everything that repeats across requests is resolved once per builder:
+    country/currency/language are coerced through their enums, the alias-keyed
+    payload skeleton and the per-country customer template are precomputed, and
+    repeated strings (URLs, description, payment method tags) are interned.
+    Each call only copies the skeleton, fills the per-request fields and
+    validates the required fields, the email and the personal ID, returning a
+    PreparedPayload that PayRetailersClient sends without running the pydantic
+    models again.
+
+    Usage:
+        builder = TransactionRequestBuilder("BR", "BRL", notification_url="https://shop/webhook",
+                                            description="Order {tracking_id}", payment_method_tag="PIX")
+        payload = builder.build(amount=1000, tracking_id="abc", email="customer@example.com")
+        client.create_transaction(payload)
+    """
+
+    def __init__(self,
+                 country: Union[str, CountryEnum],
+                 currency: Union[str, CurrencyEnum],
+                 notification_url: str,
+                 description: str,
+                 payment_method_tag: Optional[str] = None,
+                 return_url: Optional[str] = None,
+                 language: Union[str, LanguageEnum] = LanguageEnum.ES,
+                 test_mode: bool = False):
+        self.country = CountryEnum(country)
+        self.currency = CurrencyEnum(currency)
+        self.language = LanguageEnum(language)
+        places = minor_units(self.currency)
+        self._integer_suffix = "." + "0" * places if places else ""
+        self._description = sys.intern(description)
+        self._description_is_template = "{tracking_id}" in description
+        self._interned: Dict[str, str] = {}
+        self._base = {
+            "amount": None,
+            "currency": sys.intern(self.currency.value),
+            "paymentMethodTagName": self._intern(payment_method_tag),
+            "description": self._description,
+            "trackingId": None,
+            "notificationUrl": sys.intern(notification_url),
+            "returnUrl": self._intern(return_url),
+            "language": sys.intern(self.language.value),
+            "testMode": test_mode,
+        }
+        self._customer_base = {_CUSTOMER_ALIASES[name]: None for name in Customer.model_fields}
+        self._customer_base["country"] = sys.intern(self.country.value)
+
+    def _intern(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        interned = self._interned.get(value)
+        if interned is None:
+            interned = self._interned.setdefault(value, sys.intern(value))
+        return interned
+
+    def customer(self,
+                 email: str,
+                 first_name: Optional[str] = None,
+                 last_name: Optional[str] = None,
+                 personal_id: Optional[str] = None,
+                 **fields: Any) -> Dict[str, Any]:
+        """Builds the alias-keyed customer payload, validating the email and the personal ID."""
+        validate_email(email)
+        if personal_id:
+            validate_personal_id(self.country.value, personal_id)
+        customer = self._customer_base.copy()
+        customer["firstName"] = first_name
+        customer["lastName"] = last_name
+        customer["email"] = email
+        customer["personalId"] = personal_id
+        for name, value in fields.items():
+            alias = _CUSTOMER_ALIASES.get(name)
+            if alias is None or alias == "country":
+                raise ValueError(f"Unknown customer field '{name}'")
+            customer[alias] = value
+        return customer
+
+    def _payload(self, amount: Union[str, int, float, Decimal], tracking_id: str, customer: Dict[str, Any]) -> PreparedPayload:
+        if amount is None:
+            raise ValidationError("Amount is required")
+        if not tracking_id:
+            raise ValidationError("Tracking ID is required")
+        payload = PreparedPayload(self._base)
+        if type(amount) is int:
+            payload["amount"] = str(amount) + self._integer_suffix
+        else:
+            payload["amount"] = format_amount(amount, self.currency)
+        payload["trackingId"] = tracking_id
+        if self._description_is_template:
+            # Not str.format: other braces in the description are sent as written.
+            payload["description"] = self._description.replace("{tracking_id}", tracking_id)
+        payload["customer"] = customer
+        return payload
+
+    def build(self,
+              amount: Union[str, int, float, Decimal],
+              tracking_id: str,
+              email: str,
+              first_name: Optional[str] = None,
+              last_name: Optional[str] = None,
+              personal_id: Optional[str] = None,
+              payment_method_tag: Optional[str] = None,
+              **customer_fields: Any) -> PreparedPayload:
+        """Builds a transaction payload for the builder's country and currency."""
+        payload = self._payload(amount, tracking_id, self.customer(email, first_name, last_name, personal_id, **customer_fields))
+        if payment_method_tag is not None:
+            payload["paymentMethodTagName"] = self._intern(payment_method_tag)
+        return payload
+
+    def build_paywall(self,
+                      amount: Union[str, int, float, Decimal],
+                      tracking_id: str,
+                      email: str,
+                      first_name: Optional[str] = None,
+                      last_name: Optional[str] = None,
+                      personal_id: Optional[str] = None,
+                      payment_channel_type_code: Optional[str] = None,
+                      **customer_fields: Any) -> PreparedPayload:
+        """Builds a paywall payload for the builder's country and currency."""
+        payload = self._payload(amount, tracking_id, self.customer(email, first_name, last_name, personal_id, **customer_fields))
+        del payload["paymentMethodTagName"]
+        payload["paymentChannelTypeCode"] = self._intern(payment_channel_type_code)
+        return payload
@@ -0,0 +1,233 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, Tuple, NamedTuple
+from .concurrency import endpoint_family
+
+# Per endpoint family: (TTL once the item reached a final status, TTL otherwise), in seconds.
+# Families that are not listed (e.g. shop-balance, landing-info) are never cached.
+DEFAULT_TTLS: Dict[str, Tuple[float, float]] = {
+    "transactions": (86400.0, 5.0),
+    "paywalls": (86400.0, 5.0),
+    "payout": (86400.0, 5.0),
+    "paymentMethods": (300.0, 300.0),
+}
+
+# Statuses that never change again. Anything else, including statuses this SDK
+# does not know yet, gets the short TTL.
+TERMINAL_STATUSES = frozenset({"APPROVED", "FAILED", "EXPIRED", "REJECTED", "CANCELLED"})
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class CacheBackend:
+    """Storage interface for ResponseCache."""
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def _after_fork(self):
+        """Called in a forked child before the backend is used there."""
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-memory LRU backend bounded by the total size of cached bodies."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= len(entry.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite backend, shareable between processes on the same host."""
+
+    def __init__(self, path: str = "payretailers_cache.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, expires_at REAL NOT NULL)"
+        )
+
+    def _after_fork(self):
+        # SQLite connections must not cross a fork. The inherited one is kept
+        # (never used or closed) so the child cannot disturb the parent's handle.
+        self._parent_conn = self._conn
+        self._lock = threading.Lock()
+        self._connect()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute("SELECT body, etag, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        return CacheEntry(bytes(row[0]), row[1], row[2]) if row else None
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, expires_at) VALUES (?, ?, ?, ?)",
+                (key, entry.body, entry.etag, entry.expires_at)
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def purge_expired(self):
+        """Deletes expired entries that carry no ETag to revalidate with."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ? AND etag IS NULL", (time.time(),))
+
+
+class ResponseCache:
+    """
+    Optional cache for idempotent GET responses.
+
+    TTLs are chosen per endpoint family and depend on the returned status, so
+    final transactions/payouts can be kept long while pending ones expire fast.
+    Expired entries that carry an ETag are revalidated with If-None-Match; a
+    304 answer refreshes them without transferring the body again.
+
+    BACKGROUND-priority GETs (e.g. StatusWatcher polls) never take a fresh entry
+    as is: they revalidate it, or fetch it again, so a poll sees a status change
+    without waiting for the short TTL. Their answer refreshes the entry.
+
+    Usage:
+        client = PayRetailersClient(..., cache=ResponseCache(MemoryCacheBackend(max_bytes=32 * 1024 * 1024)))
+        client.cache.invalidate(f"transactions/{uid}", namespace=client.cache_namespace)
+    """
+
+    def __init__(self,
+                 backend: Optional[CacheBackend] = None,
+                 ttls: Optional[Dict[str, Tuple[float, float]]] = None,
+                 terminal_statuses: Iterable[str] = TERMINAL_STATUSES):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.terminal_statuses = frozenset(status.upper() for status in terminal_statuses)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self.backend._after_fork()
+
+    def is_cacheable(self, endpoint: str) -> bool:
+        return endpoint_family(endpoint) in self.ttls
+
+    @staticmethod
+    def key(endpoint: str, params: Optional[Dict[str, Any]] = None, namespace: str = "") -> str:
+        """
+        Builds the cache key of a GET. Clients pass their `cache_namespace`
+        (shop id and base URL), so sandbox and production clients, or different
+        shops, sharing a backend never read each other's entries.
+        """
+        if not params:
+            return f"{namespace}{endpoint}"
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{namespace}{endpoint}?{query}"
+
+    def ttl_for(self, endpoint: str, data: Any) -> float:
+        terminal_ttl, default_ttl = self.ttls.get(endpoint_family(endpoint), (0.0, 0.0))
+        status = data.get("status") if isinstance(data, dict) else None
+        if isinstance(status, str) and status.upper() in self.terminal_statuses:
+            return terminal_ttl
+        return default_ttl
+
+    def lookup(self, key: str, revalidate: bool = False) -> Optional[CacheEntry]:
+        """
+        Returns the stored entry (fresh or stale) and counts fresh hits and misses.
+        With `revalidate=True` the caller asks upstream anyway, so it counts as a miss.
+        """
+        entry = self.backend.get(key)
+        with self._lock:
+            if entry is not None and entry.fresh and not revalidate:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def store(self, key: str, endpoint: str, body: bytes, etag: Optional[str], data: Any):
+        ttl = self.ttl_for(endpoint, data)
+        if ttl > 0 or etag:
+            self.backend.set(key, CacheEntry(body, etag, time.time() + ttl))
+
+    def revalidated(self, key: str, endpoint: str, entry: CacheEntry, data: Any):
+        """Refreshes an entry after a 304 Not Modified."""
+        with self._lock:
+            self.revalidations += 1
+        self.backend.set(key, entry._replace(expires_at=time.time() + self.ttl_for(endpoint, data)))
+
+    def invalidate(self, endpoint: str, params: Optional[Dict[str, Any]] = None, namespace: str = ""):
+        """Drops a cached GET; pass the client's `cache_namespace`."""
+        self.backend.delete(self.key(endpoint, params, namespace))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "revalidations": self.revalidations}
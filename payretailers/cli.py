@@ -0,0 +1,351 @@
+import os
+import sys
+import csv
+import json
+import time
+import uuid
+import bisect
+import logging
+import argparse
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Dict, Any, List, Optional
+from .client import PayRetailersClient
+from .exceptions import PayRetailersError
+from .models import TransactionRequest, Customer
+from .builders import TransactionRequestBuilder
+from .emulator import PayRetailersEmulator
+
+EXAMPLES = """
+Credentials are read from the SHOP_ID, SECRET_KEY and SUBSCRIPTION_KEY
+environment variables (a .env file is honoured).
+
+examples:
+  payretailers payouts payouts.jsonl --concurrency 8 > results.jsonl
+  payretailers status --kind transaction ids.txt
+  payretailers methods --country BR --currency BRL -o methods.json
+  payretailers --base-url URL_1 --base-url URL_2 status ids.txt
+  payretailers bench --rps 500 --duration 10
+  payretailers emulator --port 8099 --balance BRL=1000000
+  payretailers bench-models --count 100000
+"""
+
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def _build_client(args, **kwargs) -> PayRetailersClient:
+    shop_id = os.getenv("SHOP_ID")
+    secret_key = os.getenv("SECRET_KEY")
+    subscription_key = os.getenv("SANDBOX_SUBSCRIPTION_KEY" if args.sandbox else "SUBSCRIPTION_KEY") or os.getenv("SUBSCRIPTION_KEY")
+    if not (shop_id and secret_key and subscription_key):
+        raise SystemExit("Missing credentials: set SHOP_ID, SECRET_KEY and SUBSCRIPTION_KEY.")
+    base_url = args.base_url[0] if len(args.base_url) == 1 else args.base_url or None
+    return PayRetailersClient(shop_id, secret_key, subscription_key, sandbox=args.sandbox, log_level=args.log_level,
+                              base_url=base_url, **kwargs)
+
+
+def _read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Reads records from a .jsonl, .json (list) or .csv file ('-' for JSON Lines on stdin)."""
+    if path == "-":
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {k: v for k, v in row.items() if v not in (None, "")}
+        elif path.endswith(".json"):
+            yield from json.load(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _read_ids(path: str) -> Iterator[str]:
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in stream:
+            if line.strip():
+                yield line.strip()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _emit(lock: threading.Lock, record: Dict[str, Any]):
+    line = json.dumps(record, default=str)
+    with lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def cmd_payouts(args) -> int:
+    """Submits payouts from a file and writes one JSON result per line."""
+    client = _build_client(args)
+    lock = threading.Lock()
+    failures = 0
+
+    def submit(record: Dict[str, Any]):
+        nonlocal failures
+        reference = record.get("externalReference") or record.get("external_reference")
+        try:
+            response = client.create_payout(record)
+            _emit(lock, {"externalReference": reference, "ok": True, "response": response})
+        except (PayRetailersError, ValueError) as e:
+            with lock:
+                failures += 1
+            _emit(lock, {"externalReference": reference, "ok": False, "error": str(e), "code": getattr(e, "code", None)})
+
+    with client, ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(submit, _read_records(args.file)))
+    return 1 if failures else 0
+
+
+def cmd_status(args) -> int:
+    """Looks up the status of many transactions, paywalls or payouts."""
+    client = _build_client(args)
+    fetch = {
+        "transaction": client.get_transaction,
+        "transaction-tracking": client.get_transaction_by_tracking_id,
+        "paywall": client.get_paywall_by_uid,
+        "paywall-tracking": client.get_paywall_by_tracking_id,
+        "payout": client.get_payout_details,
+    }[args.kind]
+    lock = threading.Lock()
+
+    def lookup(key: str):
+        try:
+            response = fetch(key)
+            _emit(lock, {"id": key, "ok": True, "status": response.get("status"), "response": response})
+        except PayRetailersError as e:
+            _emit(lock, {"id": key, "ok": False, "error": str(e), "code": e.code})
+
+    with client, ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(lookup, _read_ids(args.file)))
+    return 0
+
+
+def cmd_methods(args) -> int:
+    """Exports the payment-method catalog as a JSON list."""
+    with _build_client(args) as client:
+        methods = client.iter_payment_methods(country=args.country, currency=args.currency, channel=args.channel)
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            out.write("[")
+            for i, method in enumerate(methods):
+                out.write(("," if i else "") + "\n  " + json.dumps(method, ensure_ascii=False))
+            out.write("\n]\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    return 0
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _print_histogram(latencies_ms: List[float]):
+    counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+    for value in latencies_ms:
+        counts[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+    total = max(1, len(latencies_ms))
+    width = max(counts) or 1
+    labels = [f"<= {b} ms" for b in HISTOGRAM_BUCKETS_MS] + [f"> {HISTOGRAM_BUCKETS_MS[-1]} ms"]
+    for label, count in zip(labels, counts):
+        if count:
+            print(f"{label:>12} {count:>8} {100 * count / total:6.2f}% {'#' * max(1, 40 * count // width)}")
+
+
+def cmd_bench(args) -> int:
+    """Drives the client against a local emulator at a target RPS and prints latency statistics."""
+    emulator = PayRetailersEmulator(balances={"BRL": 1e12}, latency=args.server_latency, webhooks=False)
+    base_url = emulator.serve()
+    client = PayRetailersClient("bench", "bench", "bench", log_level=logging.CRITICAL, max_retries=1, base_url=base_url)
+    payout = {
+        "amount": 100, "currencyCode": "BRL", "country": "BR", "bankName": "Bench", "accountNumber": "0001",
+        "beneficiaryFirstName": "Bench", "beneficiaryLastName": "User", "documentType": "CPF",
+        "documentNumber": "12345678900", "email": "bench@example.com",
+    }
+    emulator.handle("POST", "payout", {}, {}, json.dumps({**payout, "externalReference": "bench"}).encode())
+    operations = {
+        "get_payout_details": lambda: client.get_payout_details("bench"),
+        "create_payout": lambda: client.create_payout({**payout, "externalReference": uuid.uuid4().hex}),
+    }
+    operation = operations[args.operation]
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def run_one():
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            operation()
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+
+    total = int(args.rps * args.duration)
+    interval = 1.0 / args.rps
+    print(f"Benchmarking {args.operation}: {total} requests at {args.rps} rps against {base_url}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for i in range(total):
+            # Open-loop pacing: schedule by wall clock so slow responses do not lower the offered load.
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run_one)
+    wall = time.perf_counter() - started
+    client.close()
+    emulator.stop()
+
+    ordered = sorted(latencies)
+    print(f"Completed {len(ordered)} ok / {errors} errors in {wall:.2f}s ({len(ordered) / wall:.1f} rps achieved)")
+    print(f"p50 {_percentile(ordered, 0.50):.2f} ms | p90 {_percentile(ordered, 0.90):.2f} ms | "
+          f"p99 {_percentile(ordered, 0.99):.2f} ms | max {(ordered[-1] if ordered else 0):.2f} ms")
+    _print_histogram(ordered)
+    return 1 if errors else 0
+
+
+def _measure(label: str, count: int, build):
+    started = time.perf_counter()
+    for i in range(count):
+        build(i)
+    elapsed = time.perf_counter() - started
+
+    # Allocations: memory retained by `count` built payloads, traced separately
+    # because tracemalloc slows allocation-heavy code down.
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = [build(i) for i in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    print(f"{label:<28} {elapsed / count * 1e6:8.2f} us/request {(after - before) / count:8.0f} bytes/request retained")
+
+
+def cmd_bench_models(args) -> int:
+    """Compares building a ready-to-send payload through the models and through TransactionRequestBuilder."""
+    notification_url = "https://example.com/webhook"
+    print(f"Building {args.count} transaction requests")
+
+    def with_models(i: int):
+        return TransactionRequest(
+            amount=1000 + i,
+            currency="BRL",
+            description=f"Order {i}",
+            trackingId=str(i),
+            notificationUrl=notification_url,
+            paymentMethodTagName="PIX",
+            customer=Customer(email="customer@example.com", country="BR", personalId="123.456.789-00",
+                              firstName="John", lastName="Doe")
+        ).model_dump(by_alias=True)
+
+    builder = TransactionRequestBuilder("BR", "BRL", notification_url=notification_url,
+                                        description="Order {tracking_id}", payment_method_tag="PIX")
+
+    def with_builder(i: int):
+        return builder.build(amount=1000 + i, tracking_id=str(i), email="customer@example.com",
+                             first_name="John", last_name="Doe", personal_id="123.456.789-00")
+
+    _measure("TransactionRequest(...)", args.count, with_models)
+    _measure("TransactionRequestBuilder", args.count, with_builder)
+    return 0
+
+
+def cmd_emulator(args) -> int:
+    """Serves the stateful emulator on a loopback port until interrupted."""
+    balances = dict((currency, float(amount)) for currency, amount in (item.split("=", 1) for item in args.balance))
+    emulator = PayRetailersEmulator(balances=balances, settle_after=args.settle_after, latency=args.latency,
+                                    fault_rate=args.fault_rate, capacity=args.capacity, seed=args.seed)
+    base_url = emulator.serve(args.host, args.port)
+    print(f"PayRetailers emulator listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(emulator.stats()), file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="payretailers",
+        description="PayRetailers SDK command-line tool.",
+        epilog=EXAMPLES,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sandbox", action="store_true", help="Use the sandbox environment.")
+    parser.add_argument("--base-url", action="append", default=[],
+                        help="API base URL; repeat to fail over between several endpoints.")
+    parser.add_argument("--log-level", type=lambda v: getattr(logging, v.upper()), default=logging.WARNING,
+                        help="SDK log level (default: WARNING).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    payouts = subparsers.add_parser("payouts", help="Submit payouts in bulk from a .jsonl, .json or .csv file.")
+    payouts.add_argument("file", help="Payout records ('-' for JSON Lines on stdin).")
+    payouts.add_argument("--concurrency", type=int, default=4)
+    payouts.set_defaults(func=cmd_payouts)
+
+    status = subparsers.add_parser("status", help="Look up statuses in bulk from a file of ids (one per line).")
+    status.add_argument("file", help="File with one id per line ('-' for stdin).")
+    status.add_argument("--kind", default="transaction",
+                        choices=["transaction", "transaction-tracking", "paywall", "paywall-tracking", "payout"])
+    status.add_argument("--concurrency", type=int, default=8)
+    status.set_defaults(func=cmd_status)
+
+    methods = subparsers.add_parser("methods", help="Export the payment-method catalog as JSON.")
+    methods.add_argument("--country")
+    methods.add_argument("--currency")
+    methods.add_argument("--channel")
+    methods.add_argument("-o", "--output", help="Output file (default: stdout).")
+    methods.set_defaults(func=cmd_methods)
+
+    bench = subparsers.add_parser("bench", help="Benchmark the SDK against the built-in emulator.")
+    bench.add_argument("--operation", default="get_payout_details", choices=["get_payout_details", "create_payout"])
+    bench.add_argument("--rps", type=float, default=200.0, help="Target requests per second.")
+    bench.add_argument("--duration", type=float, default=10.0, help="Duration in seconds.")
+    bench.add_argument("--concurrency", type=int, default=64, help="Maximum concurrent requests.")
+    bench.add_argument("--server-latency", type=float, default=0.0, help="Latency added by the emulator, in seconds.")
+    bench.set_defaults(func=cmd_bench)
+
+    emulator = subparsers.add_parser("emulator", help="Run the stateful PayRetailers emulator on a local port.")
+    emulator.add_argument("--host", default="127.0.0.1")
+    emulator.add_argument("--port", type=int, default=8099)
+    emulator.add_argument("--balance", action="append", default=[], metavar="CURRENCY=AMOUNT",
+                          help="Initial balance, e.g. --balance BRL=100000 (repeatable).")
+    emulator.add_argument("--settle-after", type=float, default=2.0, help="Seconds until pending items settle.")
+    emulator.add_argument("--latency", type=float, default=0.0, help="Latency added to every response, in seconds.")
+    emulator.add_argument("--fault-rate", type=float, default=0.0, help="Share of requests answered with a 503.")
+    emulator.add_argument("--capacity", type=int,
+                          help="Concurrent requests served at --latency; latency grows and 503s appear beyond it.")
+    emulator.add_argument("--seed", type=int)
+    emulator.set_defaults(func=cmd_emulator)
+
+    bench_models = subparsers.add_parser("bench-models", help="Compare request construction cost: models vs TransactionRequestBuilder.")
+    bench_models.add_argument("--count", type=int, default=100000, help="Requests to build per variant.")
+    bench_models.set_defaults(func=cmd_bench_models)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
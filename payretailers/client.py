@@ -1,20 +1,78 @@
 import os
 import json
 import base64
+import pickle
+import weakref
+import tempfile
+import contextlib
 import httpx
 from tenacity import Retrying, stop_after_attempt, wait_exponential, retry_if_exception_type, before_sleep_log
 import logging
-from typing import Union, Dict, Any, Optional
-from .logger import logger
-from .exceptions import get_exception_for_code, APIConnectionError, AuthenticationError, PayRetailersError
-from .models import TransactionRequest, PaywallRequest, PayoutRequest
+from typing import Union, Dict, Any, Optional, Iterator, Iterable, Tuple, NamedTuple, Callable
+from .logger import logger, ClientLogger
+from .serialization import loads, iter_json_array, encode_body
+from .exceptions import get_exception_for_code, APIConnectionError, AuthenticationError, PayRetailersError, ValidationError, LoadSheddedError
+from .models import TransactionRequest, PaywallRequest, PayoutRequest, PreparedPayload
 import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .hedging import HedgePolicy
+from .concurrency import AdaptiveConcurrency
+from .cache import ResponseCache
+from .scheduling import PriorityScheduler, Priority, current_priority
+from .profiling import phase, active_profile
+from .audit import AuditLog
+from .coalescing import SingleFlight
+from .failover import EndpointPool, IDEMPOTENT_METHODS
+from pydantic import BaseModel
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialized within the process
+    fcntl = None
 from dotenv import load_dotenv
 
 load_dotenv()
 
 BLACKLIST_FILE = "payretailers_h2h_cache.json"
 BLACKLIST_DURATION = 86400  # 24 hours in seconds
+MAX_CONNECTIONS = 100  # HTTPX pool limit, which already bounds concurrent requests
+
+
+def _prune_none(value: Any) -> Any:
+    """Drops None values from dicts at every depth, as exclude_none does for models."""
+    if isinstance(value, dict):
+        return {k: _prune_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_prune_none(v) for v in value]
+    return value
+
+
+class ClientConfig(NamedTuple):
+    """
+    Picklable client settings. Process-pool workers build their own pooled
+    client from it (see `worker_client`); pluggable components such as
+    transports, caches or audit logs are per process and not part of it.
+    A custom transport travels as `transport_factory`, which must itself be
+    picklable (e.g. a module-level function).
+    """
+    shop_id: str
+    secret_key: str
+    subscription_key: str
+    sandbox: bool = False
+    log_level: int = logging.DEBUG
+    max_retries: int = 3
+    exclude_none: bool = False
+    exclude_unset: bool = False
+    compress_requests: bool = False
+    compress_min_size: int = 1024
+    coalesce: bool = False
+    base_url: Union[str, Tuple[str, ...], None] = None
+    transport_factory: Optional[Callable[[], httpx.BaseTransport]] = None
+
+    def build(self) -> "PayRetailersClient":
+        return PayRetailersClient(**self._asdict())
+
 
 class PayRetailersClient:
     """
@@ -29,17 +87,146 @@ class PayRetailersClient:
                  subscription_key: str,
                  sandbox: bool = False,
                  log_level: int = logging.DEBUG,
-                 max_retries: int = 3):
+                 max_retries: int = 3,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 transport: Optional[httpx.BaseTransport] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 exclude_none: bool = False,
+                 exclude_unset: bool = False,
+                 compress_requests: bool = False,
+                 compress_min_size: int = 1024,
+                 cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[PriorityScheduler] = None,
+                 audit: Optional[AuditLog] = None,
+                 coalesce: bool = False,
+                 base_url: Union[str, Iterable[str], None] = None,
+                 endpoints: Optional[EndpointPool] = None,
+                 transport_factory: Optional[Callable[[], httpx.BaseTransport]] = None):
 
         self.shop_id = shop_id
         self.secret_key = secret_key
         self.subscription_key = subscription_key
         self.sandbox = sandbox
-        self.base_url = self.SANDBOX_URL if sandbox else self.PRODUCTION_URL
+        # Several base URLs fail over between each other through an EndpointPool owned by the client.
+        self._owns_endpoints = endpoints is None and base_url is not None and not isinstance(base_url, str)
+        if self._owns_endpoints:
+            endpoints = EndpointPool(base_url)
+        self.endpoints = endpoints
+        self.base_url = endpoints.urls[0] if endpoints else base_url or (self.SANDBOX_URL if sandbox else self.PRODUCTION_URL)
         self.auth_header = self._generate_auth_header()
-        logger.setLevel(log_level)
+        self.logger = ClientLogger(logger, log_level)
         self.max_retries = max_retries
-        self.client = httpx.Client(
+        if transport is not None and transport_factory is not None:
+            raise ValueError("Pass either transport or transport_factory, not both")
+        if transport is not None and endpoints is not None:
+            # The pool probes with its own transport; sharing one would let either side close it for the other.
+            raise ValueError("Use transport_factory instead of transport with several base URLs or an EndpointPool")
+        # A factory lets forked children and process-pool workers build their own transport.
+        self.transport_factory = transport_factory
+        self.transport = transport_factory() if transport_factory is not None else transport
+        self.client = self._build_http_client()
+        self._closed = False
+
+        self._blacklist_lock = threading.Lock()
+        self.blacklist = self._load_blacklist_cache()
+        # Payment method -> time it was removed, so a save does not bring it back from the file.
+        self._blacklist_removed: Dict[str, float] = {}
+        self.hedge_policy = hedge_policy
+        self._primary_executor = None
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        self.concurrency = concurrency
+        self.exclude_none = exclude_none
+        self.exclude_unset = exclude_unset
+        self.compress_requests = compress_requests
+        self.compress_min_size = compress_min_size
+        self.cache = cache
+        # Shared cache backends are keyed per shop and environment.
+        self.cache_namespace = f"{shop_id}@{self.base_url}"
+        self.scheduler = scheduler
+        self.audit = audit
+        self.coalescer = SingleFlight() if coalesce else None
+        if self.endpoints is not None:
+            self._acquire_endpoints()
+        _live_clients.add(self)
+
+    def config(self) -> ClientConfig:
+        """Returns the picklable settings of this client."""
+        return ClientConfig(
+            shop_id=self.shop_id,
+            secret_key=self.secret_key,
+            subscription_key=self.subscription_key,
+            sandbox=self.sandbox,
+            log_level=self.logger.level,
+            max_retries=self.max_retries,
+            exclude_none=self.exclude_none,
+            exclude_unset=self.exclude_unset,
+            compress_requests=self.compress_requests,
+            compress_min_size=self.compress_min_size,
+            coalesce=self.coalescer is not None,
+            base_url=tuple(self.endpoints.urls) if self.endpoints else self.base_url,
+            transport_factory=self.transport_factory,
+        )
+
+    def _process_local_components(self) -> Tuple[str, ...]:
+        """Names of the configured components that cannot follow the client to another process."""
+        components = {
+            "transport": self.transport if self.transport_factory is None else None,
+            "cache": self.cache,
+            "audit": self.audit,
+            "scheduler": self.scheduler,
+            "concurrency": self.concurrency,
+            "hedge_policy": self.hedge_policy,
+            "endpoints": None if self._owns_endpoints else self.endpoints,
+        }
+        return tuple(name for name, component in components.items() if component is not None)
+
+    def __reduce__(self):
+        # A client sent to another process arrives as that process's own pooled client.
+        components = self._process_local_components()
+        if components:
+            raise pickle.PicklingError(
+                f"Cannot pickle a PayRetailersClient configured with {', '.join(components)}; "
+                "send client.config() and set these up in each worker (pass transport_factory for a custom transport)"
+            )
+        return worker_client, (self.config(),)
+
+    def _after_fork(self, seen: set):
+        """
+        Runs in a forked child. The parent's pooled sockets, in-flight state and
+        hedge threads are left behind, the pool is rebuilt and the H2H blacklist
+        is reloaded from disk, which other processes may have updated. The
+        transport is rebuilt with `transport_factory`; a transport instance that
+        holds its own connection pool cannot be rebuilt and is reused.
+        """
+        if self.transport_factory is not None:
+            self.transport = self.transport_factory()
+        elif isinstance(self.transport, httpx.HTTPTransport):
+            self.logger.warning("Reusing a custom HTTPTransport inherited from the parent process; "
+                                "pass transport_factory to build one per process")
+        self.client = self._build_http_client()
+        self._blacklist_lock = threading.Lock()
+        self.blacklist = self._load_blacklist_cache()
+        self._blacklist_removed = {}
+        self._primary_executor = None
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        for component in (self.cache, self.audit, self.scheduler, self.concurrency, self.hedge_policy, self.coalescer, self.endpoints):
+            # Components may be shared between clients; reset each only once.
+            if component is not None and id(component) not in seen:
+                seen.add(id(component))
+                component._after_fork()
+        if self.endpoints is not None:
+            self._acquire_endpoints()
+
+    def _acquire_endpoints(self):
+        """Registers with the EndpointPool, which probes with its own HTTPX client and transport."""
+        transport = self.transport_factory() if self.transport_factory is not None else None
+        self.endpoints.acquire(headers=dict(self.client.headers), transport=transport)
+
+    def _build_http_client(self) -> httpx.Client:
+        """Builds the pooled HTTPX client, using the custom transport when one was given."""
+        return httpx.Client(
             base_url=self.base_url,
             headers={
                 "accept": "application/json",
@@ -47,28 +234,114 @@ class PayRetailersClient:
                 "Ocp-Apim-Subscription-Key": self.subscription_key,
                 "authorization": self.auth_header
             },
-            timeout=30.0 # Default timeout
+            timeout=30.0, # Default timeout
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=20),
+            transport=self.transport
         )
 
-        self.blacklist = self._load_blacklist_cache()
-
-    def _load_blacklist_cache(self) -> Dict[str, float]:
-        """Loads the H2H blacklist from a local JSON file."""
+    @staticmethod
+    def _read_blacklist_file() -> Dict[str, float]:
+        """Reads the blacklist file: expiry per payment method, or minus the removal time for removed ones."""
         if os.path.exists(BLACKLIST_FILE):
             try:
                 with open(BLACKLIST_FILE, "r") as f:
-                    return json.load(f)
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
             except (json.JSONDecodeError, IOError):
                 pass
         return {}
 
+    def _load_blacklist_cache(self) -> Dict[str, float]:
+        """Loads the H2H blacklist from a local JSON file."""
+        now = time.time()
+        return {payment_method: expiry for payment_method, expiry in self._read_blacklist_file().items() if expiry > now}
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _blacklist_file_lock():
+        """Serializes read-merge-write cycles on the blacklist file across clients and processes."""
+        with _blacklist_process_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{BLACKLIST_FILE}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _blacklist_event_time(value: float) -> float:
+        # Entries store their expiry, removals minus the time they were removed.
+        return -value if value < 0 else value - BLACKLIST_DURATION
+
+    def _merge_blacklist(self, stored: Dict[str, float]) -> Dict[str, float]:
+        """
+        Merges the file saved by other clients with this client's entries and
+        removals, keeping the most recent addition or removal per payment method.
+        Removals are kept in the file as negative values for BLACKLIST_DURATION,
+        so another client's older in-memory entry cannot bring them back.
+        """
+        now = time.time()
+        merged = dict(stored)
+        local = dict(self.blacklist)
+        local.update({payment_method: -removed_at for payment_method, removed_at in self._blacklist_removed.items()})
+        for payment_method, value in local.items():
+            current = merged.get(payment_method)
+            if current is None or self._blacklist_event_time(value) > self._blacklist_event_time(current):
+                merged[payment_method] = value
+        return {
+            payment_method: value for payment_method, value in merged.items()
+            if (value > now if value >= 0 else -value + BLACKLIST_DURATION > now)
+        }
+
     def _save_blacklist_cache(self):
-        """Saves the H2H blacklist to a local JSON file."""
+        """
+        Saves the H2H blacklist to a local JSON file, merged with the entries other
+        clients (or processes) saved meanwhile, and adopts the merged list.
+        Must be called with `_blacklist_lock` held; the file is replaced atomically.
+        """
         try:
-            with open(BLACKLIST_FILE, "w") as f:
-                json.dump(self.blacklist, f)
-        except IOError as e:
-            logger.warning(f"Failed to save H2H blacklist cache: {e}")
+            with phase("blacklist_io"), self._blacklist_file_lock():
+                merged = self._merge_blacklist(self._read_blacklist_file())
+                # A unique temp file per save, since many clients in one process share the cache file.
+                fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(BLACKLIST_FILE) or ".", prefix=f"{os.path.basename(BLACKLIST_FILE)}.", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(merged, f)
+                    os.replace(tmp_file, BLACKLIST_FILE)
+                except BaseException:
+                    os.remove(tmp_file)
+                    raise
+            self.blacklist = {payment_method: expiry for payment_method, expiry in merged.items() if expiry > 0}
+            self._blacklist_removed.clear()
+        except OSError as e:
+            self.logger.warning(f"Failed to save H2H blacklist cache: {e}")
+
+    def _is_blacklisted(self, payment_method: str) -> bool:
+        """Checks the H2H blacklist, dropping the entry if it has expired."""
+        with self._blacklist_lock:
+            expiry = self.blacklist.get(payment_method)
+            if expiry is None:
+                return False
+            if time.time() < expiry:
+                return True
+            del self.blacklist[payment_method]
+            self._save_blacklist_cache()
+            return False
+
+    def _add_to_blacklist(self, payment_method: str):
+        with self._blacklist_lock:
+            self.blacklist[payment_method] = time.time() + BLACKLIST_DURATION
+            self._save_blacklist_cache()
+
+    def _remove_from_blacklist(self, payment_method: str):
+        with self._blacklist_lock:
+            if self.blacklist.pop(payment_method, None) is not None:
+                self._blacklist_removed[payment_method] = time.time()
+                self._save_blacklist_cache()
 
     def get_landing_info(self, transaction_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -78,7 +351,7 @@ class PayRetailersClient:
         NOTE: This method is NOT available in Sandbox.
         """
         if self.sandbox:
-            logger.warning("get_landing_info is NOT available in Sandbox environment.")
+            self.logger.warning("get_landing_info is NOT available in Sandbox environment.")
             return None
 
         try:
@@ -87,45 +360,266 @@ class PayRetailersClient:
         except Exception as e:
              raise e
 
+    def _url(self, endpoint: str) -> str:
+        """Resolves an endpoint against the selected base URL when an EndpointPool is used."""
+        return endpoint if self.endpoints is None else f"{self.endpoints.select()}{endpoint}"
+
     def _generate_auth_header(self) -> str:
         credentials = f"{self.shop_id}:{self.secret_key}"
         encoded_credentials = base64.b64encode(credentials.encode()).decode()
         return f"Basic {encoded_credentials}"
 
-    def _send_request(self, method: str, endpoint: str, payload: Optional[Dict] = None, params: Optional[Dict] = None):
+    def _hedged_get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None, extensions: Optional[Dict] = None) -> httpx.Response:
+        """
+        Sends a GET and, if it has not completed after the policy's delay, a second
+        identical GET on another pooled connection. The first successful response wins;
+        the loser is cancelled if it has not started yet, or closed when it completes.
+
+        While the policy cannot hedge yet the GET runs on the caller's thread. Otherwise
+        the primary runs on a pool as large as the connection pool, so the caller can
+        return as soon as the hedge wins, and hedges run on a pool of their own.
+        """
+        policy = self.hedge_policy
+        policy.start_request()
+        started = time.monotonic()
+        delay = policy.hedge_delay()
+        if delay is None:
+            response = self.client.get(url, params=params, headers=headers, extensions=extensions)
+            policy.record_latency(time.monotonic() - started)
+            return response
+
+        if self._hedge_executor is None:
+            with self._hedge_lock:
+                if self._hedge_executor is None:
+                    self._primary_executor = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="payretailers-primary")
+                    self._hedge_executor = ThreadPoolExecutor(max_workers=policy.max_in_flight, thread_name_prefix="payretailers-hedge")
+        primary = self._primary_executor.submit(self.client.get, url, params=params, headers=headers, extensions=extensions)
+        done, _ = wait([primary], timeout=delay)
+        if done or not policy.try_acquire_hedge():
+            response = primary.result()
+            policy.record_latency(time.monotonic() - started)
+            return response
+
+        self.logger.debug(f"Hedging GET {url} after {delay:.3f}s")
+        # The profiling trace follows the primary only, so its phases are not recorded twice.
+        hedge = self._hedge_executor.submit(self.client.get, url, params=params, headers=headers)
+        hedge.add_done_callback(lambda _: policy.release_hedge())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    if not loser.cancel():
+                        loser.add_done_callback(self._close_hedge_loser)
+                if future is hedge:
+                    policy.record_hedge_win()
+                policy.record_latency(time.monotonic() - started)
+                return future.result()
+        raise error
+
+    @staticmethod
+    def _close_hedge_loser(future):
+        """Releases the connection held by a hedged request that lost the race."""
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def _dump_model(self, model) -> Dict[str, Any]:
+        """Serializes a request model, trimming None/unset fields when configured."""
+        return model.model_dump(
+            by_alias=True,
+            mode="json",
+            exclude_none=self.exclude_none,
+            exclude_unset=self.exclude_unset
+        )
+
+    def _build_payload(self, request: Union[BaseModel, Dict[str, Any]], model_cls) -> Dict[str, Any]:
+        """Turns a request model or dict into the payload to send; prepared payloads get the equivalent field checks only."""
+        if isinstance(request, PreparedPayload):
+            errors = request.validation_errors(model_cls)
+            if errors:
+                raise ValidationError(f"Invalid prepared {model_cls.__name__} payload: {'; '.join(errors)}")
+            if self.exclude_none:
+                return _prune_none(request)
+            return request
+        if isinstance(request, dict):
+            with phase("model_build"):
+                request = model_cls(**request)
+        with phase("model_dump"):
+            return self._dump_model(request)
+
+    def _dispatch(self, method: str, endpoint: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None, params: Optional[Dict] = None, hedge: bool = False) -> httpx.Response:
+        """
+        Performs a single HTTP attempt, admitted by the priority scheduler and gated by the
+        adaptive concurrency limiter when configured.
+        5xx responses, timeouts and connection errors count as overload signals.
+        """
+        if self.scheduler is None:
+            return self._dispatch_attempt(method, endpoint, body=body, headers=headers, params=params, hedge=hedge)
+        with phase("scheduler_wait"):
+            self.scheduler.acquire()
+        try:
+            return self._dispatch_attempt(method, endpoint, body=body, headers=headers, params=params, hedge=hedge)
+        finally:
+            self.scheduler.release()
+
+    def _dispatch_attempt(self, method: str, endpoint: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None, params: Optional[Dict] = None, hedge: bool = False) -> httpx.Response:
+        limiter = self.concurrency.for_endpoint(endpoint) if self.concurrency else None
+        started = None
+        if limiter:
+            with phase("concurrency_wait"):
+                started = limiter.acquire()
+        profile = active_profile()
+        extensions = {"trace": profile.http_trace(time.perf_counter())} if profile else None
+        overloaded = True
+        try:
+            with phase("attempt"):
+                if self.endpoints is None:
+                    response = self._send_http(method, endpoint, body, headers, params, hedge, extensions)
+                else:
+                    response = self._send_with_failover(method, endpoint, body, headers, params, hedge, extensions)
+            overloaded = response.status_code >= 500
+            return response
+        finally:
+            if limiter:
+                limiter.release(started, error=overloaded)
+
+    def _send_http(self, method: str, url: str, body: Optional[bytes], headers: Optional[Dict[str, str]], params: Optional[Dict], hedge: bool, extensions: Optional[Dict]) -> httpx.Response:
+        if method.upper() == "GET" and hedge and self.hedge_policy:
+            return self._hedged_get(url, params=params, headers=headers, extensions=extensions)
+        elif method.upper() == "GET":
+            return self.client.get(url, params=params, headers=headers, extensions=extensions)
+        elif method.upper() == "POST":
+            return self.client.post(url, content=body, headers=headers, extensions=extensions)
+        elif method.upper() == "PUT":
+            return self.client.put(url, content=body, headers=headers, extensions=extensions)
+        elif method.upper() == "PATCH":
+            return self.client.patch(url, content=body, headers=headers, extensions=extensions)
+        raise ValueError(f"Invalid HTTP method: {method}")
+
+    def _send_with_failover(self, method: str, endpoint: str, body: Optional[bytes], headers: Optional[Dict[str, str]], params: Optional[Dict], hedge: bool, extensions: Optional[Dict]) -> httpx.Response:
+        """
+        Sends the request to the selected endpoint and moves it to the next one on
+        connection errors and 5xx responses, until every endpoint has been tried.
+        Non-idempotent requests only move when the connection could not be opened,
+        since the server cannot have received them.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        tried = []
+        while True:
+            base = self.endpoints.select(exclude=tried)
+            tried.append(base)
+            last = len(tried) >= len(self.endpoints)
+            try:
+                response = self._send_http(method, f"{base}{endpoint}", body, headers, params, hedge, extensions)
+            except httpx.TransportError as e:
+                retry = not last and (idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)))
+                self.endpoints.record_failure(base, f"{type(e).__name__}: {e}", failover=retry)
+                if not retry:
+                    raise
+                self.logger.warning(f"{method} {endpoint} failed on {base} ({type(e).__name__}), failing over")
+                continue
+            if response.status_code < 500:
+                self.endpoints.record_success(base)
+                return response
+            retry = not last and idempotent
+            self.endpoints.record_failure(base, f"HTTP {response.status_code}", failover=retry)
+            if not retry:
+                return response
+            self.logger.warning(f"{method} {endpoint} got HTTP {response.status_code} from {base}, failing over")
+            response.close()
+
+    @staticmethod
+    def _sent_url(exchange: Union[httpx.Response, httpx.HTTPError], fallback: str) -> str:
+        """URL a request was actually sent to, which differs from `base_url` after a failover."""
+        try:
+            return str(exchange.request.url)
+        except (AttributeError, RuntimeError):
+            return fallback
+
+    @staticmethod
+    def _retry_sleep(seconds: float):
+        with phase("retry_sleep"):
+            time.sleep(seconds)
+
+    def _send_request(self, method: str, endpoint: str, payload: Optional[Dict] = None, params: Optional[Dict] = None, hedge: bool = False):
+        """
+        Sends a request; with `coalesce=True`, concurrent identical GETs share one upstream call.
+        """
+        if self.coalescer is not None and method.upper() == "GET":
+            return self.coalescer.do(ResponseCache.key(endpoint, params), self._perform_request, method, endpoint, None, params, hedge)
+        if payload is None or self.cache is None:
+            return self._perform_request(method, endpoint, payload, params, hedge)
+        try:
+            return self._perform_request(method, endpoint, payload, params, hedge)
+        finally:
+            # Also after errors: a write that timed out or got a 5xx may still have been applied.
+            self._invalidate_after_write(endpoint, payload)
+
+    def _invalidate_after_write(self, endpoint: str, payload: Dict[str, Any]):
+        """Drops the cached GETs that describe the resource a write creates."""
+        if endpoint == "payout" and payload.get("externalReference"):
+            self.cache.invalidate(f"payout/{payload['externalReference']}", namespace=self.cache_namespace)
+        elif endpoint in ("transactions", "paywalls") and payload.get("trackingId"):
+            self.cache.invalidate(endpoint, {"trackingId": payload["trackingId"]}, self.cache_namespace)
+
+    async def _send_request_async(self, method: str, endpoint: str, params: Optional[Dict] = None, hedge: bool = False):
+        """Runs a GET for asyncio callers in a worker thread, coalesced with thread callers when enabled."""
+        if self.coalescer is not None:
+            return await self.coalescer.do_async(ResponseCache.key(endpoint, params), self._perform_request, method, endpoint, None, params, hedge)
+        return await asyncio.to_thread(self._perform_request, method, endpoint, None, params, hedge)
+
+    def _perform_request(self, method: str, endpoint: str, payload: Optional[Dict] = None, params: Optional[Dict] = None, hedge: bool = False):
         """
         Sends HTTP request with retry logic using Tenacity.
+        Idempotent GETs may pass `hedge=True` to use hedged reads when a HedgePolicy is configured.
         """
         full_url_for_logging = f"{self.base_url}{endpoint}"
         retry_strategy = Retrying(
             stop=stop_after_attempt(self.max_retries),
             wait=wait_exponential(multiplier=1, min=4, max=10),
             retry=retry_if_exception_type((httpx.RequestError, httpx.TimeoutException, httpx.HTTPStatusError)),
-            before_sleep=before_sleep_log(logger, logging.WARNING),
+            before_sleep=before_sleep_log(self.logger, logging.WARNING),
+            sleep=self._retry_sleep,
             reraise=True # Re-raise the last exception if retries are exhausted
         )
 
-        logger.debug(f"Sending {method} request to {full_url_for_logging}")
-
-        if payload:
-            logger.debug(f"Payload: {json.dumps(payload, default=str)}")
+        self.logger.debug(f"Sending {method} request to {full_url_for_logging}")
+
+        cache_key, cached = None, None
+        if self.cache is not None and method.upper() == "GET" and self.cache.is_cacheable(endpoint):
+            cache_key = self.cache.key(endpoint, params, self.cache_namespace)
+            # Background polls look for status changes, so they always ask upstream.
+            revalidate = current_priority() == Priority.BACKGROUND
+            cached = self.cache.lookup(cache_key, revalidate=revalidate)
+            if cached is not None and cached.fresh and not revalidate:
+                self.logger.debug(f"Cache hit for {full_url_for_logging}")
+                if self.audit is not None:
+                    self.audit.record(method, endpoint, params, None, 200, cached.body, 0, 0.0, cache="hit")
+                return loads(cached.body)
+
+        body, body_headers = None, None
+        if cached is not None and cached.etag:
+            body_headers = {"If-None-Match": cached.etag}
+        if payload is not None:
+            with phase("serialize"):
+                body, body_headers = encode_body(payload, compress=self.compress_requests, min_size=self.compress_min_size)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Payload: {json.dumps(payload, default=str)}")
 
         response = None # Initialize response to ensure it's defined
+        started = time.perf_counter()
+        attempts = 0
 
         try:
             for attempt in retry_strategy:
                 with attempt:
                     try:
-                        if method.upper() == "GET":
-                            response = self.client.get(endpoint, params=params)
-                        elif method.upper() == "POST":
-                            response = self.client.post(endpoint, json=payload)
-                        elif method.upper() == "PUT":
-                            response = self.client.put(endpoint, json=payload)
-                        elif method.upper() == "PATCH":
-                            response = self.client.patch(endpoint, json=payload)
-                        else:
-                            raise ValueError(f"Invalid HTTP method: {method}")
+                        attempts += 1
+                        response = self._dispatch(method, endpoint, body=body, headers=body_headers, params=params, hedge=hedge)
 
                         if 500 <= response.status_code < 600:
                             response.raise_for_status()
@@ -137,57 +631,99 @@ class PayRetailersClient:
                         raise
         except (httpx.RequestError, httpx.TimeoutException) as e:
 
-            logger.error(f"Request to {full_url_for_logging} failed after {self.max_retries} attempts due to connection error: {e}")
+            self.logger.error(f"Request to {self._sent_url(e, full_url_for_logging)} failed after {self.max_retries} attempts due to connection error: {e}")
+            if self.audit is not None:
+                self.audit.record(method, endpoint, params, body, None, None, attempts, time.perf_counter() - started, error=type(e).__name__)
             raise APIConnectionError(f"PayRetailers API Unreachable: {e}")
+        except LoadSheddedError as e:
+            if self.audit is not None:
+                self.audit.record(method, endpoint, params, body, None, None, attempts, time.perf_counter() - started, error=type(e).__name__)
+            raise
         except httpx.HTTPStatusError as e:
             response = e.response
-            logger.error(f"Request to {full_url_for_logging} failed with status {response.status_code} after {self.max_retries} attempts: {e}")
+            self.logger.error(f"Request to {self._sent_url(response, full_url_for_logging)} failed with status {response.status_code} after {self.max_retries} attempts: {e}")
         if response is None:
             raise APIConnectionError("No response received from PayRetailers API after all attempts.")
 
-        logger.info(f"Response Status Code: {response.status_code}")
-        logger.info(f"Response Body: {response.text}")
+        self.logger.info(f"Response Status Code: {response.status_code} from {self._sent_url(response, full_url_for_logging)}")
+        if self.audit is not None:
+            self.audit.record(method, endpoint, params, body, response.status_code, response.content, attempts, time.perf_counter() - started)
+
+        if cache_key and cached is not None and response.status_code == 304:
+            data = loads(cached.body)
+            self.cache.revalidated(cache_key, endpoint, cached, data)
+            return data
+
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Response Body: {response.text}")
 
         if not response.is_success:
             self._handle_error(response)
 
-        return response.json()
+        data = self._decode_response(response)
+        if cache_key:
+            self.cache.store(cache_key, endpoint, response.content, response.headers.get("etag"), data)
+        return data
+
+    @staticmethod
+    def _decode_response(response: httpx.Response) -> Any:
+        """Decodes the response body once, straight from the raw bytes."""
+        if not response.content:
+            return {}
+        with phase("json_decode"):
+            return loads(response.content)
 
     def _handle_error(self, response):
         """Parses error response and raises appropriate exception."""
         try:
-            error_data = response.json()
+            error_data = self._decode_response(response)
+            if not isinstance(error_data, dict):
+                raise ValueError("Unexpected error payload")
             code = error_data.get("code") or error_data.get("error_code") or str(response.status_code)
             message = error_data.get("message") or error_data.get("description") or response.text
         except ValueError:
             code = str(response.status_code)
             message = response.text
 
-        logger.error(f"API Error. Code: {code}, Message: {message}")
+        self.logger.error(f"API Error. Code: {code}, Message: {message}")
 
         if response.status_code == 401:
             raise AuthenticationError(f"Authentication failed: {message}", code=code, status_code=response.status_code)
 
         raise get_exception_for_code(code, message, status_code=response.status_code)
 
+    def _stream_list(self, endpoint: str, params: Optional[Dict] = None, key: str = "list") -> Iterator[Dict[str, Any]]:
+        """
+        Streams a list-shaped GET endpoint, yielding the items of `key` one by one
+        without holding the full document in memory.
+        """
+        url = self._url(endpoint)
+        full_url_for_logging = url if self.endpoints is not None else f"{self.base_url}{endpoint}"
+        self.logger.debug(f"Streaming GET request to {full_url_for_logging}")
+        try:
+            with self.client.stream("GET", url, params=params) as response:
+                self.logger.info(f"Response Status Code: {response.status_code}")
+                if not response.is_success:
+                    response.read()
+                    self._handle_error(response)
+                yield from iter_json_array(response.iter_bytes(), key=key)
+        except (httpx.RequestError, httpx.TimeoutException) as e:
+            self.logger.error(f"Streaming request to {full_url_for_logging} failed due to connection error: {e}")
+            raise APIConnectionError(f"PayRetailers API Unreachable: {e}")
+
     def create_transaction(self, request: Union[TransactionRequest, Dict[str, Any]]) -> Dict[str, Any]:
         """
         Creates a new transaction.
 
         Args:
-            request: A TransactionRequest model or a dictionary.
+            request: A TransactionRequest model, a dictionary, or a PreparedPayload from TransactionRequestBuilder.
         """
-        if isinstance(request, dict):
-            request_model = TransactionRequest(**request)
-        else:
-            request_model = request
-
-        payload = request_model.model_dump(by_alias=True)
+        payload = self._build_payload(request, TransactionRequest)
         response = self._send_request("POST", "transactions", payload=payload)
 
         status = response.get("status")
         if isinstance(status, str) and status.upper() == "MISSING_INFO":
-            logger.warning(
+            self.logger.warning(
                 "Transaction created with status 'MISSING_INFO'. "
                 "The payer data provided was insufficient or invalid. "
                 "Please provide full customer details (first_name, last_name, personal_id) "
@@ -201,35 +737,27 @@ class PayRetailersClient:
             if status_upper in ["PENDING", "MISSING_INFO"]:
                 is_transaction_valid = True
             elif status_upper == "FAILED":
-                logger.error(f"Transaction failed creation. Status: {status}. Message: {response.get('message')}")
+                self.logger.error(f"Transaction failed creation. Status: {status}. Message: {response.get('message')}")
         if is_transaction_valid and payment_method and not self.sandbox:
-            is_blacklisted = False
-            if payment_method in self.blacklist:
-                expiry = self.blacklist[payment_method]
-                if time.time() < expiry:
-                    is_blacklisted = True
-                    logger.debug(f"Payment method '{payment_method}' is in H2H blacklist. Skipping landing info.")
-                else:
-                    del self.blacklist[payment_method]
-                    self._save_blacklist_cache()
+            is_blacklisted = self._is_blacklisted(payment_method)
+            if is_blacklisted:
+                self.logger.debug(f"Payment method '{payment_method}' is in H2H blacklist. Skipping landing info.")
 
             if not is_blacklisted:
                 transaction_id = response.get("id") or response.get("uid")
                 if transaction_id:
                     try:
-                        landing_info = self.get_landing_info(transaction_id)
+                        with phase("h2h_enrichment"):
+                            landing_info = self.get_landing_info(transaction_id)
                         if landing_info:
                              response["h2h"] = landing_info
-                             if payment_method in self.blacklist:
-                                 del self.blacklist[payment_method]
-                                 self._save_blacklist_cache()
+                             self._remove_from_blacklist(payment_method)
                     except Exception as e:
-                        logger.warning(f"Failed to fetch Landing Info for '{payment_method}'. Adding to blacklist. Error: {e}")
+                        self.logger.warning(f"Failed to fetch Landing Info for '{payment_method}'. Adding to blacklist. Error: {e}")
                         # Add to blacklist
-                        self.blacklist[payment_method] = time.time() + BLACKLIST_DURATION
-                        self._save_blacklist_cache()
+                        self._add_to_blacklist(payment_method)
         elif self.sandbox and payment_method:
-             logger.warning("H2H Integration (Get Landing Info) skipped in Sandbox mode.")
+             self.logger.warning("H2H Integration (Get Landing Info) skipped in Sandbox mode.")
 
         return response
 
@@ -237,50 +765,44 @@ class PayRetailersClient:
         """
         Creates a new paywall.
         """
-        if isinstance(request, dict):
-            request_model = PaywallRequest(**request)
-        else:
-            request_model = request
-
-        payload = request_model.model_dump(by_alias=True)
+        payload = self._build_payload(request, PaywallRequest)
         return self._send_request("POST", "paywalls", payload=payload)
 
     def create_payout(self, request: Union[PayoutRequest, Dict[str, Any]]) -> Dict[str, Any]:
         """
         Creates a new payout.
         """
-        if isinstance(request, dict):
-            request_model = PayoutRequest(**request)
-        else:
-            request_model = request
-
-        payload = request_model.model_dump(by_alias=True)
+        payload = self._build_payload(request, PayoutRequest)
         return self._send_request("POST", "payout", payload=payload)
 
     def get_transaction(self, uid: str) -> Dict[str, Any]:
         """Retrieve transaction by UID."""
-        return self._send_request("GET", f"transactions/{uid}")
+        return self._send_request("GET", f"transactions/{uid}", hedge=True)
+
+    async def get_transaction_async(self, uid: str) -> Dict[str, Any]:
+        """Retrieve transaction by UID from a coroutine."""
+        return await self._send_request_async("GET", f"transactions/{uid}", hedge=True)
 
     def get_transaction_by_tracking_id(self, tracking_id: str) -> Dict[str, Any]:
         """Retrieve transaction by Tracking ID."""
-        return self._send_request("GET", "transactions", params={"trackingId": tracking_id})
+        return self._send_request("GET", "transactions", params={"trackingId": tracking_id}, hedge=True)
 
     def get_paywall_by_uid(self, uid: str) -> Dict[str, Any]:
         """Retrieve Paywall by UID."""
-        return self._send_request("GET", f"paywalls/{uid}")
+        return self._send_request("GET", f"paywalls/{uid}", hedge=True)
 
     def get_paywall_by_tracking_id(self, tracking_id: str) -> Dict[str, Any]:
         """
         Retrieve Paywall by Tracking ID.
         """
-        return self._send_request("GET", "paywalls", params={"trackingId": tracking_id})
+        return self._send_request("GET", "paywalls", params={"trackingId": tracking_id}, hedge=True)
 
     def get_payout_details(self, external_reference: str) -> Dict[str, Any]:
         """
         Get Payout Details.
         Endpoint: payout/{externalReference}
         """
-        return self._send_request("GET", f"payout/{external_reference}")
+        return self._send_request("GET", f"payout/{external_reference}", hedge=True)
 
     def get_payment_methods(self, country: Optional[str] = None, currency: Optional[str] = None, channel: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -297,14 +819,95 @@ class PayRetailersClient:
 
         return self._send_request("GET", "paymentMethods", params=params)
 
+    async def get_payment_methods_async(self, country: Optional[str] = None, currency: Optional[str] = None, channel: Optional[str] = None) -> Dict[str, Any]:
+        """Get available payment methods from a coroutine. Same filters as `get_payment_methods`."""
+        params = {}
+        if country:
+            params["country"] = country
+        if currency:
+            params["currency"] = currency
+        if channel:
+            params["channel"] = channel
+
+        return await self._send_request_async("GET", "paymentMethods", params=params)
+
+    def iter_payment_methods(self, country: Optional[str] = None, currency: Optional[str] = None, channel: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streams available payment methods one item at a time.
+        Same filters as `get_payment_methods`, but the response is decoded
+        incrementally instead of being loaded as a whole.
+        """
+        params = {}
+        if country:
+            params["country"] = country
+        if currency:
+            params["currency"] = currency
+        if channel:
+            params["channel"] = channel
+
+        return self._stream_list("paymentMethods", params=params)
+
     def get_shop_balance(self) -> Dict[str, Any]:
         """Get shop balance."""
         if self.sandbox:
-            logger.warning("get_shop_balance is NOT available in Sandbox environment.")
+            self.logger.warning("get_shop_balance is NOT available in Sandbox environment.")
         return self._send_request("GET", "shop-balance")
 
+    def warmup(self,
+               catalogs: Iterable[Tuple[Optional[str], Optional[str], Optional[str]]] = ((None, None, None),),
+               connections: int = 0,
+               deadline: float = 10.0) -> Dict[Tuple[Optional[str], Optional[str], Optional[str]], Any]:
+        """
+        Prepares the client before serving traffic in one parallel round trip:
+        fetches the given payment-method catalogs and opens pooled connections
+        (TLS handshakes included) concurrently.
+
+        Args:
+            catalogs: (country, currency, channel) filters to fetch with `get_payment_methods`.
+            connections: Minimum number of pooled connections to open; extra
+                connections beyond the catalog fetches are opened with HEAD requests.
+            deadline: Seconds to wait in total. Unfinished fetches are reported as TimeoutError.
+
+        Returns:
+            A mapping of each catalog filter to its response, or the exception it raised.
+        """
+        catalogs = list(dict.fromkeys(catalogs))
+        extra_connections = max(0, connections - len(catalogs))
+        executor = ThreadPoolExecutor(max_workers=max(1, len(catalogs) + extra_connections), thread_name_prefix="payretailers-warmup")
+        try:
+            futures = {
+                executor.submit(self.get_payment_methods, country=country, currency=currency, channel=channel): (country, currency, channel)
+                for country, currency, channel in catalogs
+            }
+            probes = [executor.submit(self.client.head, self._url("")) for _ in range(extra_connections)]
+            done, _ = wait(list(futures) + probes, timeout=deadline)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {}
+        for future, target in futures.items():
+            if future not in done:
+                results[target] = TimeoutError(f"Warm-up of payment methods {target} exceeded {deadline}s")
+            elif future.exception() is not None:
+                results[target] = future.exception()
+            else:
+                results[target] = future.result()
+        failed = sum(isinstance(r, Exception) for r in results.values())
+        self.logger.info(f"Warm-up finished: {len(results) - failed}/{len(results)} catalogs loaded, {len(probes)} extra connections")
+        return results
+
     def close(self):
         """Closes the HTTPX client connection pool."""
+        if self._closed:
+            return
+        self._closed = True
+        # Closed clients are not rebuilt after a fork.
+        _live_clients.discard(self)
+        if self._hedge_executor is not None:
+            self._primary_executor.shutdown(wait=False, cancel_futures=True)
+            self._hedge_executor.shutdown(wait=False, cancel_futures=True)
+        if self.endpoints is not None:
+            self.endpoints.release()
         self.client.close()
 
     def __enter__(self):
@@ -312,3 +915,44 @@ class PayRetailersClient:
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.close()
+
+
+_live_clients: "weakref.WeakSet[PayRetailersClient]" = weakref.WeakSet()
+_blacklist_process_lock = threading.Lock()
+_worker_clients: Dict[ClientConfig, PayRetailersClient] = {}
+_worker_lock = threading.Lock()
+
+
+def _after_fork_in_child():
+    global _worker_lock, _blacklist_process_lock
+    _worker_lock = threading.Lock()
+    _blacklist_process_lock = threading.Lock()
+    seen = set()
+    for client in list(_live_clients):
+        if not client._closed:
+            client._after_fork(seen)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def worker_client(config: ClientConfig) -> PayRetailersClient:
+    """
+    Returns this process's client for `config`, creating it on first use, so
+    each process-pool worker keeps one pooled client per configuration.
+
+    Usage:
+        def job(config, reference):
+            return worker_client(config).get_payout_details(reference)
+
+        with ProcessPoolExecutor() as pool:
+            pool.map(job, repeat(client.config()), references)
+    """
+    client = _worker_clients.get(config)
+    if client is None:
+        with _worker_lock:
+            client = _worker_clients.get(config)
+            if client is None:
+                client = _worker_clients[config] = config.build()
+    return client
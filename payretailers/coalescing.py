@@ -0,0 +1,85 @@
+import copy
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution.
+
+    The first caller for a key (the leader) runs the call; callers arriving while
+    it is in flight wait for it. Every caller, the leader included, receives its
+    own copy of the result, or the error.
+    Thread and asyncio callers share the same in-flight calls, so a status page
+    served from an event loop and a worker pool never fetch the same item twice
+    at the same time.
+
+    Usage:
+        flight = SingleFlight()
+        data = flight.do("transactions/abc", fetch, "abc")              # from threads
+        data = await flight.do_async("transactions/abc", fetch, "abc")  # from coroutines
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _after_fork(self):
+        # Calls in flight at fork time would never complete in the child.
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            # A running future cannot be cancelled, so a cancelled waiter never fails the others.
+            future.set_running_or_notify_cancel()
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _lead(self, key: str, future: Future, fn: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Any:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return copy.deepcopy(result)
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """Runs `fn(*args, **kwargs)` unless the same key is already in flight, in which case it waits for that call."""
+        future, leader = self._join(key)
+        if not leader:
+            return copy.deepcopy(future.result())
+        return self._lead(key, future, fn, args, kwargs)
+
+    async def do_async(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Same as `do` for coroutines. The leader runs the blocking `fn` in a worker
+        thread, which also resolves the shared call, so cancelling the leader does
+        not fail the waiters; waiters await it without occupying a thread.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return copy.deepcopy(await asyncio.wrap_future(future))
+        return await asyncio.to_thread(self._lead, key, future, fn, args, kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
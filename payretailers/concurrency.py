@@ -0,0 +1,156 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+def endpoint_family(endpoint: str) -> str:
+    """Groups endpoints by their first path segment (e.g. 'transactions/{uid}' -> 'transactions')."""
+    family = endpoint.strip("/").split("/", 1)[0]
+    return family or "root"
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter.
+
+    The in-flight window grows by roughly one slot per window of successful,
+    fast requests (additive increase) and is multiplied by `backoff_ratio` when a
+    request fails with an overload signal (5xx, timeout, connection error) or
+    its latency exceeds `latency_tolerance` times the baseline (multiplicative
+    decrease). The baseline is the `baseline_percentile` of the last `window`
+    successful latencies, so a single fast outlier does not turn ordinary jitter
+    into congestion; latency is not judged until `min_samples` were seen. Only
+    one decrease is applied per congestion event: requests that started before
+    the last decrease do not shrink the window again.
+    """
+
+    def __init__(self,
+                 initial_limit: int = 8,
+                 min_limit: int = 1,
+                 max_limit: int = 256,
+                 backoff_ratio: float = 0.7,
+                 latency_tolerance: float = 2.5,
+                 window: int = 200,
+                 baseline_percentile: float = 0.1,
+                 min_samples: int = 20):
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError("initial_limit must be between min_limit and max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.baseline_percentile = baseline_percentile
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        # Re-sorting the window on every release is wasteful; refresh the baseline every few samples.
+        self._refresh_every = max(1, window // 20)
+        self._since_refresh = 0
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self.successes = 0
+        self.errors = 0
+        self.decreases = 0
+
+    def _after_fork(self):
+        # Requests in flight at fork time belong to the parent process.
+        self._cond = threading.Condition()
+        self._in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        """Current in-flight window."""
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Waits for a free slot and returns the start timestamp to pass to `release`.
+        Raises TimeoutError if no slot frees up within `timeout` seconds.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._in_flight < self.limit, timeout):
+                raise TimeoutError("Timed out waiting for a concurrency slot")
+            self._in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, error: bool = False):
+        """Frees a slot and adjusts the window from the request's outcome."""
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self._in_flight -= 1
+            if not error:
+                self.successes += 1
+                self._samples.append(latency)
+                self._since_refresh += 1
+                if len(self._samples) >= self.min_samples and (self._baseline is None or self._since_refresh >= self._refresh_every):
+                    # A permanent shift in latency fills the window and is eventually accepted.
+                    ordered = sorted(self._samples)
+                    self._baseline = ordered[int((len(ordered) - 1) * self.baseline_percentile)]
+                    self._since_refresh = 0
+                if self._baseline is not None and latency > self._baseline * self.latency_tolerance:
+                    error = True
+            else:
+                self.errors += 1
+
+            if error:
+                if started >= self._last_decrease:
+                    self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "baseline_latency": self._baseline or 0.0,
+                "successes": self.successes,
+                "errors": self.errors,
+                "decreases": self.decreases,
+            }
+
+
+class AdaptiveConcurrency:
+    """
+    Keeps one AdaptiveLimiter per endpoint family so a struggling endpoint
+    (e.g. 'payout') does not throttle unrelated ones.
+
+    Pass an instance to PayRetailersClient(concurrency=...) to gate every request
+    attempt; the current windows are exposed through `limits()` and `stats()`.
+    """
+
+    def __init__(self, **limiter_kwargs):
+        self._limiter_kwargs = limiter_kwargs
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_endpoint(self, endpoint: str) -> AdaptiveLimiter:
+        family = endpoint_family(endpoint)
+        limiter = self._limiters.get(family)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.setdefault(family, AdaptiveLimiter(**self._limiter_kwargs))
+        return limiter
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        for limiter in self._limiters.values():
+            limiter._after_fork()
+
+    def limits(self) -> Dict[str, int]:
+        """Current in-flight window per endpoint family."""
+        return {family: limiter.limit for family, limiter in list(self._limiters.items())}
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {family: limiter.stats() for family, limiter in list(self._limiters.items())}
@@ -1,5 +1,7 @@
 import logging
-from typing import Optional, Dict, Any, Union
+import threading
+from typing import Optional, Dict, Any, Union, Iterator, Iterable, List
+from concurrent.futures import ThreadPoolExecutor
 from .client import PayRetailersClient
 from .models import TransactionRequest, PaywallRequest, Customer, CountryEnum, CurrencyEnum, LanguageEnum
 
@@ -15,36 +17,75 @@ class PayRetailersCountryClient:
                  default_currency: CurrencyEnum,
                  sandbox: bool = False,
                  log_level: int = logging.DEBUG,
-                 max_retries: int = 3):
+                 max_retries: int = 3,
+                 **client_kwargs):
         self._client = PayRetailersClient(
             shop_id,
             secret_key,
             subscription_key,
             sandbox=sandbox,
             log_level=log_level,
-            max_retries=max_retries
+            max_retries=max_retries,
+            **client_kwargs
         )
         self._country_code = country_code
         self._default_currency = default_currency
         self.sandbox = sandbox
         self._cached_payment_methods = None
+        self._payment_methods_lock = threading.Lock()
 
     @property
     def base_url(self):
         return self._client.base_url
 
     def _fetch_payment_methods_tags(self) -> set:
-        """Fetch and cache payment method tags."""
+        """Fetch and cache payment method tags. Concurrent first calls share a single fetch."""
         if self._cached_payment_methods is None:
-            methods = self._client.get_payment_methods(country=self._country_code.value, currency=self._default_currency.value)
-            # Flatten list to get tags
-            self._cached_payment_methods = {
-                m.get("paymentMethodTag")
-                for m in methods.get("list", [])
-                if m.get("paymentMethodTag")
-            }
+            with self._payment_methods_lock:
+                if self._cached_payment_methods is None:
+                    methods = self._client.get_payment_methods(country=self._country_code.value, currency=self._default_currency.value)
+                    self._cached_payment_methods = self._extract_tags(methods)
         return self._cached_payment_methods
 
+    @staticmethod
+    def _extract_tags(methods: Dict[str, Any]) -> set:
+        # Flatten list to get tags
+        return {
+            m.get("paymentMethodTag")
+            for m in methods.get("list", [])
+            if m.get("paymentMethodTag")
+        }
+
+    def warmup(self,
+               currencies: Optional[Iterable[Union[str, CurrencyEnum]]] = None,
+               channels: Optional[Iterable[str]] = None,
+               connections: int = 0,
+               deadline: float = 10.0) -> Dict[Any, Any]:
+        """
+        Pre-opens pooled connections and fetches the payment-method catalogs for this
+        country concurrently, filling the tag cache used to validate transactions.
+
+        Args:
+            currencies: Extra currencies to fetch besides the default one.
+            channels: Channels to fetch in addition to the unfiltered catalog.
+            connections: Minimum number of pooled connections to open.
+            deadline: Seconds to wait in total.
+        """
+        use_currencies = [self._default_currency.value]
+        for currency in currencies or []:
+            value = currency.value if isinstance(currency, CurrencyEnum) else currency
+            if value not in use_currencies:
+                use_currencies.append(value)
+        use_channels = [None] + list(channels or [])
+        catalogs = [(self._country_code.value, currency, channel) for currency in use_currencies for channel in use_channels]
+
+        results = self._client.warmup(catalogs=catalogs, connections=connections, deadline=deadline)
+        default_catalog = results.get((self._country_code.value, self._default_currency.value, None))
+        if isinstance(default_catalog, dict):
+            with self._payment_methods_lock:
+                self._cached_payment_methods = self._extract_tags(default_catalog)
+        return results
+
     def _validate_payment_method_tag(self, tag: Optional[str]) -> str:
         """
         Validates the payment method tag.
@@ -128,9 +169,8 @@ class PayRetailersCountryClient:
         Simplified transaction creation.
         """
         # Logging warning for missing fields
-        from .logger import logger
         if not customer_first_name or not customer_last_name or not customer_personal_id:
-             logger.warning(
+             self._client.logger.warning(
                  f"Creating transaction with missing Customer info (first_name, last_name, or personal_id). "
                  f"Status 'missing_info' expected. "
                  f"Consider providing these fields to increase conversion."
@@ -192,9 +232,8 @@ class PayRetailersCountryClient:
                        **customer_kwargs) -> Dict[str, Any]:
 
         # Logging warning for missing fields
-        from .logger import logger
         if not customer_first_name or not customer_last_name or not customer_personal_id:
-             logger.warning(
+             self._client.logger.warning(
                  f"Creating paywall with missing Customer info. "
                  f"Status 'missing_info' expected. "
                  f"Consider providing these fields to increase conversion."
@@ -251,34 +290,57 @@ class PayRetailersCountryClient:
         use_currency = currency if currency else self._default_currency
         return self._client.get_payment_methods(country=use_country, currency=use_currency, channel=channel)
 
+    def iter_payment_methods(self, channel: Optional[str] = None, country: Optional[str] = None, currency: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream available payment methods one item at a time.
+        Defaults to the client's country and currency if not specified.
+        """
+        use_country = country if country else self._country_code
+        use_currency = currency if currency else self._default_currency
+        return self._client.iter_payment_methods(country=use_country, currency=use_currency, channel=channel)
+
     def get_shop_balance(self):
         return self._client.get_shop_balance()
 
 
 class PayRetailersBrazil(PayRetailersCountryClient):
-    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3):
-        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.BR, CurrencyEnum.BRL, sandbox, log_level, max_retries)
+    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3, **client_kwargs):
+        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.BR, CurrencyEnum.BRL, sandbox, log_level, max_retries, **client_kwargs)
 
 class PayRetailersArgentina(PayRetailersCountryClient):
-    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3):
-        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.AR, CurrencyEnum.ARS, sandbox, log_level, max_retries)
+    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3, **client_kwargs):
+        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.AR, CurrencyEnum.ARS, sandbox, log_level, max_retries, **client_kwargs)
 
 class PayRetailersChile(PayRetailersCountryClient):
-    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3):
-        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.CL, CurrencyEnum.CLP, sandbox, log_level, max_retries)
+    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3, **client_kwargs):
+        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.CL, CurrencyEnum.CLP, sandbox, log_level, max_retries, **client_kwargs)
 
 class PayRetailersColombia(PayRetailersCountryClient):
-    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3):
-        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.CO, CurrencyEnum.COP, sandbox, log_level, max_retries)
+    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3, **client_kwargs):
+        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.CO, CurrencyEnum.COP, sandbox, log_level, max_retries, **client_kwargs)
 
 class PayRetailersMexico(PayRetailersCountryClient):
-    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3):
-        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.MX, CurrencyEnum.MXN, sandbox, log_level, max_retries)
+    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3, **client_kwargs):
+        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.MX, CurrencyEnum.MXN, sandbox, log_level, max_retries, **client_kwargs)
 
 class PayRetailersPeru(PayRetailersCountryClient):
-    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3):
-        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.PE, CurrencyEnum.PEN, sandbox, log_level, max_retries)
+    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3, **client_kwargs):
+        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.PE, CurrencyEnum.PEN, sandbox, log_level, max_retries, **client_kwargs)
 
 class PayRetailersEcuador(PayRetailersCountryClient):
-    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3):
-        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.EC, CurrencyEnum.USD, sandbox, log_level, max_retries)
+    def __init__(self, shop_id: str, secret_key: str, subscription_key: str, sandbox: bool = False, log_level: int = logging.DEBUG, max_retries: int = 3, **client_kwargs):
+        super().__init__(shop_id, secret_key, subscription_key, CountryEnum.EC, CurrencyEnum.USD, sandbox, log_level, max_retries, **client_kwargs)
+
+
+def warmup_clients(clients: List[PayRetailersCountryClient], deadline: float = 10.0, **warmup_kwargs) -> Dict[str, Any]:
+    """
+    Warms up several country clients in parallel (see PayRetailersCountryClient.warmup),
+    so a worker serving many markets is ready after a single round trip.
+    Returns the warm-up results keyed by country code.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(clients)), thread_name_prefix="payretailers-warmup") as executor:
+        futures = {
+            client._country_code.value: executor.submit(client.warmup, deadline=deadline, **warmup_kwargs)
+            for client in clients
+        }
+        return {country: future.result() for country, future in futures.items()}
@@ -0,0 +1,563 @@
+import gzip
+import time
+import uuid
+import heapq
+import queue
+import base64
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Tuple, List, Mapping
+from urllib.parse import urlsplit, parse_qsl
+import httpx
+from .logger import logger
+from .models import CountryEnum, CurrencyEnum
+from .constants import SANDBOX_PAYMENT_METHODS
+from .serialization import loads, dumps
+from .exceptions import ValidationError
+from .utils import validate_personal_id
+
+# Currencies accepted per country; countries that are not listed accept any known currency.
+COUNTRY_CURRENCIES: Dict[str, Tuple[str, ...]] = {
+    "AR": ("ARS", "USD"),
+    "BR": ("BRL", "USD"),
+    "CL": ("CLP", "USD"),
+    "CO": ("COP", "USD"),
+    "CR": ("CRC", "USD"),
+    "EC": ("USD",),
+    "MX": ("MXN", "USD"),
+    "PE": ("PEN", "USD"),
+    "GT": ("GTQ", "USD"),
+}
+
+# (minimum, maximum) transaction amount per currency; others use DEFAULT_LIMITS.
+AMOUNT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "CLP": (500, 10000000),
+    "COP": (5000, 50000000),
+    "ARS": (100, 10000000),
+    "CRC": (500, 10000000),
+    "UGX": (1000, 50000000),
+    "TZS": (1000, 50000000),
+}
+DEFAULT_LIMITS = (1, 1000000)
+
+# Payment methods that expose H2H landing info (QR codes, boletos, bank accounts).
+H2H_METHODS = frozenset({"PIX", "BOLETO", "ONLINE"})
+
+TRANSACTION_OUTCOMES = {"APPROVED": 0.85, "FAILED": 0.10, "EXPIRED": 0.05}
+PAYOUT_OUTCOMES = {"APPROVED": 0.95, "FAILED": 0.05}
+
+# With a `capacity`, requests beyond this multiple of it in flight are answered with a 503.
+OVERLOAD_FACTOR = 2
+
+# Webhooks waiting for delivery; further status changes are not notified while it is full.
+WEBHOOK_QUEUE_SIZE = 10000
+
+KIND_TRANSACTION = "transaction"
+KIND_PAYWALL = "paywall"
+KIND_PAYOUT = "payout"
+
+
+class EmulatorError(Exception):
+    """An API error answered by the emulator as `{"code", "message"}`."""
+
+    def __init__(self, status_code: int, code: str, message: str):
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+        super().__init__(f"[{code}] {message}")
+
+
+class PayRetailersEmulator:
+    """
+    Stateful local stand-in for the PayRetailers v2 API, for integration and soak tests.
+
+    Implements the endpoints used by PayRetailersClient (transactions, paywalls,
+    payouts, payment methods, shop balance and H2H landing info) with the
+    PENDING -> APPROVED / FAILED / EXPIRED state machine, MISSING_INFO for
+    incomplete payers, per-country payment methods, balances credited by approved
+    transactions and debited by payouts, webhooks to `notificationUrl`, and the
+    error codes of ERROR_CODE_MAP. Use it in-process through `transport()` or as a
+    loopback HTTP server through `serve()`. Webhooks are only delivered while the
+    background threads run (`start()`, `serve()` or a `with` block); without them
+    status changes are not notified.
+
+    Usage:
+        emulator = PayRetailersEmulator(balances={"BRL": 100000}, settle_after=1.0, seed=7)
+        client = PayRetailersClient(shop_id, secret_key, subscription_key, transport=emulator.transport())
+        # or: base_url = emulator.serve(); PayRetailersClient(..., base_url=base_url)
+    """
+
+    def __init__(self,
+                 balances: Optional[Dict[str, float]] = None,
+                 payment_methods: Optional[Dict[str, List[str]]] = None,
+                 settle_after: float = 2.0,
+                 outcomes: Optional[Dict[str, float]] = None,
+                 payout_outcomes: Optional[Dict[str, float]] = None,
+                 latency: float = 0.0,
+                 fault_rate: float = 0.0,
+                 capacity: Optional[int] = None,
+                 credentials: Optional[Tuple[str, str]] = None,
+                 customer_limit: Optional[int] = None,
+                 webhooks: bool = True,
+                 webhook_transport: Optional[httpx.BaseTransport] = None,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            balances: Initial available balance per currency.
+            payment_methods: Tags per country; defaults to the sandbox tags (or "ONLINE").
+            settle_after: Seconds before a pending item reaches its final status.
+            outcomes: Weights of the final transaction/paywall statuses.
+            payout_outcomes: Weights of the final payout statuses.
+            latency: Seconds added to every response.
+            fault_rate: Share of requests answered with a 503.
+            capacity: Requests the emulator serves concurrently at `latency`. Beyond it,
+                latency grows in proportion to the requests in flight, and past
+                OVERLOAD_FACTOR times the capacity requests are answered with a 503.
+            credentials: (shop_id, secret_key) to enforce; any credentials are accepted when None.
+            customer_limit: Transactions allowed per customer email before BLOCKED_BY_CUSTOMER_LIMIT_RULE.
+            webhooks: Whether to POST status changes to the notification URLs.
+            webhook_transport: Transport used to deliver webhooks (e.g. to an in-process app).
+            seed: Seed for outcomes and faults, for reproducible runs.
+        """
+        self.payment_methods = {country.value: list(tags) for country, tags in SANDBOX_PAYMENT_METHODS.items()}
+        self.payment_methods.update(payment_methods or {})
+        self.settle_after = settle_after
+        self.outcomes = outcomes or TRANSACTION_OUTCOMES
+        self.payout_outcomes = payout_outcomes or PAYOUT_OUTCOMES
+        self.latency = latency
+        self.fault_rate = fault_rate
+        self.capacity = capacity
+        self.customer_limit = customer_limit
+        self.webhooks = webhooks
+        self._auth = None
+        if credentials:
+            self._auth = "Basic " + base64.b64encode(f"{credentials[0]}:{credentials[1]}".encode()).decode()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._balances: Dict[str, float] = {k: float(v) for k, v in (balances or {}).items()}
+        self._pending: Dict[str, float] = {}
+        self._records: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._tracking: Dict[Tuple[str, str], str] = {}
+        self._customers: Dict[str, int] = {}
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._sequence = 0
+        self._webhook_queue: "queue.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = queue.Queue(WEBHOOK_QUEUE_SIZE)
+        self._webhook_transport = webhook_transport
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.requests = 0
+        self.faults = 0
+        self.overloads = 0
+        self.in_flight = 0
+        self.webhooks_sent = 0
+        self.webhooks_failed = 0
+        self.webhooks_dropped = 0
+        self.errors = 0
+
+    def handle(self, method: str, path: str, query: Mapping[str, str], headers: Mapping[str, str], body: bytes) -> Tuple[int, bytes]:
+        """Answers one API call; returns the status code and the JSON body."""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            in_flight = self.in_flight
+            fault = self.fault_rate and self._random.random() < self.fault_rate
+            if fault:
+                self.faults += 1
+            overloaded = self.capacity is not None and in_flight > self.capacity * OVERLOAD_FACTOR
+            if overloaded:
+                self.overloads += 1
+        try:
+            if overloaded:
+                # Shed right away, like a gateway in front of a saturated backend.
+                raise EmulatorError(503, "SERVICE_UNAVAILABLE", "Emulated overload")
+            latency = self.latency
+            if self.capacity is not None:
+                # The requests in flight share `capacity` workers.
+                latency *= max(1.0, in_flight / self.capacity)
+            if latency:
+                time.sleep(latency)
+            if fault:
+                raise EmulatorError(503, "SERVICE_UNAVAILABLE", "Emulated upstream failure")
+            if self._auth and headers.get("authorization") != self._auth:
+                raise EmulatorError(401, "UNAUTHORIZED", "Invalid shop credentials")
+            if body and headers.get("content-encoding") == "gzip":
+                try:
+                    body = gzip.decompress(body)
+                except (OSError, EOFError):
+                    raise EmulatorError(400, "001_VALIDATION_ERROR", "Request body is not valid gzip")
+            self._advance(time.monotonic())
+            status, payload = self._route(method.upper(), self._endpoint(path), query, body)
+        except EmulatorError as e:
+            status, payload = e.status_code, {"code": e.code, "message": e.message}
+        except Exception as e:
+            # A bug in the emulator (or a payload it does not expect) must not escape into the client.
+            with self._lock:
+                self.errors += 1
+            logger.error(f"Emulator failed on {method} {path}: {type(e).__name__}: {e}")
+            status, payload = 500, {"code": "INTERNAL_SERVER_ERROR", "message": f"Emulator error: {type(e).__name__}"}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return status, dumps(payload)
+
+    @staticmethod
+    def _endpoint(path: str) -> str:
+        _, marker, rest = path.partition("/payments/v2/")
+        return (rest if marker else path.lstrip("/")).rstrip("/")
+
+    def _route(self, method: str, endpoint: str, query: Mapping[str, str], body: bytes) -> Tuple[int, Any]:
+        parts = endpoint.split("/")
+        if method == "POST":
+            payload = self._parse(body)
+            if endpoint == "transactions":
+                return 200, self._create_transaction(payload)
+            if endpoint == "paywalls":
+                return 200, self._create_paywall(payload)
+            if endpoint == "payout":
+                return 200, self._create_payout(payload)
+        elif method == "GET":
+            if endpoint in ("transactions", "paywalls") and "trackingId" in query:
+                kind = KIND_TRANSACTION if endpoint == "transactions" else KIND_PAYWALL
+                return 200, self._get_by_tracking_id(kind, query["trackingId"])
+            if len(parts) == 2 and parts[0] == "transactions":
+                return 200, self._get(KIND_TRANSACTION, parts[1])
+            if len(parts) == 2 and parts[0] == "paywalls":
+                return 200, self._get(KIND_PAYWALL, parts[1])
+            if len(parts) == 2 and parts[0] == "payout":
+                return 200, self._get(KIND_PAYOUT, parts[1])
+            if endpoint == "paymentMethods":
+                return 200, self._payment_methods(query)
+            if endpoint == "shop-balance":
+                return 200, self.balances()
+            if parts[:3] == ["public", "transactions", "landing-info"] and len(parts) == 4:
+                return 200, self._landing_info(parts[3])
+        raise EmulatorError(404, "NOT_FOUND", f"No route for {method} {endpoint}")
+
+    @staticmethod
+    def _parse(body: bytes) -> Dict[str, Any]:
+        try:
+            payload = loads(body) if body else {}
+        except ValueError:
+            raise EmulatorError(400, "001_VALIDATION_ERROR", "Request body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise EmulatorError(400, "001_VALIDATION_ERROR", "Request body must be a JSON object")
+        return payload
+
+    @staticmethod
+    def _require(payload: Dict[str, Any], fields: Tuple[str, ...]):
+        missing = [field for field in fields if payload.get(field) in (None, "")]
+        if missing:
+            raise EmulatorError(400, "001_VALIDATION_ERROR", f"Missing required fields: {', '.join(missing)}")
+
+    @staticmethod
+    def _amount(value: Any) -> float:
+        try:
+            amount = float(value)
+        except (TypeError, ValueError):
+            raise EmulatorError(400, "INVALID_AMOUNT", f"Invalid amount '{value}'")
+        if amount <= 0:
+            raise EmulatorError(400, "INVALID_AMOUNT", f"Amount must be positive, got '{value}'")
+        return amount
+
+    @staticmethod
+    def _check_country_currency(country: str, currency: str):
+        if country not in CountryEnum.__members__:
+            raise EmulatorError(400, "TRANSACTION_INVALID_FIELD_COUNTRY", f"Invalid country '{country}'")
+        allowed = COUNTRY_CURRENCIES.get(country)
+        if currency not in CurrencyEnum.__members__ or (allowed and currency not in allowed):
+            raise EmulatorError(400, "TRANSACTION_INVALID_FIELD_CURRENCY", f"Currency '{currency}' is not available in {country}")
+
+    def _check_payment(self, payload: Dict[str, Any], tag: Optional[str]) -> Tuple[float, str, str, Dict[str, Any]]:
+        self._require(payload, ("amount", "currency", "trackingId", "notificationUrl", "customer"))
+        customer = payload["customer"]
+        if not isinstance(customer, dict) or not customer.get("email") or not customer.get("country"):
+            raise EmulatorError(400, "001_VALIDATION_ERROR", "customer.email and customer.country are required")
+        country, currency = customer["country"], payload["currency"]
+        self._check_country_currency(country, currency)
+        amount = self._amount(payload["amount"])
+        minimum, maximum = AMOUNT_LIMITS.get(currency, DEFAULT_LIMITS)
+        if amount < minimum:
+            raise EmulatorError(400, "TRANSACTION_MIN_AMOUNT", f"Minimum amount for {currency} is {minimum}")
+        if amount > maximum:
+            raise EmulatorError(400, "TRANSACTION_MAX_AMOUNT", f"Maximum amount for {currency} is {maximum}")
+        if tag is not None and tag not in self.payment_methods.get(country, ["ONLINE"]):
+            raise EmulatorError(400, "PAYMENT_METHOD_NOT_ALLOWED", f"Payment method '{tag}' is not allowed in {country}")
+        if customer.get("personalId"):
+            try:
+                validate_personal_id(country, customer["personalId"])
+            except ValidationError as e:
+                raise EmulatorError(400, "CUSTOMER_INVALID_ID", e.message)
+        return amount, country, currency, customer
+
+    def _create_transaction(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        tag = payload.get("paymentMethodTagName")
+        amount, country, currency, customer = self._check_payment(payload, tag)
+        incomplete = not (customer.get("firstName") and customer.get("lastName") and customer.get("personalId"))
+        record = {
+            "uid": uuid.uuid4().hex,
+            "trackingId": payload["trackingId"],
+            "status": "MISSING_INFO" if incomplete else "PENDING",
+            "amount": payload["amount"],
+            "currency": currency,
+            "country": country,
+            "description": payload.get("description"),
+            "paymentMethod": {"name": tag, "paymentMethodTag": tag} if tag else None,
+            "createdAt": time.time(),
+        }
+        return self._insert(KIND_TRANSACTION, record, amount, customer["email"], payload["notificationUrl"])
+
+    def _create_paywall(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        amount, country, currency, customer = self._check_payment(payload, None)
+        uid = uuid.uuid4().hex
+        record = {
+            "uid": uid,
+            "trackingId": payload["trackingId"],
+            "status": "PENDING",
+            "amount": payload["amount"],
+            "currency": currency,
+            "country": country,
+            "form": {"action": f"https://emulator.local/payments/v2/public/paywalls/landing/{uid}"},
+            "createdAt": time.time(),
+        }
+        return self._insert(KIND_PAYWALL, record, amount, customer["email"], payload["notificationUrl"])
+
+    def _insert(self, kind: str, record: Dict[str, Any], amount: float, email: str, notification_url: str) -> Dict[str, Any]:
+        with self._lock:
+            if self.customer_limit is not None:
+                count = self._customers.get(email, 0)
+                if count >= self.customer_limit:
+                    raise EmulatorError(400, "BLOCKED_BY_CUSTOMER_LIMIT_RULE", f"Customer '{email}' reached the transaction limit")
+                self._customers[email] = count + 1
+            record["_amount"] = amount
+            record["_notificationUrl"] = notification_url
+            self._records[(kind, record["uid"])] = record
+            self._tracking[(kind, record["trackingId"])] = record["uid"]
+            self._schedule(kind, record["uid"])
+            return self._public(record)
+
+    def _create_payout(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self._require(payload, ("amount", "currencyCode", "country", "bankName", "accountNumber",
+                                "beneficiaryFirstName", "beneficiaryLastName", "documentType", "documentNumber", "email"))
+        country, currency = payload["country"], payload["currencyCode"]
+        self._check_country_currency(country, currency)
+        amount = self._amount(payload["amount"])
+        reference = payload.get("externalReference") or uuid.uuid4().hex
+        with self._lock:
+            if (KIND_PAYOUT, reference) in self._records:
+                raise EmulatorError(400, "001_VALIDATION_ERROR", f"externalReference '{reference}' already exists")
+            available = self._balances.get(currency, 0.0)
+            if amount > available:
+                raise EmulatorError(400, "INSUFFICIENT_BALANCE", f"Available {currency} balance {available:.2f} is lower than {amount:.2f}")
+            self._balances[currency] = available - amount
+            self._pending[currency] = self._pending.get(currency, 0.0) + amount
+            record = {
+                "uid": uuid.uuid4().hex,
+                "externalReference": reference,
+                "status": "PENDING",
+                "amount": amount,
+                "currencyCode": currency,
+                "country": country,
+                "createdAt": time.time(),
+                "_amount": amount,
+                "_notificationUrl": payload.get("NotificationUrl"),
+            }
+            self._records[(KIND_PAYOUT, reference)] = record
+            self._schedule(KIND_PAYOUT, reference)
+            return self._public(record)
+
+    def _get(self, kind: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            record = self._records.get((kind, key))
+            if record is None:
+                raise EmulatorError(404, "NOT_FOUND", f"{kind} '{key}' not found")
+            return self._public(record)
+
+    def _get_by_tracking_id(self, kind: str, tracking_id: str) -> Dict[str, Any]:
+        uid = self._tracking.get((kind, tracking_id))
+        if uid is None:
+            raise EmulatorError(404, "NOT_FOUND", f"{kind} with trackingId '{tracking_id}' not found")
+        return self._get(kind, uid)
+
+    def _payment_methods(self, query: Mapping[str, str]) -> Dict[str, Any]:
+        countries = [query["country"]] if query.get("country") else list(self.payment_methods)
+        methods = []
+        for country in countries:
+            currencies = COUNTRY_CURRENCIES.get(country, ())
+            currency = query.get("currency") or (currencies[0] if currencies else None)
+            if currencies and currency not in currencies:
+                continue
+            for tag in self.payment_methods.get(country, ["ONLINE"]):
+                methods.append({"name": tag.replace("_", " ").title(), "paymentMethodTag": tag,
+                                "country": country, "currency": currency, "channel": query.get("channel") or "ONLINE"})
+        return {"list": methods}
+
+    def _landing_info(self, uid: str) -> Dict[str, Any]:
+        transaction = self._get(KIND_TRANSACTION, uid)
+        tag = (transaction.get("paymentMethod") or {}).get("paymentMethodTag")
+        if tag not in H2H_METHODS:
+            raise EmulatorError(404, "NOT_FOUND", f"Landing info is not available for '{tag}'")
+        if tag == "PIX":
+            return {"qr_code": f"00020126{uid}", "expires_in": 3600}
+        if tag == "BOLETO":
+            return {"pdf_link": f"https://emulator.local/boleto/{uid}.pdf", "barcode": uid}
+        return {"bank_account": {"bank": "Emulator Bank", "account": uid[:12], "reference": transaction["trackingId"]}}
+
+    def balances(self) -> Dict[str, Any]:
+        """Current balances, in the `shop-balance` response shape."""
+        with self._lock:
+            return {"list": [
+                {"currency": c, "available": round(self._balances[c], 2), "pending": round(self._pending.get(c, 0.0), 2)}
+                for c in sorted(self._balances)
+            ]}
+
+    @staticmethod
+    def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in record.items() if not k.startswith("_") and v is not None}
+
+    def _schedule(self, kind: str, key: str):
+        self._sequence += 1
+        heapq.heappush(self._heap, (time.monotonic() + self.settle_after, self._sequence, kind, key))
+
+    def _pick(self, weights: Dict[str, float]) -> str:
+        return self._random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _advance(self, now: float):
+        """Moves every item whose settle time has passed to its final status."""
+        notifications = []
+        with self._lock:
+            deliver = self.webhooks and bool(self._threads)
+            while self._heap and self._heap[0][0] <= now:
+                _, _, kind, key = heapq.heappop(self._heap)
+                record = self._records[(kind, key)]
+                if kind == KIND_PAYOUT:
+                    record["status"] = self._pick(self.payout_outcomes)
+                    self._pending[record["currencyCode"]] -= record["_amount"]
+                    if record["status"] != "APPROVED":
+                        self._balances[record["currencyCode"]] += record["_amount"]
+                elif record["status"] == "MISSING_INFO":
+                    record["status"] = "EXPIRED"
+                else:
+                    record["status"] = self._pick(self.outcomes)
+                    if record["status"] == "APPROVED":
+                        self._balances[record["currency"]] = self._balances.get(record["currency"], 0.0) + record["_amount"]
+                if deliver and record.get("_notificationUrl"):
+                    notifications.append((record["_notificationUrl"], self._public(record)))
+        for notification in notifications:
+            try:
+                self._webhook_queue.put_nowait(notification)
+            except queue.Full:
+                with self._lock:
+                    self.webhooks_dropped += 1
+
+    def _tick_loop(self):
+        while not self._stop.wait(0.05):
+            self._advance(time.monotonic())
+
+    def _webhook_loop(self):
+        with httpx.Client(timeout=5.0, transport=self._webhook_transport) as http:
+            while True:
+                item = self._webhook_queue.get()
+                if item is None:
+                    return
+                url, payload = item
+                try:
+                    http.post(url, content=dumps(payload), headers={"content-type": "application/json"}).raise_for_status()
+                    self.webhooks_sent += 1
+                except httpx.HTTPError as e:
+                    self.webhooks_failed += 1
+                    logger.debug(f"Emulator webhook to {url} failed: {e}")
+
+    def start(self):
+        """Starts settling items and delivering webhooks in the background."""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._tick_loop, name="payretailers-emulator-tick", daemon=True),
+            threading.Thread(target=self._webhook_loop, name="payretailers-emulator-webhooks", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stops the HTTP server and background threads; queued webhooks are delivered first."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._threads:
+            self._stop.set()
+            self._webhook_queue.put(None)
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def transport(self) -> httpx.MockTransport:
+        """In-process transport for `PayRetailersClient(transport=...)`; no sockets involved."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            status, body = self.handle(request.method, request.url.path, dict(request.url.params),
+                                       request.headers, request.content)
+            return httpx.Response(status, content=body, headers={"content-type": "application/json"})
+        return httpx.MockTransport(handler)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts a loopback HTTP server (and the background threads) and returns its base URL."""
+        handler = type("EmulatorHandler", (_EmulatorHandler,), {"emulator": self})
+        self._server = _EmulatorServer((host, port), handler)
+        threading.Thread(target=self._server.serve_forever, name="payretailers-emulator-server", daemon=True).start()
+        self.start()
+        return f"http://{host}:{self._server.server_address[1]}/payments/v2/"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses: Dict[str, Dict[str, int]] = {}
+            for (kind, _), record in self._records.items():
+                counts = statuses.setdefault(kind, {})
+                counts[record["status"]] = counts.get(record["status"], 0) + 1
+            return {
+                "requests": self.requests,
+                "faults": self.faults,
+                "overloads": self.overloads,
+                "webhooks_sent": self.webhooks_sent,
+                "webhooks_failed": self.webhooks_failed,
+                "webhooks_dropped": self.webhooks_dropped,
+                "errors": self.errors,
+                "statuses": statuses,
+            }
+
+
+class _EmulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    emulator: PayRetailersEmulator
+
+    def _serve(self):
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("content-length") or 0))
+        headers = {k.lower(): v for k, v in self.headers.items()}
+        status, payload = self.emulator.handle(self.command, url.path, dict(parse_qsl(url.query)), headers, body)
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = _serve
+
+    def log_message(self, format, *args):
+        pass
@@ -28,6 +28,11 @@ class PayoutCreationError(PayRetailersError):
     """Raised when payout cannot be created."""
     pass
 
+class LoadSheddedError(PayRetailersError):
+    """Raised when a request is rejected locally because its priority queue is full or its deadline passed."""
+    def __init__(self, message, code="LOAD_SHED", status_code=None):
+        super().__init__(message, code=code, status_code=status_code)
+
 class TransactionMinAmountError(ValidationError):
     """Raised when the transaction amount is below the minimum allowed."""
     def __init__(self, message, code="TRANSACTION_MIN_AMOUNT", status_code=None):
@@ -42,6 +47,7 @@ ERROR_CODE_MAP = {
     "CUSTOMER_INVALID_ID": ValidationError,
     "INVALID_AMOUNT": ValidationError,
     "PAYMENT_METHOD_NOT_ALLOWED": TransactionCreationError,
+    "INSUFFICIENT_BALANCE": PayoutCreationError,
     "TRANSACTION_MAX_AMOUNT": ValidationError,
     "TRANSACTION_MIN_AMOUNT": TransactionMinAmountError,
     "TRANSACTION_INVALID_FIELD_COUNTRY": ValidationError,
@@ -0,0 +1,230 @@
+import time
+import random
+import threading
+import httpx
+from typing import Optional, Dict, Any, List, Iterable
+from .logger import logger
+
+# Methods that may be resent to another endpoint after a failure that happened
+# once the request could have reached the server.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class _Endpoint:
+    __slots__ = ("url", "healthy", "latency", "failures", "selected", "failovers", "last_probe", "last_error")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.selected = 0
+        self.failovers = 0
+        self.last_probe: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class EndpointPool:
+    """
+    Spreads requests over several base URLs (gateway regions or a local proxy).
+
+    A background thread probes every endpoint each `probe_interval` seconds and
+    keeps an exponentially weighted average of the probe latency; request
+    latencies are not mixed in, since they depend on which calls each endpoint
+    happened to serve. An endpoint is marked unhealthy after `failure_threshold`
+    consecutive failed probes or requests (connection errors and 5xx responses)
+    and healthy again after a successful probe. Requests go to a healthy endpoint
+    picked at random, weighted by the inverse square of its latency, so the
+    fastest endpoint takes most of the traffic. Until the first probes complete,
+    and when every endpoint is unhealthy, the endpoints are tried in list order.
+
+    The pool may be shared by several clients. It probes with its own HTTPX
+    client, built from the headers and transport of the first client that
+    acquires it, and stops probing when the last client releases it.
+
+    Usage:
+        endpoints = EndpointPool([
+            "https://api.payretailers.com/payments/v2/",
+            "http://payretailers-proxy.internal:8080/payments/v2/",
+        ])
+        client = PayRetailersClient(..., endpoints=endpoints)
+        print(endpoints.stats())
+    """
+
+    def __init__(self,
+                 urls: Iterable[str],
+                 probe_interval: float = 5.0,
+                 probe_timeout: float = 2.0,
+                 probe_method: str = "HEAD",
+                 probe_path: str = "",
+                 failure_threshold: int = 2,
+                 smoothing: float = 0.3):
+        """
+        Args:
+            urls: Base URLs, in order of preference.
+            probe_interval: Seconds between probe rounds.
+            probe_timeout: Timeout of each probe, in seconds.
+            probe_method: HTTP method of the probe.
+            probe_path: Path probed, relative to each base URL. Any response below 500 counts as healthy.
+            failure_threshold: Consecutive failures before an endpoint is marked unhealthy.
+            smoothing: Weight of the newest probe in the latency average.
+        """
+        self.urls = [url if url.endswith("/") else f"{url}/" for url in urls]
+        if not self.urls:
+            raise ValueError("EndpointPool needs at least one base URL")
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.probe_method = probe_method
+        self.probe_path = probe_path
+        self.failure_threshold = failure_threshold
+        self.smoothing = smoothing
+        self._endpoints = {url: _Endpoint(url) for url in self.urls}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._http: Optional[httpx.Client] = None
+        # Serializes acquire/release, which start and stop the probe thread.
+        self._users_lock = threading.Lock()
+        self._users = 0
+        self.probes = 0
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def acquire(self, headers: Optional[Dict[str, str]] = None, transport: Optional[httpx.BaseTransport] = None):
+        """
+        Registers a client of the pool. The first one starts probing in the
+        background with an HTTPX client owned by the pool, built with `headers`
+        and `transport`.
+        """
+        with self._users_lock:
+            self._users += 1
+            if self._thread is not None:
+                return
+            self._http = httpx.Client(headers=headers, transport=transport)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._probe_loop, name="payretailers-endpoint-probe", daemon=True)
+            self._thread.start()
+
+    def release(self):
+        """Unregisters a client; probing stops when the last one leaves."""
+        with self._users_lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                self._stop_probing()
+
+    def _after_fork(self):
+        # The probe thread did not survive the fork, and the probe client's sockets belong to
+        # the parent; the clients rebuilt in the child acquire the pool again.
+        self._lock = threading.Lock()
+        self._users_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._http = None
+        self._users = 0
+
+    def _stop_probing(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    def close(self):
+        """Stops the probe thread and closes the probe client, whatever clients still use the pool."""
+        with self._users_lock:
+            self._users = 0
+            self._stop_probing()
+
+    def select(self, exclude: Iterable[str] = ()) -> str:
+        """Returns the base URL for the next request, skipping the URLs in `exclude`."""
+        with self._lock:
+            candidates = [self._endpoints[url] for url in self.urls if url not in exclude]
+            if not candidates:
+                candidates = [self._endpoints[url] for url in self.urls]
+            healthy = [e for e in candidates if e.healthy]
+            measured = [e for e in healthy if e.latency is not None]
+            if measured:
+                weights = [1.0 / max(e.latency, 1e-4) ** 2 for e in measured]
+                endpoint = self._random.choices(measured, weights)[0]
+            else:
+                endpoint = (healthy or candidates)[0]
+            endpoint.selected += 1
+            return endpoint.url
+
+    def record_success(self, url: str):
+        """Records a successful request to `url`."""
+        with self._lock:
+            endpoint = self._endpoints[url]
+            endpoint.failures = 0
+            if not endpoint.healthy:
+                endpoint.healthy = True
+                logger.info(f"Endpoint {url} is healthy again")
+
+    def record_failure(self, url: str, error: str, failover: bool = False):
+        """Records a failed request or probe to `url`; `failover` counts a request moved to another endpoint."""
+        with self._lock:
+            endpoint = self._endpoints[url]
+            endpoint.failures += 1
+            endpoint.last_error = error
+            if failover:
+                endpoint.failovers += 1
+            if endpoint.healthy and endpoint.failures >= self.failure_threshold:
+                endpoint.healthy = False
+                logger.warning(f"Endpoint {url} marked unhealthy after {endpoint.failures} consecutive failures: {error}")
+
+    def probe(self):
+        """Probes every endpoint once and updates its health and latency."""
+        http = self._http
+        if http is None:
+            return
+        for url in self.urls:
+            if self._stop.is_set():
+                return
+            started = time.perf_counter()
+            try:
+                response = http.request(self.probe_method, f"{url}{self.probe_path}", timeout=self.probe_timeout)
+                response.close()
+                error = f"HTTP {response.status_code}" if response.status_code >= 500 else None
+            except Exception as e:
+                if self._stop.is_set():
+                    # The probe client was closed under us; this says nothing about the endpoint.
+                    return
+                error = f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.probes += 1
+                endpoint = self._endpoints[url]
+                endpoint.last_probe = time.time()
+                if error is None:
+                    endpoint.latency = elapsed if endpoint.latency is None else (
+                        self.smoothing * elapsed + (1 - self.smoothing) * endpoint.latency)
+            if error is None:
+                self.record_success(url)
+            else:
+                self.record_failure(url, error)
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.probe_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints: List[Dict[str, Any]] = [
+                {
+                    "url": e.url,
+                    "healthy": e.healthy,
+                    "latency_ms": round(e.latency * 1000, 3) if e.latency is not None else None,
+                    "consecutive_failures": e.failures,
+                    "selected": e.selected,
+                    "failovers": e.failovers,
+                    "last_probe": e.last_probe,
+                    "last_error": e.last_error,
+                }
+                for e in self._endpoints.values()
+            ]
+            return {"probes": self.probes, "endpoints": endpoints}
@@ -0,0 +1,88 @@
+import threading
+from collections import deque
+from typing import Optional, Dict
+
+
+class HedgePolicy:
+    """
+    Controls hedged reads for idempotent GET requests.
+
+    After `delay` seconds without a response a second identical request is
+    sent and the first one to complete wins. When `delay` is None, the delay is
+    derived from the `percentile` of recently observed latencies (hedging stays
+    off until `min_samples` latencies have been recorded). The number of hedges
+    is capped at `max_hedge_ratio` of all hedgeable requests, and at most
+    `max_in_flight` hedges run at the same time.
+    """
+
+    def __init__(self,
+                 delay: Optional[float] = None,
+                 percentile: float = 0.95,
+                 max_hedge_ratio: float = 0.05,
+                 min_samples: int = 20,
+                 window: int = 1000,
+                 max_in_flight: int = 8):
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.delay = delay
+        self.percentile = percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.max_in_flight = max_in_flight
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.in_flight = 0
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def record_latency(self, seconds: float):
+        """Records the latency of a completed request."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Returns how long to wait before hedging, or None to not hedge."""
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+
+    def start_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire_hedge(self) -> bool:
+        """Reserves a hedge if it keeps the hedge rate and the hedges in flight under their caps."""
+        with self._lock:
+            if self.hedges + 1 > self.requests * self.max_hedge_ratio or self.in_flight >= self.max_in_flight:
+                return False
+            self.hedges += 1
+            self.in_flight += 1
+            return True
+
+    def release_hedge(self):
+        """Called when a reserved hedge request completes."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_hedge_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hedging counters."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+            }
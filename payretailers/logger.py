@@ -16,4 +16,21 @@ def setup_logger(name="payretailers", level=logging.INFO):
         logger.addHandler(handler)
     return logger
 
-logger = setup_logger()
+class ClientLogger(logging.LoggerAdapter):
+    """
+    Per-client view of the shared SDK logger.
+    Filters records below the client's own level, so clients configured with
+    different log levels never change the global logger's level.
+    """
+    def __init__(self, logger, level=logging.DEBUG):
+        super().__init__(logger, {})
+        self.level = level
+
+    def isEnabledFor(self, level):
+        return level >= self.level and self.logger.isEnabledFor(level)
+
+    def process(self, msg, kwargs):
+        return msg, kwargs
+
+# The shared logger lets everything through; each client filters with its own ClientLogger level.
+logger = setup_logger(level=logging.DEBUG)
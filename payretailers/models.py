@@ -1,8 +1,10 @@
-from typing import Optional, List, Dict, Any, Union
-from pydantic import BaseModel, Field, field_validator, model_validator
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Union, get_args
+from pydantic import BaseModel, Field, field_validator, field_serializer, model_validator
 from enum import Enum
-from .utils import validate_personal_id
+from .utils import validate_personal_id, validate_email
 from .exceptions import ValidationError
+from .amounts import format_amount, to_decimal
 
 class CountryEnum(str, Enum):
     AR = "AR"
@@ -73,6 +75,14 @@ class Customer(BaseModel):
     city: Optional[str] = None
     zip_code: Optional[str] = Field(None, alias="zip")
 
+    @field_validator('email')
+    def check_email(cls, v):
+        try:
+            validate_email(v)
+        except ValidationError as e:
+            raise ValueError(str(e))
+        return v
+
     @model_validator(mode='after')
     def validate_personal_id_match(self):
         country = self.country
@@ -97,6 +107,14 @@ class TransactionRequest(BaseModel):
     test_mode: bool = Field(False, alias="testMode")
     customer: Customer
 
+    @model_validator(mode='before')
+    @classmethod
+    def format_amount_for_currency(cls, data):
+        # Formats the amount with the currency's decimal places (e.g. 0.1 + 0.2 BRL -> "0.30").
+        if isinstance(data, dict) and data.get("amount") is not None and data.get("currency") is not None:
+            data = {**data, "amount": format_amount(data["amount"], data["currency"])}
+        return data
+
     @field_validator('amount', mode='before')
     def stringify_amount(cls, v):
         return str(v)
@@ -116,6 +134,14 @@ class PaywallRequest(BaseModel):
     test_mode: bool = Field(False, alias="testMode")
     customer: Customer
 
+    @model_validator(mode='before')
+    @classmethod
+    def format_amount_for_currency(cls, data):
+        # Formats the amount with the currency's decimal places (e.g. 0.1 + 0.2 BRL -> "0.30").
+        if isinstance(data, dict) and data.get("amount") is not None and data.get("currency") is not None:
+            data = {**data, "amount": format_amount(data["amount"], data["currency"])}
+        return data
+
     @field_validator('amount', mode='before')
     def stringify_amount(cls, v):
         return str(v)
@@ -124,7 +150,7 @@ class PaywallRequest(BaseModel):
         populate_by_name = True
 
 class PayoutRequest(BaseModel):
-    amount: float
+    amount: Decimal
     currency_code: CurrencyEnum = Field(..., alias="currencyCode")
     country: CountryEnum
     bank_name: str = Field(..., alias="bankName")
@@ -143,5 +169,81 @@ class PayoutRequest(BaseModel):
     recipient_pix_key: Optional[str] = Field(None, alias="recipientPixKey")
     test_mode: bool = Field(False, alias="testMode")
 
+    @field_validator('email')
+    def check_email(cls, v):
+        try:
+            validate_email(v)
+        except ValidationError as e:
+            raise ValueError(str(e))
+        return v
+
+    @model_validator(mode='before')
+    @classmethod
+    def quantize_amount(cls, data):
+        if isinstance(data, dict) and data.get("amount") is not None:
+            currency = data.get("currencyCode", data.get("currency_code"))
+            if currency is not None:
+                data = {**data, "amount": to_decimal(data["amount"], currency)}
+        return data
+
+    @field_serializer('amount', when_used='json')
+    def serialize_amount(self, v: Decimal):
+        # The payout API expects a JSON number. The amount is already quantized to at
+        # most 6 places, so the float's shortest repr is that exact decimal (10.50 -> 10.5).
+        return float(v)
+
     class Config:
         populate_by_name = True
+
+# Model -> [(alias, required, nested model, enum)], computed on first use.
+_PAYLOAD_FIELDS: Dict[type, List[tuple]] = {}
+
+def _payload_fields(model_cls) -> List[tuple]:
+    fields = _PAYLOAD_FIELDS.get(model_cls)
+    if fields is None:
+        fields = []
+        for name, field in model_cls.model_fields.items():
+            # Optional[X] is checked as X.
+            types = [t for t in get_args(field.annotation) or (field.annotation,) if isinstance(t, type)]
+            nested = next((t for t in types if issubclass(t, BaseModel)), None)
+            enum = next((t for t in types if issubclass(t, Enum)), None)
+            fields.append((field.alias or name, field.is_required(), nested, enum))
+        _PAYLOAD_FIELDS[model_cls] = fields
+    return fields
+
+class PreparedPayload(dict):
+    """
+    Alias-keyed request payload that was already validated when it was built
+    (see builders.TransactionRequestBuilder). The client sends it as-is instead
+    of building a model from it. It only runs the checks of `validation_errors`,
+    which match what the models reject: missing required fields, enum values,
+    emails and personal IDs.
+    """
+
+    def validation_errors(self, model_cls) -> List[str]:
+        """Returns one "alias: problem" message per invalid field of `model_cls`, nested aliases dotted."""
+        return _payload_errors(self, model_cls, "")
+
+def _payload_errors(payload: Dict[str, Any], model_cls, prefix: str) -> List[str]:
+    errors = []
+    for alias, required, nested, enum in _payload_fields(model_cls):
+        value = payload.get(alias)
+        if value is None:
+            if required:
+                errors.append(f"{prefix}{alias}: required")
+            continue
+        try:
+            if enum is not None:
+                enum(value)
+            elif alias == "email":
+                validate_email(value)
+            elif alias == "personalId" and payload.get("country"):
+                country = payload["country"]
+                validate_personal_id(getattr(country, "value", country), value)
+        except ValidationError as e:
+            errors.append(f"{prefix}{alias}: {e.message}")
+        except ValueError:
+            errors.append(f"{prefix}{alias}: '{value}' is not a valid {enum.__name__}")
+        if nested is not None and isinstance(value, dict):
+            errors.extend(_payload_errors(value, nested, f"{prefix}{alias}."))
+    return errors
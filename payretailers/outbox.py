@@ -0,0 +1,323 @@
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Dict, Any, Optional, List
+import pydantic
+from .logger import logger
+from .exceptions import PayRetailersError, APIConnectionError, LoadSheddedError
+from .models import TransactionRequest, PayoutRequest
+
+OUTBOX_FILE = "payretailers_outbox.db"
+
+# Outbox item states
+STATUS_PENDING = "PENDING"    # Recorded, not yet sent
+STATUS_SENDING = "SENDING"    # Handed to the API, outcome unknown until it returns
+STATUS_SENT = "SENT"          # Upstream accepted the request (response stored)
+STATUS_FAILED = "FAILED"      # Upstream or local validation rejected the request (error stored)
+
+KIND_PAYOUT = "payout"
+KIND_TRANSACTION = "transaction"
+
+
+class PayRetailersOutbox:
+    """
+    Durable local outbox for outbound payouts and transactions.
+
+    Requests are written to a SQLite (WAL) database before they are sent and
+    their outcome is written back afterwards, so a worker crash never loses
+    track of an item. A background dispatcher drains the outbox with bounded
+    concurrency, and `recover()` reconciles items whose outcome is unknown
+    (via `get_payout_details` / `get_transaction_by_tracking_id`) before
+    they are resent. Each dispatch cycle also reconciles items that have been
+    SENDING for more than `stale_after` seconds, so connection errors and
+    persistent 5xx responses are retried without a restart.
+    """
+
+    def __init__(self,
+                 client,
+                 path: str = OUTBOX_FILE,
+                 max_workers: int = 4,
+                 poll_interval: float = 1.0,
+                 stale_after: float = 60.0):
+        self._client = client
+        self.path = path
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " reference TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " response TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, created_at)")
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue_payout(self, request: Union[PayoutRequest, Dict[str, Any]]) -> str:
+        """
+        Durably records a payout for later dispatch and returns its outbox id.
+        An `external_reference` is generated when missing, since it is the key
+        used to reconcile the payout after a crash.
+        """
+        if isinstance(request, dict):
+            request = PayoutRequest(**request)
+        if not request.external_reference:
+            request = request.model_copy(update={"external_reference": uuid.uuid4().hex})
+        return self._insert(KIND_PAYOUT, request.external_reference, request.model_dump(by_alias=True, mode="json"))
+
+    def enqueue_transaction(self, request: Union[TransactionRequest, Dict[str, Any]]) -> str:
+        """Durably records a transaction for later dispatch and returns its outbox id."""
+        if isinstance(request, dict):
+            request = TransactionRequest(**request)
+        return self._insert(KIND_TRANSACTION, request.tracking_id, request.model_dump(by_alias=True, mode="json"))
+
+    def _insert(self, kind: str, reference: str, payload: Dict[str, Any]) -> str:
+        item_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (id, kind, reference, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (item_id, kind, reference, json.dumps(payload), STATUS_PENDING, now, now)
+            )
+        logger.debug(f"Outbox: recorded {kind} '{reference}' as {item_id}")
+        return item_id
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the stored state of an outbox item."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, reference, status, attempts, response, error, created_at, updated_at "
+                "FROM outbox WHERE id = ?", (item_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "reference": row[2],
+            "status": row[3],
+            "attempts": row[4],
+            "response": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Returns the number of items per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+    def _claim(self, limit: int) -> List[tuple]:
+        """Atomically moves up to `limit` PENDING items to SENDING."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, kind, reference, payload FROM outbox WHERE status = ? "
+                    "ORDER BY created_at LIMIT ?", (STATUS_PENDING, limit)
+                ).fetchall()
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(STATUS_SENDING, now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _finish(self, item_id: str, status: str, response: Optional[Dict] = None, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, response = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(response, default=str) if response is not None else None, error, time.time(), item_id)
+            )
+
+    def _touch(self, item_id: str):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET updated_at = ? WHERE id = ?", (time.time(), item_id))
+
+    def _send(self, row: tuple) -> Optional[str]:
+        """Sends one claimed item and returns its new status (None while the outcome is unknown)."""
+        item_id, kind, reference, payload = row
+        payload = json.loads(payload)
+        try:
+            if kind == KIND_PAYOUT:
+                response = self._client.create_payout(payload)
+            else:
+                response = self._client.create_transaction(payload)
+        except pydantic.ValidationError as e:
+            # Raised while building the request, before anything was sent.
+            logger.error(f"Outbox: {kind} '{reference}' is invalid: {e}")
+            self._finish(item_id, STATUS_FAILED, error=str(e))
+            return STATUS_FAILED
+        except LoadSheddedError as e:
+            # Shed locally, so it was never sent.
+            logger.info(f"Outbox: {kind} '{reference}' deferred: {e}")
+            self._finish(item_id, STATUS_PENDING)
+            return STATUS_PENDING
+        except APIConnectionError as e:
+            # The request may or may not have reached PayRetailers; leave it
+            # SENDING so recover() reconciles it before any resend.
+            logger.warning(f"Outbox: {kind} '{reference}' outcome unknown: {e}")
+            return None
+        except PayRetailersError as e:
+            if e.status_code is None or e.status_code >= 500:
+                # A 5xx that outlived the retries says nothing about whether the item was processed.
+                logger.warning(f"Outbox: {kind} '{reference}' outcome unknown: {e}")
+                return None
+            logger.error(f"Outbox: {kind} '{reference}' rejected: {e}")
+            self._finish(item_id, STATUS_FAILED, error=str(e))
+            return STATUS_FAILED
+        except Exception as e:
+            logger.error(f"Outbox: {kind} '{reference}' outcome unknown after unexpected error: {e!r}")
+            return None
+        self._finish(item_id, STATUS_SENT, response=response)
+        return STATUS_SENT
+
+    def dispatch_pending(self, limit: Optional[int] = None) -> int:
+        """
+        Reconciles stale SENDING items, then sends PENDING items with bounded
+        concurrency until the outbox is drained (or `limit` items were sent).
+        Returns the number of items dispatched.
+        """
+        self.recover(older_than=self.stale_after)
+        dispatched = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while limit is None or dispatched < limit:
+                batch = self.max_workers * 2
+                if limit is not None:
+                    batch = min(batch, limit - dispatched)
+                rows = self._claim(batch)
+                if not rows:
+                    break
+                statuses = list(executor.map(self._send, rows))
+                deferred = statuses.count(STATUS_PENDING)
+                dispatched += len(rows) - deferred
+                if deferred:
+                    # The client is shedding load; leave the rest for the next cycle.
+                    break
+        return dispatched
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if not self.dispatch_pending():
+                    self._stop_event.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Outbox dispatcher error: {e}")
+                self._stop_event.wait(self.poll_interval)
+
+    def start(self, recover: bool = True):
+        """Starts the background dispatcher, reconciling unknown outcomes first."""
+        if self._thread and self._thread.is_alive():
+            return
+        if recover:
+            self.recover()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="payretailers-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops the background dispatcher."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @staticmethod
+    def _is_upstream_item(kind: str, reference: str, upstream: Any) -> bool:
+        """
+        Whether a lookup answer describes the item itself: its reference must
+        match, or, when the answer omits it, it must at least carry a status.
+        """
+        if not isinstance(upstream, dict):
+            return False
+        field = "externalReference" if kind == KIND_PAYOUT else "trackingId"
+        if upstream.get(field) is not None:
+            return str(upstream[field]) == reference
+        return isinstance(upstream.get("status"), str)
+
+    def recover(self, older_than: Optional[float] = None) -> Dict[str, int]:
+        """
+        Reconciles items left in SENDING (e.g. after a crash) against the API.
+        Items found upstream are marked SENT; items PayRetailers has never seen
+        (404) are put back to PENDING for resend. Items that cannot be checked
+        right now, or whose lookup returns something that is not the item,
+        stay SENDING and are checked again `older_than` seconds later.
+
+        Args:
+            older_than: Only reconcile items that have been SENDING for at least
+                this many seconds; all of them when None.
+        """
+        cutoff = time.time() - older_than if older_than is not None else float("inf")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, reference FROM outbox WHERE status = ? AND updated_at <= ?", (STATUS_SENDING, cutoff)
+            ).fetchall()
+
+        result = {"sent": 0, "requeued": 0, "unknown": 0}
+        for item_id, kind, reference in rows:
+            try:
+                if kind == KIND_PAYOUT:
+                    upstream = self._client.get_payout_details(reference)
+                else:
+                    upstream = self._client.get_transaction_by_tracking_id(reference)
+            except PayRetailersError as e:
+                if e.status_code == 404:
+                    upstream = None
+                else:
+                    logger.warning(f"Outbox: could not reconcile {kind} '{reference}': {e}")
+                    self._touch(item_id)
+                    result["unknown"] += 1
+                    continue
+            except Exception as e:
+                logger.error(f"Outbox: could not reconcile {kind} '{reference}': {e!r}")
+                self._touch(item_id)
+                result["unknown"] += 1
+                continue
+
+            if upstream is None:
+                self._finish(item_id, STATUS_PENDING)
+                result["requeued"] += 1
+            elif self._is_upstream_item(kind, reference, upstream):
+                self._finish(item_id, STATUS_SENT, response=upstream)
+                result["sent"] += 1
+            else:
+                logger.warning(f"Outbox: lookup of {kind} '{reference}' did not return it: {upstream!r}")
+                self._touch(item_id)
+                result["unknown"] += 1
+
+        if rows:
+            logger.info(f"Outbox recovery: {result}")
+        return result
+
+    def close(self):
+        """Stops the dispatcher and closes the database."""
+        self.stop()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
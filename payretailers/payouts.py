@@ -0,0 +1,273 @@
+import time
+import uuid
+import heapq
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Union, Dict, Any, Optional, List, NamedTuple, Tuple
+from .logger import logger
+from .exceptions import PayRetailersError, APIConnectionError, LoadSheddedError
+from .models import PayoutRequest
+from .scheduling import Priority, request_priority
+
+RESULT_SENT = "SENT"
+RESULT_FAILED = "FAILED"
+RESULT_HELD = "HELD"
+RESULT_UNKNOWN = "UNKNOWN"  # Connection lost and the lookup failed too; the reservation is kept
+
+# Keys accepted when reading `get_shop_balance` entries.
+_BALANCE_CURRENCY_KEYS = ("currency", "currencyCode")
+_BALANCE_AMOUNT_KEYS = ("available", "availableBalance", "availableAmount", "balance", "amount")
+
+
+class PayoutResult(NamedTuple):
+    request: PayoutRequest
+    status: str
+    response: Optional[Dict[str, Any]] = None
+    error: Optional[Exception] = None
+
+
+def parse_balances(data: Any) -> Dict[str, Decimal]:
+    """Reads the available balance per currency from a `get_shop_balance` response."""
+    if isinstance(data, dict):
+        entries = data.get("list") or data.get("balances") or [data]
+    else:
+        entries = data or []
+    balances: Dict[str, Decimal] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        currency = next((entry[k] for k in _BALANCE_CURRENCY_KEYS if entry.get(k)), None)
+        amount = next((entry[k] for k in _BALANCE_AMOUNT_KEYS if entry.get(k) is not None), None)
+        if currency and amount is not None:
+            balances[str(currency).upper()] = Decimal(str(amount))
+    return balances
+
+
+class PayoutScheduler:
+    """
+    Submits payouts without overdrawing the shop balance.
+
+    Payouts are queued per `currency_code` and dispatched by priority (lower
+    first, then FIFO) with bounded concurrency. Each dispatch reserves its
+    amount against a balance snapshot taken from `get_shop_balance`; the
+    reservation is consumed on success and released on failure. Payouts that
+    do not fit in the remaining balance are held back (smaller ones behind them
+    may still go) and stay queued for the next run, instead of being sent to
+    fail upstream.
+
+    A payout whose request hit a connection error or a 5xx may still have been
+    created, so it is looked up by its external reference: found payouts count
+    as sent, unknown ones as failed. When the lookup fails too the result is
+    UNKNOWN and the reservation is kept until the next run looks the payout up
+    again. A payout shed locally (LoadSheddedError) was never sent; it goes back
+    to the queue and the run stops dispatching, leaving the rest HELD.
+
+    Usage:
+        scheduler = PayoutScheduler(client, max_workers=8)
+        for request in requests:
+            scheduler.submit(request, priority=0 if request.amount < 1000 else 1)
+        for result in scheduler.run():
+            print(result.request.external_reference, result.status)
+    """
+
+    def __init__(self,
+                 client,
+                 max_workers: int = 4,
+                 refresh_interval: float = 30.0,
+                 reserve: Optional[Dict[str, Union[int, float, str]]] = None):
+        """
+        Args:
+            client: PayRetailersClient used for `get_shop_balance`, `create_payout` and `get_payout_details`.
+            max_workers: Maximum concurrent `create_payout` calls.
+            refresh_interval: Seconds between balance refreshes during a run.
+            reserve: Amount per currency that is never paid out.
+        """
+        self._client = client
+        self.max_workers = max_workers
+        self.refresh_interval = refresh_interval
+        self.reserve = {k.upper(): Decimal(str(v)) for k, v in (reserve or {}).items()}
+        self._lock = threading.Lock()
+        # Per currency: a heap of (priority, sequence, amount, request) ready to go, and a heap of
+        # (amount, priority, sequence, request) held back because they did not fit, smallest first.
+        self._queues: Dict[str, List[Tuple[int, int, Decimal, PayoutRequest]]] = {}
+        self._held: Dict[str, List[Tuple[Decimal, int, int, PayoutRequest]]] = {}
+        self._sequence = 0
+        self.balances: Dict[str, Decimal] = {}
+        self.reserved: Dict[str, Decimal] = {}
+        # External reference -> (request, reserved amount, connection error) for UNKNOWN payouts.
+        self.unresolved: Dict[str, Tuple[PayoutRequest, Decimal, Exception]] = {}
+        self._refreshed_at = 0.0
+
+    def submit(self, request: Union[PayoutRequest, Dict[str, Any]], priority: int = 0) -> str:
+        """
+        Queues a payout and returns its external reference (generated when missing,
+        so the payout can be reconciled if the run is interrupted).
+        """
+        if isinstance(request, dict):
+            request = PayoutRequest(**request)
+        if not request.external_reference:
+            request = request.model_copy(update={"external_reference": uuid.uuid4().hex})
+        with self._lock:
+            self._sequence += 1
+            queue = self._queues.setdefault(request.currency_code.value, [])
+            heapq.heappush(queue, (priority, self._sequence, Decimal(str(request.amount)), request))
+        return request.external_reference
+
+    def pending(self) -> Dict[str, int]:
+        """Queued payouts per currency, held ones included."""
+        with self._lock:
+            counts = {currency: len(queue) for currency, queue in self._queues.items() if queue}
+            for currency, held in self._held.items():
+                if held:
+                    counts[currency] = counts.get(currency, 0) + len(held)
+            return counts
+
+    def refresh_balances(self):
+        """Replaces the balance snapshot with the current `get_shop_balance` values."""
+        with request_priority(Priority.BACKGROUND):
+            balances = parse_balances(self._client.get_shop_balance())
+        with self._lock:
+            self.balances = balances
+            self._refreshed_at = time.monotonic()
+
+    def _available(self, currency: str) -> Decimal:
+        return self.balances.get(currency, Decimal(0)) - self.reserved.get(currency, Decimal(0)) - self.reserve.get(currency, Decimal(0))
+
+    def _head(self, currency: str) -> Optional[Tuple[int, int, Decimal, PayoutRequest]]:
+        """Returns the most urgent payout of `currency` that fits its available balance, moving the ones that do not to held."""
+        queue = self._queues.setdefault(currency, [])
+        held = self._held.setdefault(currency, [])
+        available = self._available(currency)
+        # Balance freed since they were held back (released reservations, refreshes).
+        while held and held[0][0] <= available:
+            amount, priority, sequence, request = heapq.heappop(held)
+            heapq.heappush(queue, (priority, sequence, amount, request))
+        while queue and queue[0][2] > available:
+            priority, sequence, amount, request = heapq.heappop(queue)
+            heapq.heappush(held, (amount, priority, sequence, request))
+        return queue[0] if queue else None
+
+    def _take_next(self) -> Optional[Tuple[int, int, Decimal, PayoutRequest]]:
+        """Pops the most urgent payout that fits its currency's available balance and reserves it."""
+        best, best_currency = None, None
+        with self._lock:
+            for currency in list(self._queues):
+                head = self._head(currency)
+                if head is not None and (best is None or head[:2] < best[:2]):
+                    best, best_currency = head, currency
+            if best is None:
+                return None
+            entry = heapq.heappop(self._queues[best_currency])
+            self.reserved[best_currency] = self.reserved.get(best_currency, Decimal(0)) + entry[2]
+            return entry
+
+    def _requeue(self, entry: Tuple[int, int, Decimal, PayoutRequest]):
+        with self._lock:
+            heapq.heappush(self._queues.setdefault(entry[3].currency_code.value, []), entry)
+
+    def _settle(self, currency: str, amount: Decimal, paid: bool):
+        with self._lock:
+            self.reserved[currency] -= amount
+            if paid:
+                self.balances[currency] = self.balances.get(currency, Decimal(0)) - amount
+
+    def _lookup(self, request: PayoutRequest, error: Exception) -> PayoutResult:
+        """Checks whether a payout whose outcome was lost was created upstream."""
+        try:
+            with request_priority(Priority.BACKGROUND):
+                response = self._client.get_payout_details(request.external_reference)
+        except PayRetailersError as e:
+            if e.status_code == 404:
+                return PayoutResult(request, RESULT_FAILED, error=error)
+            logger.warning(f"Could not look up payout '{request.external_reference}' after a connection error, keeping its reservation: {e}")
+            return PayoutResult(request, RESULT_UNKNOWN, error=error)
+        return PayoutResult(request, RESULT_SENT, response=response)
+
+    def _send(self, request: PayoutRequest) -> PayoutResult:
+        try:
+            with request_priority(Priority.BACKGROUND):
+                return PayoutResult(request, RESULT_SENT, response=self._client.create_payout(request))
+        except APIConnectionError as e:
+            return self._lookup(request, e)
+        except LoadSheddedError as e:
+            # Shed before it was sent; run() puts it back in the queue.
+            return PayoutResult(request, RESULT_HELD, error=e)
+        except PayRetailersError as e:
+            if e.status_code is None or e.status_code >= 500:
+                # A 5xx that outlived the retries says nothing about whether the payout was created.
+                return self._lookup(request, e)
+            return PayoutResult(request, RESULT_FAILED, error=e)
+
+    def _resolve_unknown(self) -> List[PayoutResult]:
+        """Looks up the UNKNOWN payouts of previous runs; resolved ones give up their reservation."""
+        results = []
+        for reference, (request, amount, error) in list(self.unresolved.items()):
+            result = self._lookup(request, error)
+            if result.status == RESULT_UNKNOWN:
+                continue
+            # The refreshed balance already reflects a payout that was created.
+            del self.unresolved[reference]
+            self._settle(request.currency_code.value, amount, paid=False)
+            results.append(result)
+        return results
+
+    def run(self) -> List[PayoutResult]:
+        """
+        Dispatches every queued payout the balance allows and returns their results,
+        followed by a HELD result for each payout left in the queue. Payouts left
+        UNKNOWN by a previous run are looked up first and reported when resolved.
+        """
+        results: List[PayoutResult] = self._resolve_unknown()
+        self.refresh_balances()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+            shed = False
+            while True:
+                if time.monotonic() - self._refreshed_at > self.refresh_interval:
+                    # Dispatched payouts may already be debited upstream; their reservations
+                    # are kept until they return, which can only make the snapshot conservative.
+                    try:
+                        self.refresh_balances()
+                    except PayRetailersError as e:
+                        logger.warning(f"Could not refresh the shop balance, keeping the previous snapshot: {e}")
+                        self._refreshed_at = time.monotonic()
+                while not shed and len(in_flight) < self.max_workers:
+                    taken = self._take_next()
+                    if taken is None:
+                        break
+                    in_flight[executor.submit(self._send, taken[3])] = taken
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = in_flight.pop(future)
+                    amount, request = entry[2], entry[3]
+                    currency = request.currency_code.value
+                    result = PayoutResult(request, RESULT_FAILED)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = PayoutResult(request, RESULT_FAILED, error=e)
+                    finally:
+                        # Runs for unexpected errors too, so no reservation outlives its payout.
+                        if result.status == RESULT_UNKNOWN:
+                            self.unresolved[request.external_reference] = (request, amount, result.error)
+                        else:
+                            self._settle(currency, amount, paid=result.status == RESULT_SENT)
+                    if result.status == RESULT_HELD:
+                        logger.warning(f"Payout '{request.external_reference}' was shed, requeueing it and stopping the run: {result.error}")
+                        self._requeue(entry)
+                        shed = True
+                        continue
+                    if result.status == RESULT_FAILED:
+                        logger.warning(f"Payout '{request.external_reference}' failed, releasing {amount} {currency}: {result.error!r}")
+                    results.append(result)
+
+        with self._lock:
+            for currency in self._queues:
+                left = sorted(self._queues[currency] + [(p, s, a, r) for a, p, s, r in self._held.get(currency, [])])
+                if left:
+                    logger.warning(f"Holding back {len(left)} {currency} payouts: available balance {self._available(currency)}")
+                results.extend(PayoutResult(request, RESULT_HELD) for _, _, _, request in left)
+        return results
@@ -0,0 +1,127 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, NamedTuple, Callable, Any
+
+_active_profile: contextvars.ContextVar = contextvars.ContextVar("payretailers_profile", default=None)
+_NOOP = nullcontext()
+
+
+class PhaseTiming(NamedTuple):
+    name: str
+    start: float      # Seconds since the profile started
+    duration: float   # Seconds
+
+
+class CallProfile:
+    """Per-phase timings recorded while a `profile()` block is active."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.phases: List[PhaseTiming] = []
+
+    def record(self, name: str, started: float, ended: float):
+        self.phases.append(PhaseTiming(name, started - self.started, ended - started))
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    @property
+    def total(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self) -> Dict[str, float]:
+        """Total seconds spent per phase name."""
+        totals: Dict[str, float] = {}
+        for timing in self.phases:
+            totals[timing.name] = totals.get(timing.name, 0.0) + timing.duration
+        return totals
+
+    def http_trace(self, dispatch_started: float) -> Callable[[str, Dict[str, Any]], None]:
+        """
+        Returns an httpcore trace callback recording connection-level phases
+        (pool acquire, TCP connect, TLS, request send, response headers/body).
+        Pool acquire is measured from the dispatch until the first connection event.
+        """
+        pending: Dict[str, float] = {}
+        first_event = []
+
+        def trace(event_name: str, info: Dict[str, Any]):
+            now = time.perf_counter()
+            if not first_event:
+                first_event.append(now)
+                self.record("pool_acquire", dispatch_started, now)
+            base, _, stage = event_name.rpartition(".")
+            if stage == "started":
+                pending[base] = now
+            elif base in pending:
+                self.record("http." + base.split(".", 1)[-1], pending.pop(base), now)
+
+        return trace
+
+
+class ProfileAggregator:
+    """Aggregates phase timings (count, total, max) across many profiled calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, List[float]] = {}
+        self.calls = 0
+
+    def add(self, profile: CallProfile):
+        with self._lock:
+            self.calls += 1
+            for name, duration in list(profile.summary().items()) + [("total", profile.total)]:
+                stats = self._stats.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = max(stats[2], duration)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per phase: number of calls that hit it, total, mean and max seconds."""
+        with self._lock:
+            return {
+                name: {"count": count, "total": total, "mean": total / count, "max": maximum}
+                for name, (count, total, maximum) in self._stats.items()
+            }
+
+
+@contextmanager
+def profile(aggregator: Optional[ProfileAggregator] = None):
+    """
+    Records per-phase durations of every SDK call made inside the block
+    (in the current thread or asyncio task).
+
+    Usage:
+        with profile() as p:
+            client.create_transaction(request)
+        print(p.summary())  # {'model_build': ..., 'attempt': ..., 'json_decode': ..., ...}
+    """
+    call_profile = CallProfile()
+    token = _active_profile.set(call_profile)
+    try:
+        yield call_profile
+    finally:
+        _active_profile.reset(token)
+        call_profile.finished = time.perf_counter()
+        if aggregator is not None:
+            aggregator.add(call_profile)
+
+
+def active_profile() -> Optional[CallProfile]:
+    return _active_profile.get()
+
+
+def phase(name: str):
+    """Times the enclosed block as `name` when profiling is active; a no-op otherwise."""
+    call_profile = _active_profile.get()
+    if call_profile is None:
+        return _NOOP
+    return call_profile.phase(name)
@@ -0,0 +1,231 @@
+import json
+import time
+import sqlite3
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Dict, Any, Optional, Iterable, Iterator, NamedTuple, List, Tuple
+from .logger import logger
+from .exceptions import PayRetailersError
+from .models import PayoutRequest
+from .amounts import round_amount
+from .watcher import PENDING_STATUSES
+from .scheduling import Priority, request_priority
+
+LEDGER_FILE = "payretailers_ledger.db"
+
+MISMATCH_MISSING = "missing"
+MISMATCH_AMOUNT = "amount_mismatch"
+MISMATCH_CURRENCY = "currency_mismatch"
+MISMATCH_STUCK = "stuck"
+
+
+class Mismatch(NamedTuple):
+    kind: str
+    external_reference: str
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+
+
+class PayoutLedger:
+    """
+    Local SQLite ledger of submitted payouts and their latest upstream state.
+
+    The ledger is indexed on `external_reference`, upstream status and submission
+    date, so reconciliation only touches non-terminal rows and never loads the
+    whole table: rows are read in keyset-paginated batches and mismatches are
+    yielded as they are found. Amounts are stored as exact decimal strings and
+    compared at the currency's decimal places.
+    """
+
+    def __init__(self, path: str = LEDGER_FILE, pending_statuses: Iterable[str] = PENDING_STATUSES):
+        self.path = path
+        self.pending_statuses = frozenset(s.upper() for s in pending_statuses)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS payouts ("
+            " external_reference TEXT PRIMARY KEY,"
+            " amount TEXT NOT NULL,"
+            " currency TEXT NOT NULL,"
+            " country TEXT NOT NULL,"
+            " submitted_at REAL NOT NULL,"
+            " status TEXT,"
+            " terminal INTEGER NOT NULL DEFAULT 0,"
+            " upstream_amount TEXT,"
+            " upstream_currency TEXT,"
+            " checked_at REAL,"
+            " upstream TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS payouts_open ON payouts (terminal, external_reference)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS payouts_status ON payouts (status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS payouts_submitted ON payouts (submitted_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _row(request: Union[PayoutRequest, Dict[str, Any]], submitted_at: Optional[float]) -> Tuple:
+        if isinstance(request, dict):
+            request = PayoutRequest(**request)
+        if not request.external_reference:
+            raise ValueError("Payouts need an external_reference to be reconciled")
+        return (
+            request.external_reference,
+            f"{request.amount:f}",
+            request.currency_code.value,
+            request.country.value,
+            submitted_at or time.time(),
+        )
+
+    def record(self, request: Union[PayoutRequest, Dict[str, Any]], submitted_at: Optional[float] = None):
+        """Records a submitted payout (idempotent on external_reference)."""
+        self.record_many([request], submitted_at=submitted_at)
+
+    def record_many(self, requests: Iterable[Union[PayoutRequest, Dict[str, Any]]], submitted_at: Optional[float] = None, batch_size: int = 5000) -> int:
+        """Records submitted payouts in batches; returns the number of rows written."""
+        written = 0
+        batch: List[Tuple] = []
+        for request in requests:
+            batch.append(self._row(request, submitted_at))
+            if len(batch) >= batch_size:
+                written += self._insert(batch)
+                batch = []
+        if batch:
+            written += self._insert(batch)
+        return written
+
+    def _insert(self, rows: List[Tuple]) -> int:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO payouts (external_reference, amount, currency, country, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(external_reference) DO UPDATE SET "
+                "amount = excluded.amount, currency = excluded.currency, country = excluded.country",
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def get(self, external_reference: str) -> Optional[Dict[str, Any]]:
+        """Returns the ledger row for a payout."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT external_reference, amount, currency, country, submitted_at, status, terminal, "
+                "upstream_amount, upstream_currency, checked_at FROM payouts WHERE external_reference = ?",
+                (external_reference,)
+            )
+            row = cursor.fetchone()
+            columns = [c[0] for c in cursor.description]
+        if not row:
+            return None
+        result = dict(zip(columns, row))
+        result["amount"] = Decimal(result["amount"])
+        return result
+
+    def counts(self) -> Dict[str, int]:
+        """Number of payouts per upstream status (None = never checked)."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM payouts GROUP BY status").fetchall())
+
+    def _open_batches(self, batch_size: int) -> Iterator[List[Tuple]]:
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT external_reference, amount, currency, submitted_at FROM payouts "
+                    "WHERE terminal = 0 AND external_reference > ? ORDER BY external_reference LIMIT ?",
+                    (last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last = rows[-1][0]
+
+    @staticmethod
+    def _fetch(client, external_reference: str) -> Optional[Dict[str, Any]]:
+        try:
+            with request_priority(Priority.BACKGROUND):
+                return client.get_payout_details(external_reference)
+        except PayRetailersError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def reconcile(self,
+                  client,
+                  batch_size: int = 500,
+                  max_workers: int = 8,
+                  stuck_after: float = 86400.0) -> Iterator[Mismatch]:
+        """
+        Refreshes every non-terminal payout from `get_payout_details` and yields
+        mismatches as they are found: payouts unknown upstream, amount or currency
+        differences, and payouts still pending `stuck_after` seconds after submission.
+        Payouts that reach a final status are not checked again. The updates of a
+        batch are saved even when the caller stops iterating partway through it.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for rows in self._open_batches(batch_size):
+                futures = [executor.submit(self._fetch, client, row[0]) for row in rows]
+                updates = []
+                now = time.time()
+                try:
+                    for (reference, amount, currency, submitted_at), future in zip(rows, futures):
+                        try:
+                            upstream = future.result()
+                        except PayRetailersError as e:
+                            logger.warning(f"Reconciliation: could not fetch payout '{reference}': {e}")
+                            continue
+
+                        if upstream is None:
+                            yield Mismatch(MISMATCH_MISSING, reference)
+                            if now - submitted_at > stuck_after:
+                                yield Mismatch(MISMATCH_STUCK, reference, actual="MISSING")
+                            continue
+
+                        status = str(upstream.get("status") or "").upper() or None
+                        upstream_amount = upstream.get("amount")
+                        upstream_currency = upstream.get("currencyCode") or upstream.get("currency")
+                        terminal = bool(status) and status not in self.pending_statuses
+                        updates.append((
+                            status,
+                            int(terminal),
+                            str(upstream_amount) if upstream_amount is not None else None,
+                            upstream_currency,
+                            now,
+                            json.dumps(upstream, default=str),
+                            reference,
+                        ))
+
+                        if upstream_amount is not None and not self._same_amount(amount, upstream_amount, currency):
+                            yield Mismatch(MISMATCH_AMOUNT, reference, expected=str(amount), actual=str(upstream_amount))
+                        if upstream_currency and str(upstream_currency).upper() != currency:
+                            yield Mismatch(MISMATCH_CURRENCY, reference, expected=currency, actual=upstream_currency)
+                        if not terminal and now - submitted_at > stuck_after:
+                            yield Mismatch(MISMATCH_STUCK, reference, actual=status)
+                finally:
+                    with self._lock:
+                        self._conn.executemany(
+                            "UPDATE payouts SET status = ?, terminal = ?, upstream_amount = ?, upstream_currency = ?, "
+                            "checked_at = ?, upstream = ? WHERE external_reference = ?",
+                            updates
+                        )
+                        self._conn.commit()
+
+    @staticmethod
+    def _same_amount(amount: Any, upstream_amount: Any, currency: str) -> bool:
+        """Compares the ledger and upstream amounts at the currency's decimal places; unparseable upstream amounts differ."""
+        try:
+            return round_amount(upstream_amount, currency) == round_amount(amount, currency)
+        except ValueError:
+            logger.warning(f"Reconciliation: unreadable amount {upstream_amount!r} for {currency}")
+            return False
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,156 @@
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Any, Optional
+from .exceptions import LoadSheddedError
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("payretailers_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """
+    Runs the enclosed SDK calls with the given priority class.
+
+    Usage:
+        with request_priority(Priority.BACKGROUND):
+            client.get_transaction(uid)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class PriorityScheduler:
+    """
+    Priority-aware admission control in front of outbound requests.
+
+    At most `max_concurrency` requests are in flight; `reserved_interactive` of
+    those slots can only be used by INTERACTIVE requests, so a large background
+    sweep can never take the whole pool. Waiting requests are served by
+    priority, then FIFO. A request is shed with LoadSheddedError when its class
+    queue is already at its limit, or when it waited longer than its class
+    deadline.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 16,
+                 reserved_interactive: int = 4,
+                 queue_limits: Optional[Dict[Priority, int]] = None,
+                 deadlines: Optional[Dict[Priority, float]] = None):
+        if not 0 <= reserved_interactive < max_concurrency:
+            raise ValueError("reserved_interactive must be lower than max_concurrency")
+        self.max_concurrency = max_concurrency
+        self.reserved_interactive = reserved_interactive
+        self.queue_limits = {Priority.INTERACTIVE: 256, Priority.BACKGROUND: 10000}
+        self.queue_limits.update(queue_limits or {})
+        self.deadlines = {Priority.INTERACTIVE: 5.0, Priority.BACKGROUND: 300.0}
+        self.deadlines.update(deadlines or {})
+        self._lock = threading.Lock()
+        self._queues = {priority: deque() for priority in Priority}
+        self._in_flight = 0
+        self.admitted = {priority: 0 for priority in Priority}
+        self.shed = {priority: 0 for priority in Priority}
+
+    def _after_fork(self):
+        # Slots and waiters at fork time belong to the parent's threads.
+        self._lock = threading.Lock()
+        self._queues = {priority: deque() for priority in Priority}
+        self._in_flight = 0
+
+    def _capacity(self, priority: Priority) -> int:
+        if priority == Priority.INTERACTIVE:
+            return self.max_concurrency
+        return self.max_concurrency - self.reserved_interactive
+
+    def _can_start(self, priority: Priority) -> bool:
+        if self._in_flight >= self._capacity(priority):
+            return False
+        # Never overtake a waiting request of the same or a higher priority.
+        return not any(self._queues[p] for p in Priority if p <= priority)
+
+    def acquire(self, priority: Optional[Priority] = None) -> Priority:
+        """
+        Waits for a slot for the given (or current context) priority and returns it.
+        Raises LoadSheddedError when the request is shed.
+        """
+        priority = current_priority() if priority is None else priority
+        with self._lock:
+            if self._can_start(priority):
+                self._in_flight += 1
+                self.admitted[priority] += 1
+                return priority
+            queue = self._queues[priority]
+            if len(queue) >= self.queue_limits[priority]:
+                self.shed[priority] += 1
+                raise LoadSheddedError(f"{priority.name} queue is full ({len(queue)} waiting)")
+            waiter = _Waiter()
+            queue.append(waiter)
+
+        deadline = self.deadlines[priority]
+        if not waiter.event.wait(deadline):
+            with self._lock:
+                if not waiter.granted:
+                    self._queues[priority].remove(waiter)
+                    self.shed[priority] += 1
+                    raise LoadSheddedError(f"{priority.name} request waited more than {deadline}s for a slot")
+        return priority
+
+    def release(self):
+        """Frees a slot and hands it to the next eligible waiter."""
+        with self._lock:
+            self._in_flight -= 1
+            for priority in Priority:
+                queue = self._queues[priority]
+                if queue and self._in_flight < self._capacity(priority):
+                    waiter = queue.popleft()
+                    waiter.granted = True
+                    self._in_flight += 1
+                    self.admitted[priority] += 1
+                    waiter.event.set()
+                    return
+                if queue:
+                    # Lower priorities must not overtake a waiting higher priority.
+                    return
+
+    @contextmanager
+    def slot(self, priority: Optional[Priority] = None):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns in-flight requests plus queued/admitted/shed counters per priority class."""
+        with self._lock:
+            stats: Dict[str, Any] = {"in_flight": self._in_flight}
+            for priority in Priority:
+                stats[priority.name.lower()] = {
+                    "queued": len(self._queues[priority]),
+                    "admitted": self.admitted[priority],
+                    "shed": self.shed[priority],
+                }
+            return stats
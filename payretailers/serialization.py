@@ -0,0 +1,154 @@
+import gzip
+import json
+import codecs
+import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speed-up
+    orjson = None
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decodes a JSON document straight from the raw response bytes.
+    Uses orjson when installed, falling back to the standard library.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _default(obj: Any) -> Any:
+    """Encodes the types JSON has no literal for the way orjson does, falling back to `str`."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encodes a payload as compact JSON bytes (no whitespace between separators).
+    Uses orjson when installed, falling back to the standard library; both
+    backends produce the same output for dates, enums, non-string keys and
+    other types (e.g. Decimal), which are encoded with `str`.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def encode_body(payload: Any, compress: bool = False, min_size: int = 1024) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serializes a request payload, gzip-compressing it when `compress` is set and
+    the body is at least `min_size` bytes. Returns the body and the extra headers
+    to send with it.
+    """
+    body = dumps(payload)
+    if compress and len(body) >= min_size:
+        return gzip.compress(body, compresslevel=5), {"content-encoding": "gzip"}
+    return body, {}
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str = "list") -> Iterator[Any]:
+    """
+    Incrementally decodes the items of the array stored under `key` in a
+    top-level JSON object, yielding each item as soon as it is complete.
+
+    Only the item currently being decoded is held in memory, so list-shaped
+    endpoints (e.g. paymentMethods) can be consumed without materializing the
+    whole document.
+
+    Args:
+        chunks: An iterable of raw byte chunks (e.g. `response.iter_bytes()`).
+        key: The object key holding the array.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunk_iter = iter(chunks)
+    buffer = ""
+    exhausted = False
+
+    def _fill() -> bool:
+        nonlocal buffer, exhausted
+        for chunk in chunk_iter:
+            text = utf8.decode(chunk)
+            if text:
+                buffer += text
+                return True
+        buffer += utf8.decode(b"", final=True)
+        exhausted = True
+        return False
+
+    def _skip(pos: int, chars: str = _WHITESPACE) -> int:
+        """Skips `chars` from `pos`, reading more chunks as needed; returns -1 at the end of the document."""
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer):
+                return pos
+            if not _fill():
+                return -1
+
+    def _decode(pos: int) -> Tuple[Any, int]:
+        """Decodes the complete value starting at `pos`, reading more chunks as needed."""
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not _fill():
+                    raise
+                continue
+            # A number cut by a chunk boundary ("1500." of "1500.0") decodes too
+            # early; only trust a value followed by a delimiter or the end of input.
+            if (end >= len(buffer) or buffer[end] not in _DELIMITERS) and _fill():
+                continue
+            return value, end
+
+    # Walk the members of the top-level object until `key`, so nested keys or
+    # string values that look like it never match.
+    pos = _skip(0)
+    if pos < 0 or buffer[pos] != "{":
+        return
+    pos += 1
+    while True:
+        pos = _skip(pos, _WHITESPACE + ",")
+        if pos < 0 or buffer[pos] == "}":
+            return
+        name, pos = _decode(pos)
+        pos = _skip(pos)
+        if pos < 0 or buffer[pos] != ":":
+            raise ValueError("Malformed JSON object")
+        pos = _skip(pos + 1)
+        if pos < 0:
+            raise ValueError("Malformed JSON object")
+        if name == key:
+            if buffer[pos] != "[":
+                return
+            buffer = buffer[pos + 1:]
+            break
+        # Other members are decoded one at a time and discarded.
+        _, pos = _decode(pos)
+        buffer = buffer[pos:]
+        pos = 0
+
+    pos = 0
+    while True:
+        pos = _skip(pos, _WHITESPACE + ",")
+        if pos < 0:
+            raise ValueError(f"Unterminated JSON array under key '{key}'")
+        if buffer[pos] == "]":
+            return
+        item, pos = _decode(pos)
+        yield item
+        buffer = buffer[pos:]
+        pos = 0
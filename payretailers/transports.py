@@ -0,0 +1,178 @@
+import gzip
+import json
+import time
+import base64
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Iterable, Tuple
+import httpx
+from .logger import logger
+
+# Request headers are never written to a cassette; these body fields are masked.
+REDACTED_FIELDS = frozenset({
+    "personalId",
+    "documentNumber",
+    "accountNumber",
+    "recipientPixKey",
+    "beneficiaryFirstName",
+    "beneficiaryLastName",
+    "email",
+    "phone",
+})
+REDACTED_VALUE = "***"
+
+
+def _redact(value: Any, fields: frozenset) -> Any:
+    if isinstance(value, dict):
+        return {k: (REDACTED_VALUE if k in fields and v is not None else _redact(v, fields)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v, fields) for v in value]
+    return value
+
+
+def _redact_body(body: bytes, fields: frozenset) -> Optional[str]:
+    """Redacts a JSON body; other text is returned as-is. Raises UnicodeDecodeError for binary bodies."""
+    if not body:
+        return None
+    text = body.decode("utf-8")
+    try:
+        return json.dumps(_redact(json.loads(text), fields), separators=(",", ":"))
+    except ValueError:
+        # Not JSON: store it as text without failing the request.
+        return text
+
+
+def _request_body(request: httpx.Request) -> bytes:
+    if request.headers.get("content-encoding") == "gzip":
+        return gzip.decompress(request.content)
+    return request.content
+
+
+def _request_key(request: httpx.Request) -> str:
+    return f"{request.method} {request.url.raw_path.decode('ascii')}"
+
+
+def _open_cassette(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """
+    Transport that forwards requests to a real transport and appends each
+    request/response pair to a JSON Lines cassette (gzip-compressed when the path
+    ends with `.gz`). Request headers are never stored and sensitive body fields
+    are masked.
+
+    Usage:
+        client = PayRetailersClient(..., transport=RecordingTransport("traffic.jsonl.gz"))
+    """
+
+    def __init__(self,
+                 path: str,
+                 transport: Optional[httpx.BaseTransport] = None,
+                 redact_fields: Iterable[str] = REDACTED_FIELDS):
+        self.path = path
+        self._transport = transport or httpx.HTTPTransport()
+        self._redact_fields = frozenset(redact_fields)
+        self._lock = threading.Lock()
+        self._file = _open_cassette(path, "a")
+        self.recorded = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        response = self._transport.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        elapsed = time.monotonic() - started
+
+        record = {
+            "key": _request_key(request),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type"),
+            "elapsed": round(elapsed, 6),
+        }
+        request_body = _request_body(request)
+        try:
+            record["request"] = _redact_body(request_body, self._redact_fields)
+        except UnicodeDecodeError:
+            record["request_b64"] = base64.b64encode(request_body).decode()
+        try:
+            record["body"] = _redact_body(content, self._redact_fields) if content else ""
+        except UnicodeDecodeError:
+            # Binary bodies (e.g. boleto PDFs) are stored exactly, so replays return the same bytes.
+            record["body_b64"] = base64.b64encode(content).decode()
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.recorded += 1
+
+        headers = {"content-type": response.headers["content-type"]} if "content-type" in response.headers else {}
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self._transport.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """
+    Transport that serves responses from a cassette written by RecordingTransport,
+    without any network access.
+
+    Responses are matched on method and path (including query string); when a
+    key was recorded several times the responses are served in order, cycling
+    back to the first so replays can run at any volume. Recorded latencies are
+    reproduced multiplied by `latency_scale` (0 disables delays).
+    Unknown requests get a 404 with a `REPLAY_NOT_FOUND` error code.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._responses: Dict[str, deque] = {}
+        with _open_cassette(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "body_b64" in record:
+                    body = base64.b64decode(record["body_b64"])
+                else:
+                    body = (record.get("body") or "").encode("utf-8")
+                entry = (record["status"], record.get("content_type"), body, record.get("elapsed", 0.0))
+                self._responses.setdefault(record["key"], deque()).append(entry)
+        self.served = 0
+        self.misses = 0
+        logger.debug(f"Loaded {sum(len(v) for v in self._responses.values())} recorded responses from {path}")
+
+    def _next(self, key: str) -> Optional[Tuple[int, Optional[str], bytes, float]]:
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                self.misses += 1
+                return None
+            entry = entries[0]
+            entries.rotate(-1)
+            self.served += 1
+            return entry
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self._next(_request_key(request))
+        if entry is None:
+            return httpx.Response(
+                404,
+                json={"code": "REPLAY_NOT_FOUND", "message": f"No recorded response for {_request_key(request)}"},
+                request=request
+            )
+        status, content_type, body, elapsed = entry
+        if self.latency_scale and elapsed:
+            time.sleep(elapsed * self.latency_scale)
+        headers = {"content-type": content_type} if content_type else {}
+        return httpx.Response(status, headers=headers, content=body, request=request)
@@ -15,6 +15,11 @@ PERSONAL_ID_REGEX = {
     "GT": r"(^\d{4}\s?\d{5}\s?\d{4}$)|(^\d{4}-?\d{5}-?\d{4}$)"
 }
 
+_COMPILED_PERSONAL_ID_REGEX = {country: re.compile(regex) for country, regex in PERSONAL_ID_REGEX.items()}
+
+# Deliberately loose: one "@", no whitespace and a dot in the domain.
+_EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
 def validate_personal_id(country_code: str, personal_id: str) -> bool:
     """
     Validates a personal ID against the country's regex pattern.
@@ -27,14 +32,26 @@ def validate_personal_id(country_code: str, personal_id: str) -> bool:
         True if valid or if no regex is defined for the country.
         Raises ValidationError if invalid.
     """
-    regex = PERSONAL_ID_REGEX.get(country_code.upper())
-    if not regex:
+    pattern = _COMPILED_PERSONAL_ID_REGEX.get(country_code.upper())
+    if not pattern:
         return True # No specific validation for this country defined yet
 
-    if not re.match(regex, personal_id):
+    if not pattern.match(personal_id):
+         regex = pattern.pattern
          raise ValidationError(f"Invalid Personal ID '{personal_id}' for country '{country_code}'. Expected format regex: {regex}")
     return True
 
+def validate_email(email: str) -> bool:
+    """
+    Validates the shape of an email address.
+
+    Returns:
+        True if valid. Raises ValidationError if invalid.
+    """
+    if not isinstance(email, str) or not _EMAIL_REGEX.match(email):
+        raise ValidationError(f"Invalid email '{email}'")
+    return True
+
 def normalize_country_code(country: str) -> str:
     """Normalizes country code to uppercase."""
     return country.strip().upper() if country else country
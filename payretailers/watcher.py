@@ -0,0 +1,266 @@
+import heapq
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, Iterable, Tuple, List
+from .logger import logger
+from .scheduling import Priority, request_priority
+
+KIND_TRANSACTION = "transaction"
+KIND_PAYWALL = "paywall"
+KIND_PAYOUT = "payout"
+
+# Statuses that keep an item under watch; anything else is considered final.
+PENDING_STATUSES = frozenset({"PENDING", "MISSING_INFO"})
+
+StatusCallback = Callable[[str, str, Optional[str], str, Dict[str, Any]], None]
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting calls to `rate` per second."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _WatchedItem:
+    __slots__ = ("kind", "key", "status", "interval", "due", "future", "polling")
+
+    def __init__(self, kind: str, key: str, interval: float, due: float):
+        self.kind = kind
+        self.key = key
+        self.status = None
+        self.interval = interval
+        self.due = due
+        self.future = Future()
+        self.polling = False
+
+
+class StatusWatcher:
+    """
+    Tracks many in-flight transactions, paywalls and payouts and polls them
+    until they leave a pending status, replacing ad-hoc polling loops.
+
+    Polls are scheduled on a heap with per-item exponential backoff and are
+    executed through the client's connection pool by a bounded worker pool,
+    under a global rate limit. Status changes are emitted to callbacks
+    registered with `on_change`, and each `watch()` returns a Future resolved
+    with the final response. Webhook notifications passed to `notify()` resolve
+    items without waiting for their next poll.
+    """
+
+    def __init__(self,
+                 client,
+                 max_workers: int = 8,
+                 rate_limit: float = 20.0,
+                 initial_interval: float = 5.0,
+                 max_interval: float = 300.0,
+                 backoff: float = 1.5,
+                 pending_statuses: Iterable[str] = PENDING_STATUSES):
+        self._client = client
+        self.max_workers = max_workers
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.pending_statuses = frozenset(s.upper() for s in pending_statuses)
+        self._limiter = TokenBucket(rate_limit)
+        self._fetchers = {
+            KIND_TRANSACTION: client.get_transaction,
+            KIND_PAYWALL: client.get_paywall_by_uid,
+            KIND_PAYOUT: client.get_payout_details,
+        }
+        self._items: Dict[Tuple[str, str], _WatchedItem] = {}
+        self._heap: List[Tuple[float, str, str]] = []
+        self._callbacks: List[StatusCallback] = []
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.polls = 0
+        self.webhook_resolutions = 0
+
+    def on_change(self, callback: StatusCallback):
+        """
+        Registers a callback invoked as `callback(kind, key, old_status, new_status, response)`
+        whenever a watched item's status changes.
+        """
+        self._callbacks.append(callback)
+
+    def watch(self, kind: str, key: str, delay: Optional[float] = None) -> Future:
+        """
+        Starts watching an item and returns a Future resolved with its final response.
+
+        Args:
+            kind: "transaction", "paywall" or "payout".
+            key: The transaction/paywall UID or the payout external reference.
+            delay: Seconds before the first poll (defaults to `initial_interval`).
+        """
+        if kind not in self._fetchers:
+            raise ValueError(f"Invalid kind '{kind}'. Expected one of: {', '.join(self._fetchers)}")
+        with self._cond:
+            existing = self._items.get((kind, key))
+            if existing:
+                return existing.future
+            due = time.monotonic() + (self.initial_interval if delay is None else delay)
+            item = _WatchedItem(kind, key, self.initial_interval, due)
+            self._items[(kind, key)] = item
+            heapq.heappush(self._heap, (due, kind, key))
+            self._cond.notify()
+        return item.future
+
+    def watch_transaction(self, uid: str) -> Future:
+        return self.watch(KIND_TRANSACTION, uid)
+
+    def watch_paywall(self, uid: str) -> Future:
+        return self.watch(KIND_PAYWALL, uid)
+
+    def watch_payout(self, external_reference: str) -> Future:
+        return self.watch(KIND_PAYOUT, external_reference)
+
+    def unwatch(self, kind: str, key: str) -> bool:
+        """Stops watching an item; its Future is cancelled."""
+        with self._cond:
+            item = self._items.pop((kind, key), None)
+        if item is None:
+            return False
+        item.future.cancel()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def notify(self, kind: str, key: str, payload: Dict[str, Any]):
+        """
+        Feeds a webhook notification for an item. A final status resolves the item
+        immediately, skipping any further polling.
+        """
+        self._apply(kind, key, payload, from_webhook=True)
+
+    def _apply(self, kind: str, key: str, response: Dict[str, Any], from_webhook: bool = False):
+        status = str(response.get("status") or "").upper()
+        with self._cond:
+            item = self._items.get((kind, key))
+            if item is None:
+                return
+            old_status = item.status
+            item.status = status or old_status
+            final = bool(status) and status not in self.pending_statuses
+            if final:
+                del self._items[(kind, key)]
+                if from_webhook:
+                    self.webhook_resolutions += 1
+            elif not from_webhook:
+                item.interval = min(item.interval * self.backoff, self.max_interval)
+                item.due = time.monotonic() + item.interval
+                heapq.heappush(self._heap, (item.due, kind, key))
+                self._cond.notify()
+
+        if status and status != old_status:
+            for callback in self._callbacks:
+                try:
+                    callback(kind, key, old_status, status, response)
+                except Exception as e:
+                    logger.error(f"StatusWatcher callback failed for {kind} '{key}': {e}")
+        if final:
+            item.future.set_result(response)
+
+    def _poll(self, item: _WatchedItem):
+        try:
+            self._limiter.acquire()
+            with self._cond:
+                self.polls += 1
+            with request_priority(Priority.BACKGROUND):
+                response = self._fetchers[item.kind](item.key)
+        except Exception as e:
+            logger.warning(f"StatusWatcher poll failed for {item.kind} '{item.key}': {e}")
+            response = {}
+        finally:
+            self._slots.release()
+        with self._cond:
+            item.polling = False
+        self._apply(item.kind, item.key, response if isinstance(response, dict) else {})
+
+    def _next_due(self) -> Optional[_WatchedItem]:
+        """Waits for the next due item, skipping stale heap entries."""
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, kind, key = self._heap[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                item = self._items.get((kind, key))
+                if item is None or item.polling or item.due != due:
+                    continue
+                item.polling = True
+                return item
+        return None
+
+    def _run(self):
+        while self._running:
+            self._slots.acquire()
+            item = self._next_due()
+            if item is None:
+                self._slots.release()
+                break
+            self._executor.submit(self._poll, item)
+
+    def start(self):
+        """Starts the scheduler thread."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="payretailers-watcher")
+        self._thread = threading.Thread(target=self._run, name="payretailers-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops polling. Watched items are kept and resume on the next `start()`."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        """Returns watcher counters."""
+        return {
+            "watched": len(self._items),
+            "scheduled": len(self._heap),
+            "polls": self.polls,
+            "webhook_resolutions": self.webhook_resolutions,
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,88 @@
+import gzip
+import json
+import threading
+
+from payretailers.audit import AuditLog, POLICY_DROP, POLICY_BLOCK, POLICY_SPILL
+
+
+class StalledWriter:
+    """Wraps the real sink and holds the writer thread inside `write` until released."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, records):
+        self.entered.set()
+        assert self.release.wait(5)
+        self.writer.write(records)
+
+    def close(self):
+        self.writer.close()
+
+
+def _stalled_log(tmp_path, policy: str, **options):
+    audit = AuditLog(str(tmp_path / "audit.jsonl.gz"), max_queue=2, batch_size=1, flush_interval=0.01,
+                     policy=policy, **options)
+    stalled = audit._writer = StalledWriter(audit._writer)
+    _record(audit, 0)
+    assert stalled.entered.wait(5)
+    return audit, stalled
+
+
+def _record(audit: AuditLog, index: int):
+    audit.record("GET", f"transactions/{index}", None, None, 200, b'{"status": "PENDING"}', 1, 0.01)
+
+
+def _recording_in_background(audit: AuditLog, indexes) -> threading.Thread:
+    thread = threading.Thread(target=lambda: [_record(audit, index) for index in indexes])
+    thread.start()
+    thread.join(0.2)
+    return thread
+
+
+def _written(audit: AuditLog):
+    with gzip.open(audit.path, "rt", encoding="utf-8") as f:
+        return sorted(int(json.loads(line)["endpoint"].split("/")[1]) for line in f)
+
+
+def test_drop_policy_discards_records_while_the_writer_is_stalled(tmp_path):
+    audit, stalled = _stalled_log(tmp_path, POLICY_DROP)
+    for index in range(1, 6):
+        _record(audit, index)
+
+    stalled.release.set()
+    audit.close()
+
+    assert _written(audit) == [0, 1, 2]
+    assert audit.stats()["dropped"] == 3
+
+
+def test_block_policy_waits_for_room_in_the_queue(tmp_path):
+    audit, stalled = _stalled_log(tmp_path, POLICY_BLOCK)
+    thread = _recording_in_background(audit, range(1, 6))
+    assert thread.is_alive()
+
+    stalled.release.set()
+    thread.join(5)
+    audit.close()
+
+    assert _written(audit) == [0, 1, 2, 3, 4, 5]
+    assert audit.stats()["dropped"] == 0
+
+
+def test_spill_policy_bounds_the_overflow_and_ingests_it_later(tmp_path):
+    audit, stalled = _stalled_log(tmp_path, POLICY_SPILL, max_overflow=2)
+    thread = _recording_in_background(audit, range(1, 7))
+
+    # Two records are queued and two wait to be spilled; the fifth blocks the caller.
+    assert thread.is_alive()
+    assert len(audit._overflow) == 2
+
+    stalled.release.set()
+    thread.join(5)
+    audit.close()
+
+    assert _written(audit) == [0, 1, 2, 3, 4, 5, 6]
+    assert audit.stats()["spilled"] == 2
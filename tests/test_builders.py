@@ -0,0 +1,56 @@
+import logging
+
+import httpx
+import pydantic
+import pytest
+
+from payretailers.builders import TransactionRequestBuilder
+from payretailers.client import PayRetailersClient
+from payretailers.emulator import PayRetailersEmulator
+from payretailers.exceptions import ValidationError
+from payretailers.models import TransactionRequest, PreparedPayload
+
+
+def _builder(description: str = "Order {tracking_id}") -> TransactionRequestBuilder:
+    return TransactionRequestBuilder("BR", "BRL", notification_url="https://shop.test/webhook",
+                                     description=description, payment_method_tag="PIX")
+
+
+def _client() -> PayRetailersClient:
+    emulator = PayRetailersEmulator(webhooks=False)
+    return PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                              transport=emulator.transport(), sandbox=True)
+
+
+def test_description_keeps_braces_other_than_the_tracking_id():
+    payload = _builder("Order {tracking_id} {gift} {}").build(amount=10, tracking_id="t1", email="ana@example.com")
+
+    assert payload["description"] == "Order t1 {gift} {}"
+
+
+def test_prepared_payload_is_rejected_where_the_model_would_be():
+    payload = _builder().build(amount=10, tracking_id="t1", email="ana@example.com")
+    invalid = PreparedPayload(payload, currency="XYZ", customer=dict(payload["customer"], email="not-an-email"))
+
+    with pytest.raises(pydantic.ValidationError):
+        TransactionRequest(**invalid)
+    with pytest.raises(ValidationError) as error:
+        _client().create_transaction(invalid)
+    assert "currency:" in error.value.message and "customer.email:" in error.value.message
+
+
+def test_customer_model_validates_the_email_like_the_builder():
+    payload = _builder().build(amount=10, tracking_id="t1", email="ana@example.com")
+    payload["customer"]["email"] = "ana@example"
+
+    with pytest.raises(pydantic.ValidationError):
+        TransactionRequest(**payload)
+    with pytest.raises(ValidationError):
+        _builder().build(amount=10, tracking_id="t1", email="ana@example")
+
+
+def test_prepared_payload_is_sent_when_valid():
+    payload = _builder().build(amount=10, tracking_id="t1", email="ana@example.com",
+                               first_name="Ana", last_name="Silva", personal_id="123.456.789-09")
+
+    assert _client().create_transaction(payload)["status"] == "PENDING"
@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import time
+
+import httpx
+
+from payretailers.cache import ResponseCache, MemoryCacheBackend, CacheEntry
+from payretailers.client import PayRetailersClient
+from payretailers.emulator import PayRetailersEmulator
+from payretailers.scheduling import Priority, request_priority
+
+PAYOUT = {
+    "amount": 60,
+    "currencyCode": "BRL",
+    "country": "BR",
+    "bankName": "Banco",
+    "accountNumber": "12345",
+    "beneficiaryFirstName": "Ana",
+    "beneficiaryLastName": "Silva",
+    "documentType": "CPF",
+    "documentNumber": "12345678909",
+    "email": "ana@example.com",
+}
+
+
+class ETagServer:
+    """The emulator behind a transport that tags GET bodies and honours If-None-Match."""
+
+    def __init__(self, **emulator_options):
+        self.emulator = PayRetailersEmulator(balances={"BRL": 1000}, webhooks=False, **emulator_options)
+        self.gets = []
+
+    def transport(self) -> httpx.MockTransport:
+        def handler(request: httpx.Request) -> httpx.Response:
+            status, body = self.emulator.handle(request.method, request.url.path, dict(request.url.params),
+                                                request.headers, request.content)
+            headers = {"content-type": "application/json"}
+            if request.method == "GET":
+                self.gets.append(request.headers.get("if-none-match"))
+                if status == 200:
+                    headers["etag"] = f'"{hashlib.sha1(body).hexdigest()}"'
+                    if request.headers.get("if-none-match") == headers["etag"]:
+                        return httpx.Response(304, headers=headers)
+            return httpx.Response(status, content=body, headers=headers)
+        return httpx.MockTransport(handler)
+
+    def client(self, cache: ResponseCache) -> PayRetailersClient:
+        return PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                  transport=self.transport(), cache=cache)
+
+
+def test_expired_entry_is_revalidated_with_its_etag():
+    server = ETagServer(settle_after=3600)
+    cache = ResponseCache(ttls={"payout": (86400.0, 0.0)})
+    client = server.client(cache)
+    reference = client.create_payout(dict(PAYOUT, externalReference="p1"))["externalReference"]
+
+    first = client.get_payout_details(reference)
+    second = client.get_payout_details(reference)
+
+    assert second == first
+    assert server.gets == [None, server.gets[1]] and server.gets[1].startswith('"')
+    assert cache.stats() == {"hits": 0, "misses": 2, "revalidations": 1}
+
+
+def test_pending_entry_expires_and_final_entry_is_kept():
+    server = ETagServer(settle_after=0.1, payout_outcomes={"APPROVED": 1.0})
+    cache = ResponseCache(ttls={"payout": (86400.0, 0.05)})
+    client = server.client(cache)
+    reference = client.create_payout(PAYOUT)["externalReference"]
+
+    assert client.get_payout_details(reference)["status"] == "PENDING"
+    assert client.get_payout_details(reference)["status"] == "PENDING"
+    assert len(server.gets) == 1
+
+    time.sleep(0.15)
+    assert client.get_payout_details(reference)["status"] == "APPROVED"
+    assert client.get_payout_details(reference)["status"] == "APPROVED"
+    assert len(server.gets) == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_unknown_statuses_get_the_short_ttl():
+    cache = ResponseCache()
+
+    assert cache.ttl_for("transactions/abc", {"status": "APPROVED"}) == 86400.0
+    assert cache.ttl_for("transactions/abc", {"status": "PENDING"}) == 5.0
+    assert cache.ttl_for("transactions/abc", {"status": "ON_HOLD"}) == 5.0
+    assert cache.ttl_for("transactions/abc", {}) == 5.0
+
+
+def test_background_poll_asks_upstream_despite_a_fresh_entry():
+    server = ETagServer(settle_after=3600)
+    cache = ResponseCache()
+    client = server.client(cache)
+    reference = client.create_payout(PAYOUT)["externalReference"]
+    client.get_payout_details(reference)
+
+    with request_priority(Priority.BACKGROUND):
+        client.get_payout_details(reference)
+    client.get_payout_details(reference)
+
+    # The poll revalidated the entry; the interactive read was then served from the cache.
+    assert len(server.gets) == 2 and server.gets[1] is not None
+    assert cache.stats()["revalidations"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_writes_invalidate_the_lookups_of_the_created_resource():
+    server = ETagServer(settle_after=3600)
+    backend = MemoryCacheBackend()
+    client = server.client(ResponseCache(backend))
+    key = ResponseCache.key("payout/p1", namespace=client.cache_namespace)
+    backend.set(key, CacheEntry(b'{"status": "FAILED"}', None, time.time() + 3600))
+
+    client.create_payout(dict(PAYOUT, externalReference="p1"))
+
+    assert backend.get(key) is None
+    assert client.get_payout_details("p1")["status"] == "PENDING"
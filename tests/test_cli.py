@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from payretailers.cli import main
+from payretailers.emulator import PayRetailersEmulator
+
+PAYOUT = {
+    "amount": 60,
+    "currencyCode": "BRL",
+    "country": "BR",
+    "bankName": "Banco",
+    "accountNumber": "12345",
+    "beneficiaryFirstName": "Ana",
+    "beneficiaryLastName": "Silva",
+    "documentType": "CPF",
+    "documentNumber": "12345678909",
+    "email": "ana@example.com",
+}
+
+
+@pytest.fixture
+def emulator_url(monkeypatch):
+    for name, value in (("SHOP_ID", "shop"), ("SECRET_KEY", "secret"), ("SUBSCRIPTION_KEY", "key")):
+        monkeypatch.setenv(name, value)
+    emulator = PayRetailersEmulator(balances={"BRL": 100}, settle_after=3600, webhooks=False)
+    yield emulator.serve()
+    emulator.stop()
+
+
+def _lines(output: str):
+    return sorted((json.loads(line) for line in output.splitlines()), key=lambda record: str(record.get("externalReference") or record.get("id")))
+
+
+def test_payouts_command_reports_each_record_and_fails_on_rejections(emulator_url, tmp_path, capsys):
+    payouts = tmp_path / "payouts.jsonl"
+    payouts.write_text("\n".join(json.dumps(dict(PAYOUT, externalReference=reference)) for reference in ("p1", "p2")) + "\n")
+
+    code = main(["--log-level", "critical", "--base-url", emulator_url, "payouts", str(payouts), "--concurrency", "1"])
+
+    first, second = _lines(capsys.readouterr().out)
+    assert code == 1
+    assert first["ok"] and first["response"]["status"] == "PENDING"
+    # The balance covers only one of the two payouts.
+    assert not second["ok"] and second["code"] == "INSUFFICIENT_BALANCE"
+
+
+def test_status_command_looks_up_every_id(emulator_url, tmp_path, capsys):
+    payouts = tmp_path / "payouts.csv"
+    payouts.write_text(",".join(PAYOUT) + ",externalReference\n" + ",".join(map(str, PAYOUT.values())) + ",p1\n")
+    assert main(["--log-level", "critical", "--base-url", emulator_url, "payouts", str(payouts)]) == 0
+    capsys.readouterr()
+    ids = tmp_path / "ids.txt"
+    ids.write_text("p1\nmissing\n")
+
+    code = main(["--log-level", "critical", "--base-url", emulator_url, "status", "--kind", "payout", str(ids)])
+
+    missing, found = _lines(capsys.readouterr().out)
+    assert code == 0
+    assert found == {"id": "p1", "ok": True, "status": "PENDING", "response": found["response"]}
+    assert not missing["ok"] and missing["code"] == "NOT_FOUND"
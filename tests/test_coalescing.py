@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from payretailers.client import PayRetailersClient
+from payretailers.coalescing import SingleFlight
+from payretailers.emulator import PayRetailersEmulator
+
+
+class SlowCall:
+    """A call that blocks until released and counts how often it really ran."""
+
+    def __init__(self, result=None, error: Exception = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _wait_for_waiters(flight: SingleFlight, count: int):
+    while flight.stats()["coalesced"] < count:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call_and_get_their_own_copy():
+    flight = SingleFlight()
+    call = SlowCall(result={"status": "PENDING"})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(flight.do, "transactions/abc", call) for _ in range(8)]
+        _wait_for_waiters(flight, 7)
+        call.release.set()
+        results = [future.result() for future in futures]
+
+    assert call.calls == 1
+    assert results == [{"status": "PENDING"}] * 8
+    results[0]["status"] = "APPROVED"
+    assert results[1]["status"] == "PENDING"
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 7}
+
+
+def test_error_reaches_every_caller_and_the_next_call_runs_again():
+    flight = SingleFlight()
+    call = SlowCall(error=ValueError("upstream failed"))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, "payout/p1", call) for _ in range(4)]
+        _wait_for_waiters(flight, 3)
+        call.release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+    call.error, call.result = None, "ok"
+    assert flight.do("payout/p1", call) == "ok"
+    assert call.calls == 2
+
+
+def test_cancelling_the_async_leader_does_not_fail_its_waiters():
+    flight = SingleFlight()
+    call = SlowCall(result={"status": "APPROVED"})
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do_async("transactions/abc", call))
+        await asyncio.to_thread(call.started.wait, 5)
+        waiter = asyncio.create_task(flight.do_async("transactions/abc", call))
+        thread_waiter = asyncio.create_task(asyncio.to_thread(flight.do, "transactions/abc", call))
+        while flight.stats()["coalesced"] < 2:
+            await asyncio.sleep(0.001)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        call.release.set()
+        return await waiter, await thread_waiter
+
+    assert asyncio.run(scenario()) == ({"status": "APPROVED"}, {"status": "APPROVED"})
+    assert call.calls == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_client_coalesces_identical_gets_only():
+    emulator = PayRetailersEmulator(latency=0.05, webhooks=False)
+    client = PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                transport=emulator.transport(), coalesce=True)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda country: client.get_payment_methods(country=country), ["BR"] * 6 + ["MX"] * 2))
+
+    assert results[0] == results[5] and results[6] != results[0]
+    assert emulator.stats()["requests"] == 2
+    assert client.coalescer.stats()["coalesced"] == 6
@@ -0,0 +1,58 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from payretailers.client import PayRetailersClient
+from payretailers.concurrency import AdaptiveConcurrency, AdaptiveLimiter
+from payretailers.emulator import PayRetailersEmulator, OVERLOAD_FACTOR
+
+
+def _release_after(limiter: AdaptiveLimiter, latency: float, error: bool = False):
+    limiter.acquire()
+    limiter.release(time.monotonic() - latency, error=error)
+
+
+def test_single_fast_outlier_does_not_turn_jitter_into_congestion():
+    limiter = AdaptiveLimiter(initial_limit=16)
+    _release_after(limiter, 0.0005)
+    for i in range(300):
+        _release_after(limiter, 0.010 + 0.004 * (i % 3))
+
+    assert limiter.decreases == 0
+    assert limiter.stats()["baseline_latency"] >= 0.009
+
+
+def test_latency_spike_over_the_baseline_shrinks_the_window():
+    limiter = AdaptiveLimiter(initial_limit=16)
+    for _ in range(50):
+        _release_after(limiter, 0.010)
+    before = limiter.limit
+    _release_after(limiter, 0.100)
+
+    assert limiter.decreases == 1
+    assert limiter.limit < before
+
+
+def test_limiter_converges_near_the_capacity_of_a_server_that_degrades_under_load():
+    capacity = 8
+    emulator = PayRetailersEmulator(latency=0.02, capacity=capacity, webhooks=False)
+    concurrency = AdaptiveConcurrency(initial_limit=48, max_limit=64)
+    client = PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                transport=emulator.transport(), concurrency=concurrency)
+
+    def lookup(_):
+        try:
+            client.get_payment_methods(country="BR")
+        except Exception:
+            pass
+
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        list(executor.map(lookup, range(2000)))
+
+    limit = concurrency.limits()["paymentMethods"]
+    stats = emulator.stats()
+    assert concurrency.stats()["paymentMethods"]["decreases"] > 0
+    # The AIMD saw-tooth probes slightly past the point where the server starts shedding.
+    assert capacity // 2 <= limit <= capacity * OVERLOAD_FACTOR + 2
+    # Shedding only happens while the window is still being discovered.
+    assert stats["overloads"] < stats["requests"] * 0.05
@@ -0,0 +1,100 @@
+import json
+import logging
+import time
+
+import httpx
+import pytest
+
+from payretailers.builders import TransactionRequestBuilder
+from payretailers.client import PayRetailersClient
+from payretailers.emulator import PayRetailersEmulator
+from payretailers.exceptions import AuthenticationError, PayRetailersError
+
+PAYOUT = {
+    "amount": 60,
+    "currencyCode": "BRL",
+    "country": "BR",
+    "bankName": "Banco",
+    "accountNumber": "12345",
+    "beneficiaryFirstName": "Ana",
+    "beneficiaryLastName": "Silva",
+    "documentType": "CPF",
+    "documentNumber": "12345678909",
+    "email": "ana@example.com",
+}
+
+BUILDER = TransactionRequestBuilder("BR", "BRL", notification_url="https://shop.test/webhook",
+                                    description="Order {tracking_id}", payment_method_tag="PIX")
+
+
+def _client(emulator: PayRetailersEmulator, **credentials) -> PayRetailersClient:
+    return PayRetailersClient(credentials.get("shop_id", "shop"), credentials.get("secret_key", "secret"), "key",
+                              log_level=logging.CRITICAL, max_retries=1, transport=emulator.transport(), sandbox=True)
+
+
+def _wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_pending_items_settle_move_the_balance_and_notify_the_shop():
+    delivered = []
+
+    def shop(request: httpx.Request) -> httpx.Response:
+        delivered.append((str(request.url), json.loads(request.content)))
+        return httpx.Response(200)
+
+    emulator = PayRetailersEmulator(balances={"BRL": 100}, settle_after=0.05, outcomes={"APPROVED": 1.0},
+                                    payout_outcomes={"FAILED": 1.0}, webhook_transport=httpx.MockTransport(shop))
+    client = _client(emulator)
+    with emulator:
+        complete = client.create_transaction(BUILDER.build(amount=50, tracking_id="t1", email="ana@example.com", first_name="Ana",
+                                                           last_name="Silva", personal_id="123.456.789-09"))
+        incomplete = client.create_transaction(BUILDER.build(amount=50, tracking_id="t2", email="bia@example.com"))
+        client.create_payout(dict(PAYOUT, externalReference="p1", NotificationUrl="https://shop.test/payouts"))
+        assert (complete["status"], incomplete["status"]) == ("PENDING", "MISSING_INFO")
+        assert emulator.balances()["list"][0] == {"currency": "BRL", "available": 40.0, "pending": 60.0}
+
+        _wait_until(lambda: len(delivered) == 3)
+
+    assert client.get_transaction(complete["uid"])["status"] == "APPROVED"
+    assert client.get_transaction_by_tracking_id("t2")["status"] == "EXPIRED"
+    assert client.get_payout_details("p1")["status"] == "FAILED"
+    # The approved transaction is credited and the failed payout refunded.
+    assert emulator.balances()["list"][0] == {"currency": "BRL", "available": 150.0, "pending": 0.0}
+    assert sorted((url, payload["status"]) for url, payload in delivered) == [
+        ("https://shop.test/payouts", "FAILED"), ("https://shop.test/webhook", "APPROVED"), ("https://shop.test/webhook", "EXPIRED")]
+    assert emulator.stats()["webhooks_sent"] == 3
+
+
+def test_invalid_requests_get_the_api_error_codes():
+    emulator = PayRetailersEmulator(balances={"BRL": 100}, customer_limit=1, webhooks=False)
+    client = _client(emulator)
+    client.create_transaction(BUILDER.build(amount=10, tracking_id="t1", email="ana@example.com"))
+
+    failures = {
+        "BLOCKED_BY_CUSTOMER_LIMIT_RULE": lambda: client.create_transaction(
+            BUILDER.build(amount=10, tracking_id="t2", email="ana@example.com")),
+        "PAYMENT_METHOD_NOT_ALLOWED": lambda: client.create_transaction(
+            BUILDER.build(amount=10, tracking_id="t3", email="bia@example.com", payment_method_tag="OXXO")),
+        "INSUFFICIENT_BALANCE": lambda: client.create_payout(dict(PAYOUT, amount=500)),
+        "NOT_FOUND": lambda: client.get_payout_details("missing"),
+    }
+    for code, call in failures.items():
+        with pytest.raises(PayRetailersError) as error:
+            call()
+        assert error.value.code == code
+
+
+def test_credentials_and_faults_are_enforced():
+    emulator = PayRetailersEmulator(credentials=("shop", "secret"), webhooks=False)
+    with pytest.raises(AuthenticationError):
+        _client(emulator, secret_key="wrong").get_shop_balance()
+    assert _client(emulator).get_shop_balance() == {"list": []}
+
+    faulty = PayRetailersEmulator(fault_rate=0.5, seed=7, webhooks=False)
+    statuses = [faulty.handle("GET", "/payments/v2/shop-balance", {}, {}, b"")[0] for _ in range(200)]
+    assert set(statuses) == {200, 503}
+    assert faulty.stats()["faults"] == statuses.count(503)
+    assert 60 <= statuses.count(503) <= 140
@@ -0,0 +1,123 @@
+import logging
+import time
+
+import httpx
+import pytest
+
+from payretailers.client import PayRetailersClient
+from payretailers.emulator import PayRetailersEmulator
+from payretailers.exceptions import APIConnectionError
+from payretailers.failover import EndpointPool
+
+PRIMARY = "http://primary.test/payments/v2/"
+SECONDARY = "http://secondary.test/payments/v2/"
+
+
+class Region:
+    """Two local stand-ins behind one mock transport; the primary answers probes fast but can fail requests."""
+
+    def __init__(self):
+        self.emulator = PayRetailersEmulator(balances={"BRL": 1000}, webhooks=False)
+        self.failure = None
+        self.calls = {PRIMARY: [], SECONDARY: []}
+
+    def transport(self) -> httpx.MockTransport:
+        def handler(request: httpx.Request) -> httpx.Response:
+            base = PRIMARY if request.url.host == "primary.test" else SECONDARY
+            if request.method == "HEAD":
+                # The secondary probes slower, so the pool prefers the primary.
+                if base == SECONDARY:
+                    time.sleep(0.05)
+                return httpx.Response(200)
+            self.calls[base].append(request.method)
+            if base == PRIMARY and self.failure is not None:
+                raise self.failure("primary is down", request=request)
+            status, body = self.emulator.handle(request.method, request.url.path, dict(request.url.params),
+                                                request.headers, request.content)
+            return httpx.Response(status, content=body, headers={"content-type": "application/json"})
+        return httpx.MockTransport(handler)
+
+    def client(self, pool: EndpointPool) -> PayRetailersClient:
+        return PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                  endpoints=pool, transport_factory=self.transport)
+
+
+def _probed_pool() -> EndpointPool:
+    return EndpointPool([PRIMARY, SECONDARY], probe_interval=3600)
+
+
+def _wait_for_probes(pool: EndpointPool):
+    deadline = time.monotonic() + 5
+    while pool.probes < len(pool) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_get_fails_over_to_the_next_endpoint_on_a_connection_error():
+    region = Region()
+    pool = _probed_pool()
+    with region.client(pool) as client:
+        _wait_for_probes(pool)
+        region.failure = httpx.ConnectError
+
+        assert client.get_shop_balance() == {"list": [{"currency": "BRL", "available": 1000.0, "pending": 0.0}]}
+
+    assert region.calls == {PRIMARY: ["GET"], SECONDARY: ["GET"]}
+    primary = pool.stats()["endpoints"][0]
+    assert primary["failovers"] == 1 and primary["consecutive_failures"] == 1
+
+
+def test_post_that_may_have_been_sent_is_not_failed_over():
+    region = Region()
+    pool = _probed_pool()
+    with region.client(pool) as client:
+        _wait_for_probes(pool)
+        region.failure = httpx.ReadTimeout
+
+        with pytest.raises(APIConnectionError):
+            client.create_payout({"amount": 10, "currencyCode": "BRL", "country": "BR", "bankName": "Banco",
+                                  "accountNumber": "1", "beneficiaryFirstName": "Ana", "beneficiaryLastName": "Silva",
+                                  "documentType": "CPF", "documentNumber": "12345678909", "email": "ana@example.com"})
+
+    assert region.calls == {PRIMARY: ["POST"], SECONDARY: []}
+
+
+def test_unhealthy_endpoint_recovers_after_a_successful_probe():
+    region = Region()
+    pool = _probed_pool()
+    with region.client(pool) as client:
+        _wait_for_probes(pool)
+        region.failure = httpx.ConnectError
+        client.get_shop_balance()
+        client.get_shop_balance()
+        assert not pool.stats()["endpoints"][0]["healthy"]
+        # Requests skip the unhealthy primary.
+        client.get_shop_balance()
+        assert region.calls[PRIMARY] == ["GET", "GET"]
+
+        region.failure = None
+        pool.probe()
+        assert pool.stats()["endpoints"][0]["healthy"]
+
+
+def test_shared_pool_probes_until_the_last_client_releases_it():
+    region = Region()
+    pool = _probed_pool()
+    first, second = region.client(pool), region.client(pool)
+    probe_thread = pool._thread
+
+    first.close()
+    first.close()
+    assert probe_thread.is_alive()
+    _wait_for_probes(pool)
+    # The probe client does not depend on the closed client.
+    assert all(endpoint["healthy"] for endpoint in pool.stats()["endpoints"])
+
+    second.close()
+    assert not probe_thread.is_alive()
+    assert pool._thread is None and pool._http is None
+
+
+def test_transport_instance_is_rejected_with_an_endpoint_pool():
+    with pytest.raises(ValueError):
+        PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL,
+                           base_url=[PRIMARY, SECONDARY], transport=Region().transport())
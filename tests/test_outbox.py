@@ -0,0 +1,117 @@
+import logging
+
+import httpx
+
+from payretailers.client import PayRetailersClient
+from payretailers.emulator import PayRetailersEmulator
+from payretailers.exceptions import LoadSheddedError
+from payretailers.outbox import PayRetailersOutbox, STATUS_PENDING, STATUS_SENDING, STATUS_SENT
+
+PAYOUT = {
+    "amount": 60,
+    "currencyCode": "BRL",
+    "country": "BR",
+    "bankName": "Banco",
+    "accountNumber": "12345",
+    "beneficiaryFirstName": "Ana",
+    "beneficiaryLastName": "Silva",
+    "documentType": "CPF",
+    "documentNumber": "12345678909",
+    "email": "ana@example.com",
+}
+
+
+class Gateway:
+    """The emulator behind a gateway that can answer payout creation with a 502 after forwarding it."""
+
+    def __init__(self):
+        self.emulator = PayRetailersEmulator(balances={"BRL": 1000}, settle_after=3600, webhooks=False)
+        self.broken = False
+
+    def client(self) -> PayRetailersClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            status, body = self.emulator.handle(request.method, request.url.path, dict(request.url.params),
+                                                request.headers, request.content)
+            if self.broken and request.method == "POST":
+                status, body = 502, b'{"code": "BAD_GATEWAY", "message": "Upstream timed out"}'
+            return httpx.Response(status, content=body, headers={"content-type": "application/json"})
+        return PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                  transport=httpx.MockTransport(handler))
+
+    def payouts(self) -> int:
+        return self.emulator.stats()["statuses"]["payout"]["PENDING"]
+
+
+def test_recover_after_a_crash_marks_sent_items_and_requeues_unsent_ones(tmp_path):
+    gateway = Gateway()
+    path = str(tmp_path / "outbox.db")
+    crashed = PayRetailersOutbox(gateway.client(), path=path)
+    sent = crashed.enqueue_payout(dict(PAYOUT, externalReference="p1"))
+    unsent = crashed.enqueue_payout(dict(PAYOUT, externalReference="p2"))
+    # The worker claimed both, created the first upstream, then died before recording anything.
+    claimed = crashed._claim(2)
+    gateway.client().create_payout(dict(PAYOUT, externalReference="p1"))
+    assert len(claimed) == 2 and crashed.counts() == {STATUS_SENDING: 2}
+
+    with PayRetailersOutbox(gateway.client(), path=path) as outbox:
+        assert outbox.recover() == {"sent": 1, "requeued": 1, "unknown": 0}
+        assert outbox.get(sent)["status"] == STATUS_SENT
+        assert outbox.get(unsent)["status"] == STATUS_PENDING
+
+        assert outbox.dispatch_pending() == 1
+        assert outbox.counts() == {STATUS_SENT: 2}
+    assert gateway.payouts() == 2
+
+
+def test_5xx_stays_sending_until_it_is_stale_and_then_reconciles(tmp_path):
+    gateway = Gateway()
+    gateway.broken = True
+    with PayRetailersOutbox(gateway.client(), path=str(tmp_path / "outbox.db"), stale_after=60) as outbox:
+        item = outbox.enqueue_payout(PAYOUT)
+        outbox.dispatch_pending()
+        assert outbox.get(item)["status"] == STATUS_SENDING
+
+        # Not stale yet: the next cycle leaves it alone instead of resending it.
+        outbox.dispatch_pending()
+        assert outbox.get(item)["status"] == STATUS_SENDING
+
+        outbox.stale_after = 0
+        outbox.dispatch_pending()
+        assert outbox.get(item)["status"] == STATUS_SENT
+        assert outbox.get(item)["attempts"] == 1
+    assert gateway.payouts() == 1
+
+
+def test_lookup_answer_that_is_not_the_item_keeps_it_sending(tmp_path):
+    gateway = Gateway()
+    client = gateway.client()
+    with PayRetailersOutbox(client, path=str(tmp_path / "outbox.db")) as outbox:
+        item = outbox.enqueue_payout(dict(PAYOUT, externalReference="p1"))
+        outbox._claim(1)
+
+        for answer in ({"externalReference": "p2", "status": "APPROVED"}, {"message": "OK"}):
+            client.get_payout_details = lambda reference, answer=answer: answer
+            assert outbox.recover() == {"sent": 0, "requeued": 0, "unknown": 1}
+            assert outbox.get(item)["status"] == STATUS_SENDING
+
+        client.get_payout_details = lambda reference: {"status": "PENDING"}
+        assert outbox.recover()["sent"] == 1
+
+
+def test_shed_items_are_deferred_to_the_next_cycle(tmp_path):
+    gateway = Gateway()
+    client = gateway.client()
+    with PayRetailersOutbox(client, path=str(tmp_path / "outbox.db")) as outbox:
+        item = outbox.enqueue_payout(PAYOUT)
+        create_payout = client.create_payout
+
+        def shed(request):
+            raise LoadSheddedError("BACKGROUND queue is full")
+        client.create_payout = shed
+
+        assert outbox.dispatch_pending() == 0
+        assert outbox.get(item)["status"] == STATUS_PENDING
+
+        client.create_payout = create_payout
+        assert outbox.dispatch_pending() == 1
+        assert outbox.get(item)["status"] == STATUS_SENT
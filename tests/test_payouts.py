@@ -0,0 +1,85 @@
+import logging
+from decimal import Decimal
+
+import httpx
+
+from payretailers.client import PayRetailersClient
+from payretailers.emulator import PayRetailersEmulator
+from payretailers.exceptions import LoadSheddedError
+from payretailers.payouts import PayoutScheduler, RESULT_SENT, RESULT_HELD
+
+PAYOUT = {
+    "currencyCode": "BRL",
+    "country": "BR",
+    "bankName": "Banco",
+    "accountNumber": "12345",
+    "beneficiaryFirstName": "Ana",
+    "beneficiaryLastName": "Silva",
+    "documentType": "CPF",
+    "documentNumber": "12345678909",
+    "email": "ana@example.com",
+}
+
+
+def _failing_after_create(emulator: PayRetailersEmulator) -> httpx.MockTransport:
+    """Creates payouts upstream, then answers the POST with a 502 as a broken gateway would."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        status, body = emulator.handle(request.method, request.url.path, dict(request.url.params),
+                                       request.headers, request.content)
+        if request.method == "POST" and request.url.path.endswith("/payout"):
+            status, body = 502, b'{"code": "BAD_GATEWAY", "message": "Upstream timed out"}'
+        return httpx.Response(status, content=body, headers={"content-type": "application/json"})
+    return httpx.MockTransport(handler)
+
+
+def test_payout_created_before_a_5xx_keeps_its_reservation():
+    emulator = PayRetailersEmulator(balances={"BRL": 100}, settle_after=3600, webhooks=False)
+    client = PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                transport=_failing_after_create(emulator))
+    scheduler = PayoutScheduler(client, max_workers=1)
+    first = scheduler.submit(dict(PAYOUT, amount=60, externalReference="p1"))
+    second = scheduler.submit(dict(PAYOUT, amount=60, externalReference="p2"))
+
+    results = {result.request.external_reference: result.status for result in scheduler.run()}
+
+    # The first payout was found upstream, so the second no longer fits in the balance.
+    assert results == {first: RESULT_SENT, second: RESULT_HELD}
+    assert scheduler.balances["BRL"] == Decimal(40)
+    assert emulator.balances()["list"][0]["available"] == 40
+
+
+def test_shed_payout_is_requeued_instead_of_failed():
+    emulator = PayRetailersEmulator(balances={"BRL": 1000}, webhooks=False)
+    client = PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                transport=emulator.transport())
+    scheduler = PayoutScheduler(client, max_workers=1)
+    reference = scheduler.submit(dict(PAYOUT, amount=60))
+    create_payout = client.create_payout
+
+    def shed(request):
+        raise LoadSheddedError("BACKGROUND queue is full")
+    client.create_payout = shed
+
+    results = scheduler.run()
+    assert [(r.request.external_reference, r.status) for r in results] == [(reference, RESULT_HELD)]
+    assert scheduler.reserved["BRL"] == 0
+    assert scheduler.pending() == {"BRL": 1}
+
+    client.create_payout = create_payout
+    assert [r.status for r in scheduler.run()] == [RESULT_SENT]
+
+
+def test_payout_amount_is_sent_as_the_quantized_json_number():
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request.content)
+        return httpx.Response(200, json={"externalReference": "p1", "status": "PENDING"})
+    client = PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1,
+                                transport=httpx.MockTransport(handler))
+
+    client.create_payout(dict(PAYOUT, amount="10.50", externalReference="p1"))
+    client.create_payout(dict(PAYOUT, amount=Decimal("0.1") + Decimal("0.2"), currencyCode="USDT", externalReference="p2"))
+
+    assert b'"amount":10.5,' in sent[0]
+    assert b'"amount":0.3,' in sent[1]
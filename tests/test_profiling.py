@@ -0,0 +1,58 @@
+import logging
+
+from payretailers.client import PayRetailersClient
+from payretailers.emulator import PayRetailersEmulator
+from payretailers.profiling import ProfileAggregator, profile, phase, active_profile
+
+PAYOUT = {
+    "amount": 60,
+    "currencyCode": "BRL",
+    "country": "BR",
+    "bankName": "Banco",
+    "accountNumber": "12345",
+    "beneficiaryFirstName": "Ana",
+    "beneficiaryLastName": "Silva",
+    "documentType": "CPF",
+    "documentNumber": "12345678909",
+    "email": "ana@example.com",
+}
+
+
+def test_profile_breaks_a_call_down_into_phases():
+    emulator = PayRetailersEmulator(balances={"BRL": 1000}, latency=0.02, webhooks=False)
+    base_url = emulator.serve()
+    aggregator = ProfileAggregator()
+    try:
+        with PayRetailersClient("shop", "secret", "key", log_level=logging.CRITICAL, max_retries=1, base_url=base_url) as client:
+            for _ in range(2):
+                with profile(aggregator) as p:
+                    client.create_payout(PAYOUT)
+    finally:
+        emulator.stop()
+
+    summary = p.summary()
+    for name in ("model_build", "model_dump", "serialize", "attempt", "json_decode", "pool_acquire",
+                 "http.send_request_headers", "http.receive_response_headers"):
+        assert name in summary, name
+    # The emulator latency is spent waiting for the response headers, inside the attempt.
+    assert summary["http.receive_response_headers"] >= 0.02
+    assert summary["attempt"] >= summary["http.receive_response_headers"]
+    assert p.total >= summary["attempt"]
+
+    totals = aggregator.summary()
+    assert aggregator.calls == 2
+    assert totals["attempt"]["count"] == 2 and totals["total"]["count"] == 2
+    # Only the first call opened a connection; the second reused it.
+    assert totals["http.connect_tcp"]["count"] == 1
+
+
+def test_phases_are_not_recorded_outside_a_profile():
+    with phase("serialize"):
+        pass
+    assert active_profile() is None
+
+    with profile() as p:
+        with phase("serialize"):
+            pass
+    assert [timing.name for timing in p.phases] == ["serialize"]
+    assert active_profile() is None
@@ -0,0 +1,124 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from payretailers import client as client_module
+from payretailers import PayRetailersBrazil
+from payretailers.client import PayRetailersClient
+from payretailers.builders import TransactionRequestBuilder
+
+TAGS = [f"TAG{i}" for i in range(8)]
+
+
+class MockAPI:
+    """Answers transactions and catalogs; landing info is never available, so every tag gets blacklisted."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.catalog_fetches = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/paymentMethods"):
+            with self.lock:
+                self.catalog_fetches += 1
+            return httpx.Response(200, json={"list": [{"paymentMethodTag": tag} for tag in TAGS]})
+        if request.method == "POST" and path.endswith("/transactions"):
+            body = json.loads(request.content)
+            return httpx.Response(200, json={"id": body["trackingId"], "status": "PENDING"})
+        if "/landing-info/" in path:
+            return httpx.Response(404, json={"code": "NOT_FOUND", "message": "No H2H flow"})
+        return httpx.Response(404, json={"code": "NOT_FOUND", "message": path})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+
+@pytest.fixture
+def blacklist_file(tmp_path, monkeypatch):
+    path = tmp_path / "h2h_cache.json"
+    monkeypatch.setattr(client_module, "BLACKLIST_FILE", str(path))
+    return path
+
+
+def _blacklisted(blacklist_file):
+    # Removed payment methods stay in the file as negative values for a while.
+    return {tag for tag, expiry in json.loads(blacklist_file.read_text()).items() if expiry > 0}
+
+
+def _save_failures(caplog):
+    return [r for r in caplog.records if "Failed to save H2H blacklist cache" in r.getMessage()]
+
+
+def test_shared_country_client_fetches_catalog_once_and_keeps_every_blacklist_update(blacklist_file, caplog):
+    api = MockAPI()
+    client = PayRetailersBrazil("shop", "secret", "key", log_level=logging.WARNING, max_retries=1, transport=api.transport())
+
+    def create(i):
+        return client.create_transaction(
+            amount=100,
+            description="stress",
+            tracking_id=f"track-{i}",
+            notification_url="https://example.com/hook",
+            customer_email=f"payer{i}@example.com",
+            customer_first_name="Ana",
+            customer_last_name="Silva",
+            customer_personal_id="52998224725",
+            payment_method_tag=TAGS[i % len(TAGS)],
+        )
+
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        responses = list(executor.map(create, range(640)))
+
+    assert len(responses) == 640
+    assert api.catalog_fetches == 1
+    assert set(client._client.blacklist) == set(TAGS)
+    assert _blacklisted(blacklist_file) == set(TAGS)
+    assert not _save_failures(caplog)
+
+
+def test_many_clients_in_one_process_save_the_blacklist_without_collisions(blacklist_file, caplog):
+    api = MockAPI()
+    clients = [
+        PayRetailersClient("shop", "secret", "key", log_level=logging.WARNING, max_retries=1, transport=api.transport())
+        for _ in range(8)
+    ]
+    builder = TransactionRequestBuilder("BR", "BRL", notification_url="https://shop/webhook", description="Order")
+
+    def create(job):
+        index, i = job
+        payload = builder.build(amount=100, tracking_id=f"c{index}-{i}", email="customer@example.com",
+                                payment_method_tag=f"C{index}-TAG{i}")
+        return clients[index].create_transaction(payload)
+
+    jobs = [(index, i) for i in range(200) for index in range(len(clients))]
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        list(executor.map(create, jobs))
+
+    expected = {f"C{index}-TAG{i}" for index in range(len(clients)) for i in range(200)}
+    for index, client in enumerate(clients):
+        assert {f"C{index}-TAG{i}" for i in range(200)} <= set(client.blacklist)
+    # Every save merges with the file, so no client overwrites another's entries.
+    assert _blacklisted(blacklist_file) == expected
+    assert not _save_failures(caplog)
+    assert not list(blacklist_file.parent.glob("*.tmp"))
+
+
+def test_blacklist_saves_merge_entries_and_keep_removals(blacklist_file):
+    first = PayRetailersClient("shop", "secret", "key", log_level=logging.WARNING)
+    second = PayRetailersClient("shop", "secret", "key", log_level=logging.WARNING)
+
+    first._add_to_blacklist("PIX")
+    second._add_to_blacklist("BOLETO")
+    assert _blacklisted(blacklist_file) == {"PIX", "BOLETO"}
+
+    second._remove_from_blacklist("PIX")
+    assert _blacklisted(blacklist_file) == {"BOLETO"}
+    first._add_to_blacklist("ONLINE")
+    # The first client still holds PIX in memory, but the later removal wins.
+    assert _blacklisted(blacklist_file) == {"BOLETO", "ONLINE"}
+    assert set(first.blacklist) == {"BOLETO", "ONLINE"}
@@ -0,0 +1,32 @@
+import json
+
+import httpx
+
+from payretailers.transports import RecordingTransport, ReplayTransport, REDACTED_VALUE
+
+PDF = b"%PDF-1.4\n\xe2\xe3\xcf\xd3\n1 0 obj\n\xff\xfe\x00\x80binary stream\nendobj\n"
+
+
+def _upstream(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith(".pdf"):
+        return httpx.Response(200, content=PDF, headers={"content-type": "application/pdf"})
+    return httpx.Response(200, json={"uid": "abc", "customer": {"email": "ana@example.com"}})
+
+
+def test_binary_body_round_trips_exactly_through_a_cassette(tmp_path):
+    cassette = str(tmp_path / "traffic.jsonl")
+    recorder = RecordingTransport(cassette, transport=httpx.MockTransport(_upstream))
+    with httpx.Client(transport=recorder, base_url="https://api.test") as http:
+        recorded = http.get("/boleto/abc.pdf").content
+        http.post("/transactions", json={"trackingId": "t1"})
+
+    records = [json.loads(line) for line in open(cassette, encoding="utf-8")]
+    assert "body_b64" in records[0] and "body" not in records[0]
+    assert json.loads(records[1]["body"])["customer"]["email"] == REDACTED_VALUE
+
+    with httpx.Client(transport=ReplayTransport(cassette, latency_scale=0), base_url="https://api.test") as http:
+        replayed = http.get("/boleto/abc.pdf")
+
+    assert recorded == PDF
+    assert replayed.content == PDF
+    assert replayed.headers["content-type"] == "application/pdf"